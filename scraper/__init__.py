@@ -0,0 +1,5 @@
+"""
+Scripts for scraping, parsing and converting the difficulty data from the wiki
+
+Run `python -m scraper` to bring the whole pipeline up to date (see pipeline.py).
+"""
@@ -0,0 +1,12 @@
+"""
+Entry point for `python -m scraper`
+"""
+import os
+import sys
+
+# The scraper scripts import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pipeline import main
+
+main()
@@ -0,0 +1,271 @@
+"""
+Benchmark the chart parser, intro extraction and markdown conversion on the real data
+Throughput is reported in pages/s and MB/s of input, and compared against a stored
+JSON baseline so parser and extractor changes can be judged by numbers
+
+Usage:
+    python scraper/benchmark.py                     # Run all benchmarks and compare with the baseline
+    python scraper/benchmark.py --save              # Run and store the results as the new baseline
+    python scraper/benchmark.py extract convert     # Run only some benchmarks
+    python scraper/benchmark.py --threshold 0.1     # Fail if throughput drops by more than 10%
+    python scraper/benchmark.py --scaling           # Check the parser scales linearly on synthetic charts
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import convert_wikitext_to_markdown as converter
+import mediawiki_markdown
+from charts import CHART_PAGES
+from parse_main import parse_chart_file, parse_unclassified_difficulties, parse_wikitext_difficulties
+from synthetic_chart import write_scaled_chart
+
+BASELINE_FILE = 'scraper/benchmark-baseline.json'
+WIKITEXT_DIR = Path('difficulties/wikitext')
+DEFAULT_REPEAT = 5
+# Largest allowed drop in MB/s compared to the baseline, as a fraction
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_SCALES = [10, 100, 1000]
+# Largest allowed growth in time or peak memory per difficulty from the smallest
+# to the largest scale, as a fraction; a quadratic parser would grow 100x
+DEFAULT_LINEARITY_TOLERANCE = 1.0
+
+def chart_files():
+    """
+    The chart pages that have been downloaded
+    """
+    return [filename for _, filename in CHART_PAGES if os.path.exists(filename)]
+
+def load_corpus():
+    """
+    Read every difficulty wikitext file into memory
+    Returns a list of (name, wikitext)
+    """
+    return [(path.stem, path.read_text(encoding='utf-8')) for path in sorted(WIKITEXT_DIR.glob('*.wikitext'))]
+
+def text_size(texts):
+    return sum(len(text.encode('utf-8')) for text in texts)
+
+# Each setup function prepares its input once and returns (run, pages, input bytes);
+# run() is the work that gets timed
+
+def setup_parse_classified():
+    files = chart_files()
+    return lambda: [parse_wikitext_difficulties(f) for f in files], len(files), sum(os.path.getsize(f) for f in files)
+
+def setup_parse_unclassified():
+    files = chart_files()
+    return lambda: [parse_unclassified_difficulties(f) for f in files], len(files), sum(os.path.getsize(f) for f in files)
+
+def setup_extract():
+    corpus = load_corpus()
+    run = lambda: [converter.extract_main_content(wikitext, name) for name, wikitext in corpus]
+    return run, len(corpus), text_size(wikitext for _, wikitext in corpus)
+
+def setup_extract_streaming():
+    files = sorted(WIKITEXT_DIR.glob('*.wikitext'))
+    return lambda: [converter.extract_page(f) for f in files], len(files), sum(f.stat().st_size for f in files)
+
+def extracted_intros():
+    """
+    The introductions that the converter would be given, skipping pages with no content
+    """
+    intros = [converter.extract_main_content(wikitext, name) for name, wikitext in load_corpus()]
+    return [intro for intro in intros if len(intro) >= 10]
+
+def setup_convert():
+    intros = extracted_intros()
+    return lambda: [mediawiki_markdown.convert(intro) for intro in intros], len(intros), text_size(intros)
+
+def setup_convert_pandoc():
+    intros = extracted_intros()
+    return lambda: converter.markdown_with_pandoc_batch(intros), len(intros), text_size(intros)
+
+BENCHMARKS = {
+    'parse_classified': setup_parse_classified,
+    'parse_unclassified': setup_parse_unclassified,
+    'extract': setup_extract,
+    'extract_streaming': setup_extract_streaming,
+    'convert': setup_convert,
+    'convert_pandoc': setup_convert_pandoc,
+}
+
+def time_benchmark(run, repeat):
+    """
+    Best wall time of `repeat` runs, with garbage collected before each
+    """
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run_benchmark(name, repeat):
+    """
+    Run one benchmark and return its result dict
+    """
+    run, pages, size = BENCHMARKS[name]()
+    seconds = time_benchmark(run, repeat)
+    return {
+        'seconds': seconds,
+        'pages': pages,
+        'bytes': size,
+        'pages_per_second': pages / seconds if seconds else 0.0,
+        'mb_per_second': size / 1e6 / seconds if seconds else 0.0,
+    }
+
+def load_baseline(path=BASELINE_FILE):
+    """
+    Load stored baseline results, or None if there are none yet
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_baseline(results, path=BASELINE_FILE):
+    """
+    Store results as the baseline, along with the machine they were measured on
+    """
+    baseline = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def compare(result, baseline_result, threshold):
+    """
+    Relative change in MB/s against the baseline, and whether it is a regression
+    """
+    if not baseline_result or not baseline_result.get('mb_per_second'):
+        return None, False
+    change = result['mb_per_second'] / baseline_result['mb_per_second'] - 1
+    return change, change < -threshold
+
+def measure_scaled_parse(chart_file, repeat):
+    """
+    Parse a chart file, returning (difficulties found, best time, peak traced memory in bytes)
+    Memory is measured in a separate run, since tracing slows the parser down
+    """
+    seconds = time_benchmark(lambda: parse_chart_file(chart_file), repeat)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        classified, unclassified = parse_chart_file(chart_file)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return len(classified) + len(unclassified), seconds, peak
+
+def run_scaling(scales, repeat, tolerance):
+    """
+    Parse synthetic charts at each scale and check that time and peak memory per difficulty stay flat
+    Returns True if both grow linearly within `tolerance`
+    """
+    scales = sorted(scales)
+    rows = []
+    print(f"{'scale':>6} {'MB':>8} {'difficulties':>13} {'seconds':>9} {'us/diff':>8} {'peak MB':>8} {'KB/diff':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in scales:
+            chart_file = os.path.join(directory, f"source-{scale}x.wikitext")
+            size = write_scaled_chart(scale, chart_file)
+            count, seconds, peak = measure_scaled_parse(chart_file, repeat)
+            os.remove(chart_file)
+            rows.append((scale, count, seconds, peak))
+            print(f"{scale:>6} {size / 1e6:>8.1f} {count:>13} {seconds:>9.3f} "
+                  f"{seconds / count * 1e6:>8.2f} {peak / 1e6:>8.1f} {peak / count / 1e3:>8.2f}")
+
+    (_, first_count, first_seconds, first_peak), (_, last_count, last_seconds, last_peak) = rows[0], rows[-1]
+    time_growth = (last_seconds / last_count) / (first_seconds / first_count)
+    memory_growth = (last_peak / last_count) / (first_peak / first_count)
+    print(f"\nPer-difficulty growth from {scales[0]}x to {scales[-1]}x: "
+          f"time {time_growth:.2f}x, peak memory {memory_growth:.2f}x (allowed: {1 + tolerance:.2f}x)")
+
+    linear = time_growth <= 1 + tolerance and memory_growth <= 1 + tolerance
+    print("✅ Parser scales linearly" if linear else "❌ Parser does not scale linearly")
+    return linear
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scraper parser, extractor and converter')
+    parser.add_argument('benchmarks', nargs='*', metavar='benchmark',
+                        help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'Runs per benchmark; the best time is kept (default: {DEFAULT_REPEAT})')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Largest allowed drop in MB/s against the baseline, as a fraction (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--baseline', default=BASELINE_FILE,
+                        help=f'Baseline JSON file (default: {BASELINE_FILE})')
+    parser.add_argument('--save', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--scaling', action='store_true',
+                        help='Instead, parse synthetic charts of growing size and check time and memory grow linearly')
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help=f"Chart scale factors for --scaling (default: {' '.join(map(str, DEFAULT_SCALES))})")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_LINEARITY_TOLERANCE,
+                        help=f'Allowed growth in per-difficulty cost for --scaling, as a fraction (default: {DEFAULT_LINEARITY_TOLERANCE})')
+    args = parser.parse_args()
+
+    if args.scaling:
+        if not run_scaling(args.scales, max(1, args.repeat), args.tolerance):
+            sys.exit(1)
+        return
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    names = args.benchmarks or list(BENCHMARKS)
+    if 'convert_pandoc' in names and not converter.pandoc_available():
+        print("⚠️  Pandoc is not available, skipping convert_pandoc\n")
+        names.remove('convert_pandoc')
+
+    baseline = load_baseline(args.baseline)
+    baseline_results = baseline['results'] if baseline else {}
+
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<20} {'pages':>6} {'seconds':>9} {'pages/s':>10} {'MB/s':>8}  vs baseline")
+    for name in names:
+        # Silence the progress and error prints of the code being measured
+        with open(os.devnull, 'w', encoding='utf-8') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                result = run_benchmark(name, max(1, args.repeat))
+            finally:
+                sys.stdout = stdout
+        results[name] = result
+
+        change, regressed = compare(result, baseline_results.get(name), args.threshold)
+        if change is None:
+            versus = '-'
+        else:
+            versus = f"{change:+.1%}" + (' ❌ regression' if regressed else '')
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<20} {result['pages']:>6} {result['seconds']:>9.4f} "
+              f"{result['pages_per_second']:>10.1f} {result['mb_per_second']:>8.2f}  {versus}")
+
+    if args.save:
+        # Keep baselines of benchmarks that were not run this time
+        save_baseline({**baseline_results, **results}, args.baseline)
+        print(f"\n💾 Saved baseline to {args.baseline}")
+    elif baseline is None:
+        print(f"\nNo baseline at {args.baseline} yet; run with --save to create one")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
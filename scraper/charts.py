@@ -0,0 +1,13 @@
+"""
+Difficulty chart pages scraped by download_main.py and parsed by parse_main.py
+"""
+
+CHART_API_URL = 'https://jtohs-joke-towers.fandom.com/api.php'
+
+# (page title, local wikitext file), in the order their difficulties are merged
+# The chart is split in two to reduce lag from the byte count:
+# the Regular chart covers Class Negative to Class 10, the Extended (Spiritual) chart Class 11 to Class 22
+CHART_PAGES = [
+    ('Main_Difficulty_Chart', 'difficulties/source.wikitext'),
+    ('Extended_Difficulty_Chart', 'difficulties/source-extended.wikitext'),
+]
@@ -1,16 +1,12 @@
 """
 Check if there are any EToH difficulties in the classified sections
 """
-import json
+from difficulty_index import load_index
 
-with open('difficulties/difficulties.json', 'r', encoding='utf-8') as f:
-    difficulties = json.load(f)
+index = load_index()
 
 # Find classified EToH difficulties
-classified_etoh = [
-    d for d in difficulties 
-    if d['class'] != 'Unclassified' and 'jtoh.fandom.com' in d['url']
-]
+classified_etoh = index.query({'host': 'jtoh.fandom.com'}, exclude={'class': 'Unclassified'})
 
 if classified_etoh:
     print(f"Found {len(classified_etoh)} EToH difficulties in classified sections:")
@@ -29,12 +25,7 @@ print("\n" + "=" * 80)
 print("Summary:")
 print("=" * 80)
 
-url_domains = {}
-for diff in difficulties:
-    # Extract domain from URL
-    if 'fandom.com' in diff['url']:
-        domain = diff['url'].split('//')[1].split('/')[0]
-        url_domains[domain] = url_domains.get(domain, 0) + 1
+url_domains = {host: count for host, count in index.count_by('host').items() if 'fandom.com' in host}
 
 for domain, count in sorted(url_domains.items()):
     print(f"{domain}: {count} difficulties")
@@ -1,21 +1,12 @@
-import json
+from difficulty_index import load_index
 
-with open('difficulties/difficulties.json', encoding='utf-8') as f:
-    data = json.load(f)
+index = load_index()
 
-# Check for duplicate names
-name_counts = {}
-for d in data:
-    name = d['name']
-    if name not in name_counts:
-        name_counts[name] = []
-    name_counts[name].append(d)
+# Find duplicate names
+duplicates = index.duplicates('name')
 
-# Find duplicates
-duplicates = {name: entries for name, entries in name_counts.items() if len(entries) > 1}
-
-print(f"Total difficulties: {len(data)}")
-print(f"Unique names: {len(name_counts)}")
+print(f"Total difficulties: {len(index)}")
+print(f"Unique names: {len(index.count_by('name'))}")
 print(f"Duplicated names: {len(duplicates)}")
 
 if duplicates:
@@ -1,9 +1,6 @@
-import json
+from difficulty_index import load_index
 
-with open('difficulties/difficulties.json', encoding='utf-8') as f:
-    data = json.load(f)
-
-unclassified = [d for d in data if d.get('class') == 'Unclassified']
+unclassified = load_index().find(**{'class': 'Unclassified'})
 
 print(f"Total Unclassified: {len(unclassified)}\n")
 print("Unclassified difficulties:")
@@ -1,16 +1,143 @@
 """
 Convert difficulty wikitext files to markdown
-Extracts main content and uses pandoc for conversion
+Extracts main content and uses pandoc (or the built-in converter) for conversion
 
 Usage:
-    python convert_wikitext_to_markdown.py              # Convert all files
-    python convert_wikitext_to_markdown.py "filename"   # Convert specific file
+    python convert_wikitext_to_markdown.py                    # Convert all files
+    python convert_wikitext_to_markdown.py "filename"         # Convert specific file
+    python convert_wikitext_to_markdown.py --engine python    # Convert without pandoc
+    python convert_wikitext_to_markdown.py --packed           # Read and write the packed corpus stores
 """
+import argparse
+import contextlib
+import hashlib
+import inspect
+import io
+import json
+import os
 import re
 import subprocess
-import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import mediawiki_markdown
+from corpus_store import INTRO_STORE, MARKDOWN_STORE, WIKITEXT_STORE, CorpusStore
+from metrics import Metrics, add_arguments, profiled
+
+ENGINES = ('pandoc', 'python')
+# Pages converted per pandoc run in batch mode
+BATCH_SIZE = 50
+REF_TAG_RE = re.compile(r'<ref[\s>/]', re.IGNORECASE)
+# Sidecar index of what each markdown file was converted from
+CACHE_FILE = 'difficulties/markdown-cache.json'
+# Introduction sections fetched by download_difficulty_wikitext.py --intro-only; a page found
+# here is newer than its full text in difficulties/wikitext and is converted from this instead
+INTRO_WIKITEXT_DIR = 'difficulties/wikitext-intro'
+
+TEMPLATE_BRACE_RE = re.compile(r'\{\{|\}\}')
+# Everything strip_markup removes, found by one left-to-right search
+STRIP_TOKEN_RE = re.compile(
+    r'(?P<template>\{\{)'
+    r'|(?P<comment><!--)'
+    r'|(?P<block><(?P<block_tag>(?i:tabber|gallery))\b[^>]*>)'
+    r'|(?P<file>\[\[File:)'
+    r'|(?P<tag></?(?:span|font)\b[^>]*>)'
+)
+TRAILING_WHITESPACE_RE = re.compile(r'\s*')
+# Header lines, matched one line at a time by read_intro
+INTRO_HEADER_RE = re.compile(r'^==\s*(?:Introduction|What\s+is).*?==\s*$', re.IGNORECASE)
+SECTION_HEADER_RE = re.compile(r'^={2,}.+?={2,}$')
+
+def match_templates(content):
+    """
+    Pair every {{ with its closing }}, allowing nesting
+    Returns a dict mapping the position of each closed {{ to the end of its }}
+    Unclosed {{ are left out, so they stay in the text
+    """
+    closes = {}
+    stack = []
+    for brace in TEMPLATE_BRACE_RE.finditer(content):
+        if brace.group() == '{{':
+            stack.append(brace.start())
+        elif stack:
+            closes[stack.pop()] = brace.end()
+    return closes
+
+def strip_markup(content):
+    """
+    Remove templates ({{...}}, properly nested), <tabber> and <gallery> blocks,
+    HTML comments, [[File:...]] links and span/font tags in one linear scan.
+    Unclosed tabbers, galleries and comments remove everything after them.
+    Templates are replaced by a space; everything else by nothing.
+    Whitespace after a File: link is dropped, and so are templates, comments,
+    tabbers and galleries right after it, with the whitespace around them.
+    """
+    template_ends = match_templates(content)
+    lowered = content.lower()
+    parts = []
+    pos = 0
+    
+    # Remember the last result of each closing-marker search; the scan only moves
+    # forward, so a search is never repeated over text already searched
+    found = {}
+    def find_closing(text, marker, start):
+        previous = found.get(marker)
+        if previous and (previous[1] == -1 or previous[1] >= start):
+            return previous[1]
+        index = text.find(marker, start)
+        found[marker] = (start, index)
+        return index
+    
+    # Set after a File: link until the next text is reached. Templates and the rest were
+    # once removed before File: links, so the whitespace after a link swallowed them too
+    after_file = False
+    while True:
+        if after_file:
+            pos = TRAILING_WHITESPACE_RE.match(content, pos).end()
+        token = STRIP_TOKEN_RE.search(content, pos)
+        if not token:
+            parts.append(content[pos:])
+            break
+        if token.start() > pos:
+            after_file = False
+        parts.append(content[pos:token.start()])
+        
+        if token.group('template'):
+            end = template_ends.get(token.start())
+            if end is None:
+                # Unclosed template: keep the braces as text
+                parts.append('{{')
+                pos = token.end()
+                after_file = False
+            else:
+                if not after_file:
+                    parts.append(' ')
+                pos = end
+        elif token.group('comment'):
+            end = find_closing(content, '-->', token.end())
+            pos = len(content) if end == -1 else end + 3
+        elif token.group('block'):
+            closing = f"</{token.group('block_tag').lower()}>"
+            end = find_closing(lowered, closing, token.end())
+            pos = len(content) if end == -1 else end + len(closing)
+        elif token.group('file'):
+            # A File: link ends at the first ]], along with any whitespace after it
+            end = find_closing(content, ']]', token.end())
+            if end == -1:
+                parts.append(token.group())
+                pos = token.end()
+            else:
+                pos = end + 2
+            after_file = end != -1
+        else:
+            # Span and font tags were removed after File: links, so they end the whitespace
+            pos = token.end()
+            after_file = False
+    
+    return ''.join(parts)
+
 def extract_main_content(wikitext, difficulty_name=None):
     """
     Extract only the introduction section from wikitext.
@@ -76,51 +203,15 @@ def extract_main_content(wikitext, difficulty_name=None):
             # print(f"  🐛 After section extraction: {len(content)} chars, starts with: {content[:80]}")
         # else: keep all content if no headers found
     
-    # Remove templates and infoboxes (do this early to clean up content)
-    # Remove multi-line templates with nested content
-    content = re.sub(r'\{\{(?:[^{}]|\{[^{]|\}[^}])*\}\}', ' ', content, flags=re.DOTALL)
-    # Remove any remaining simple templates  
-    content = re.sub(r'\{\{[^}]+\}\}', ' ', content)
-    # Debug
-    # print(f"  🐛 After templates: {content[:100]}")
-    
-    # Remove HTML divs but keep content inside
-    # content = re.sub(r'<div[^>]*>', '', content)
-    # content = re.sub(r'</div>', '', content)
-    
-    # Remove tabber tags and content
-    content = re.sub(r'<tabber>.*?</tabber>', '', content, flags=re.DOTALL | re.IGNORECASE)
-    content = re.sub(r'<tabber>.*', '', content, flags=re.DOTALL | re.IGNORECASE)
-    
-    # Remove gallery tags and content
-    content = re.sub(r'<gallery>.*?</gallery>', '', content, flags=re.DOTALL | re.IGNORECASE)
-    content = re.sub(r'<gallery>.*', '', content, flags=re.DOTALL | re.IGNORECASE)
+    # Remove templates, tabbers, galleries, comments, File: links and span/font tags
+    content = strip_markup(content)
     
     # Remove category tags (e.g., [[Category:Easy]])
     content = re.sub(r'\[\[Category:[^\]]+\]\]', '', content, flags=re.IGNORECASE)
     
-    # Remove HTML comments
-    content = re.sub(r'<!--.*?-->', '', content, flags=re.DOTALL)
-    content = re.sub(r'<!\-\-.*', '', content, flags=re.DOTALL)
-    
     # Remove badge links and references
     content = re.sub(r'https?://www\.roblox\.com/badges/[^\s\]]+', '', content)
     
-    # NOTE: File reference patterns removed - they were too greedy and eating wikilinks
-    # We handle [[File:...]] properly below anyway
-    
-    # Clean up File: references (do this AFTER extracting sections)
-    # Match [[File:...]] properly by looking for content until ]] (not just ])
-    content = re.sub(r'\[\[File:.*?\]\]\s*', '', content, flags=re.DOTALL)
-    
-    # Remove inline styles from span tags but keep content inside
-    content = re.sub(r'<span[^>]*>', '', content)
-    content = re.sub(r'</span>', '', content)
-    
-    # Remove font tags but keep content
-    content = re.sub(r'<font[^>]*>', '', content)
-    content = re.sub(r'</font>', '', content)
-    
     # Remove wikilinks but keep the display text
     # Pattern: [[Link|Display Text]] -> Display Text
     # Pattern: [[Link]] -> Link
@@ -145,13 +236,50 @@ def extract_main_content(wikitext, difficulty_name=None):
     
     return content
 
-def convert_wikitext_to_markdown(wikitext, output_file):
+def convert_wikitext_to_markdown(wikitext, output_file, engine='pandoc'):
     """
-    Convert wikitext to markdown using pandoc
+    Convert wikitext to markdown with the given engine ('pandoc' or 'python')
+    and write it to output_file
     Returns True if successful, False otherwise
     """
+    markdown_content = markdown_with_python(wikitext) if engine == 'python' else markdown_with_pandoc(wikitext)
+    if markdown_content is None:
+        return False
+    write_markdown(output_file, markdown_content)
+    return True
+
+def write_markdown(output_file, markdown_content):
+    """
+    Write converted markdown to its output file
+    """
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(markdown_content)
+
+def markdown_with_python(wikitext):
+    """
+    Convert wikitext to markdown in-process using mediawiki_markdown
+    Returns the markdown, or None if conversion failed
+    """
+    try:
+        return mediawiki_markdown.convert(wikitext)
+    except Exception as e:
+        print(f"  ❌ Conversion error: {e}")
+        return None
+
+def clean_pandoc_output(markdown_content):
+    """
+    Remove Pandoc's {=html} markers
+    """
+    markdown_content = re.sub(r'`<([^>]+)>`\{=html\}', '', markdown_content)
+    markdown_content = re.sub(r'\{=html\}', '', markdown_content)
+    return markdown_content
+
+def run_pandoc(wikitext, timeout=30):
+    """
+    Run pandoc to convert from mediawiki to markdown
+    Returns the raw pandoc output, or None if pandoc failed
+    """
     try:
-        # Run pandoc to convert from mediawiki to markdown
         # Use bytes input/output to avoid encoding issues on Windows
         # Additional options for cleaner markdown:
         # --wrap=none: Don't wrap lines
@@ -162,78 +290,325 @@ def convert_wikitext_to_markdown(wikitext, output_file):
                 '-f', 'mediawiki', 
                 '-t', 'markdown',
                 '--wrap=none',
-                '--markdown-headings=atx',
-                '-o', str(output_file)
+                '--markdown-headings=atx'
             ],
             input=wikitext.encode('utf-8'),
             capture_output=True,
-            timeout=30
+            timeout=timeout
         )
         
         if result.returncode == 0:
-            # Post-process the markdown to clean up Pandoc artifacts
-            with open(output_file, 'r', encoding='utf-8') as f:
-                markdown_content = f.read()
-            
-            # Remove Pandoc's {=html} markers
-            markdown_content = re.sub(r'`<([^>]+)>`\{=html\}', '', markdown_content)
-            markdown_content = re.sub(r'\{=html\}', '', markdown_content)
-            
-            # Write back the cleaned content
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(markdown_content)
-            
-            return True
+            return result.stdout.decode('utf-8').replace('\r\n', '\n')
         else:
             # Decode error message if available
             error_msg = result.stderr.decode('utf-8', errors='replace') if result.stderr else 'Unknown error'
             print(f"  ❌ Pandoc error: {error_msg}")
-            return False
+            return None
             
     except subprocess.TimeoutExpired:
         print(f"  ❌ Pandoc timeout")
-        return False
+        return None
     except FileNotFoundError:
         print(f"  ❌ Pandoc not found. Please install pandoc: https://pandoc.org/installing.html")
-        return False
+        return None
     except Exception as e:
         print(f"  ❌ Conversion error: {e}")
+        return None
+
+def markdown_with_pandoc(wikitext):
+    """
+    Convert wikitext to markdown using pandoc
+    Returns the cleaned markdown, or None if conversion failed
+    """
+    markdown_content = run_pandoc(wikitext)
+    return clean_pandoc_output(markdown_content) if markdown_content is not None else None
+
+def markdown_with_pandoc_batch(wikitexts, chunk_size=BATCH_SIZE):
+    """
+    Convert many wikitext documents with one pandoc run per chunk of `chunk_size` documents.
+    The documents are joined with unique sentinel paragraphs and the output is split
+    back apart on them. If a chunk does not split cleanly (e.g. an unclosed table
+    swallowed a sentinel), its documents are converted one at a time instead.
+    Returns a list of markdown strings (None where conversion failed), in input order.
+    """
+    results = [None] * len(wikitexts)
+
+    # Footnotes are numbered and collected per pandoc document, so pages with
+    # references have to be converted on their own
+    batchable = []
+    for index, wikitext in enumerate(wikitexts):
+        if REF_TAG_RE.search(wikitext):
+            results[index] = markdown_with_pandoc(wikitext)
+        else:
+            batchable.append(index)
+
+    for start in range(0, len(batchable), chunk_size):
+        indexes = batchable[start:start + chunk_size]
+        chunk = [wikitexts[index] for index in indexes]
+        sentinel = f"EJTBATCHSENTINEL{uuid.uuid4().hex}N"
+        joined = '\n\n'.join(f"{wikitext}\n\n{sentinel}{index}" for index, wikitext in enumerate(chunk))
+
+        output = run_pandoc(joined, timeout=30 + len(chunk))
+        pieces = re.split(rf'^{sentinel}(\d+)\s*$', output, flags=re.MULTILINE) if output is not None else []
+
+        # re.split gives [doc0, '0', doc1, '1', ..., trailing]
+        if pieces[1::2] != [str(position) for position in range(len(chunk))]:
+            if output is not None:
+                print(f"  ⚠️  Batch output did not split cleanly, converting {len(chunk)} pages one at a time")
+            pieces = [run_pandoc(wikitext) for wikitext in chunk]
+        else:
+            pieces = [piece.strip('\n') + '\n' for piece in pieces[0:-1:2]]
+
+        for index, piece in zip(indexes, pieces):
+            results[index] = clean_pandoc_output(piece) if piece is not None else None
+    return results
+
+def read_intro(lines):
+    """
+    Pick the introduction out of wikitext lines without keeping the rest of the page:
+    the section under the first "Introduction" / "What is" header, up to the next
+    header, or else everything before the first header.
+    Stops reading at the end of an introduction section; after the first header,
+    lines are only checked for an intro header and then dropped.
+    """
+    before_header = []
+    intro = None
+    past_first_header = False
+    
+    for line in lines:
+        text = line.rstrip('\n')
+        if intro is not None:
+            if SECTION_HEADER_RE.match(text):
+                break
+            intro.append(line)
+        elif INTRO_HEADER_RE.match(text):
+            intro = []
+        elif not past_first_header:
+            if SECTION_HEADER_RE.match(text):
+                past_first_header = True
+            else:
+                before_header.append(line)
+    
+    return ''.join(intro if intro is not None else before_header)
+
+def extract_page(wikitext_file):
+    """
+    Stream a wikitext file and extract its main content
+    Only the introduction slice is held in memory and cleaned
+    """
+    with open(wikitext_file, 'r', encoding='utf-8') as f:
+        intro = read_intro(f)
+    
+    # Extract main content (pass the difficulty name from filename)
+    return extract_main_content(intro, difficulty_name=Path(wikitext_file).stem)
+
+def extract_text(wikitext, difficulty_name):
+    """
+    extract_page for a page already in memory, e.g. read from a corpus store
+    Newlines are translated the way reading the file would
+    """
+    intro = read_intro(io.StringIO(wikitext, newline=None))
+    return extract_main_content(intro, difficulty_name=difficulty_name)
+
+def run_task(task):
+    """
+    Run func(*args) for a (func, args) task, capturing everything it prints
+    Returns (result, printed output, seconds taken); the result is None if it raised
+    """
+    func, args = task
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        try:
+            result = func(*args)
+        except Exception as e:
+            print(f"  ❌ Error: {e}")
+            result = None
+    return result, output.getvalue(), time.perf_counter() - start
+
+def parallel_map(func, argument_tuples, jobs=1):
+    """
+    Apply func to each argument tuple, across `jobs` worker processes when jobs > 1
+    Returns a list of (result, printed output, seconds taken) in input order, so progress can be reported in order
+    """
+    tasks = [(func, args) for args in argument_tuples]
+    if jobs <= 1 or len(tasks) <= 1:
+        return [run_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(run_task, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+
+def pandoc_version():
+    """
+    Get the first line of `pandoc --version`, or None if pandoc cannot be run
+    """
+    try:
+        result = subprocess.run(['pandoc', '--version'], capture_output=True, timeout=5)
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    output = result.stdout.decode('utf-8', errors='replace')
+    return output.splitlines()[0] if output else ''
+
+def pandoc_available():
+    """
+    Check whether pandoc can be run
+    """
+    return pandoc_version() is not None
+
+def hash_file(path):
+    """
+    SHA-256 of a file's bytes, read in chunks
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def converter_fingerprint(engine):
+    """
+    Fingerprint of the extraction and conversion logic for `engine`
+    Covers the source of the functions and patterns that shape the markdown, all of
+    mediawiki_markdown, and the pandoc version when converting with pandoc, so changing
+    any of them reconverts every page while CLI, caching or storage changes do not
+    """
+    digest = hashlib.sha256(engine.encode('utf-8'))
+    conversion_code = (read_intro, extract_main_content, match_templates, strip_markup,
+                       markdown_with_python, run_pandoc, markdown_with_pandoc, markdown_with_pandoc_batch,
+                       clean_pandoc_output)
+    for function in conversion_code:
+        digest.update(inspect.getsource(function).encode('utf-8'))
+    for pattern in (REF_TAG_RE, TEMPLATE_BRACE_RE, STRIP_TOKEN_RE, TRAILING_WHITESPACE_RE,
+                    INTRO_HEADER_RE, SECTION_HEADER_RE):
+        digest.update(repr(pattern).encode('utf-8'))
+    digest.update(inspect.getsource(mediawiki_markdown).encode('utf-8'))
+    if engine == 'pandoc':
+        digest.update((pandoc_version() or '').encode('utf-8'))
+    return digest.hexdigest()
+
+def load_cache(path=CACHE_FILE):
+    """
+    Load the conversion cache index, mapping each page name to the input hash and
+    converter fingerprint its markdown was produced from
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_cache(cache, path=CACHE_FILE, sources=None):
+    """
+    Save the conversion cache index
+    With `sources`, the names of the pages that still have wikitext, entries for any other page are dropped
+    """
+    if sources is not None:
+        cache = {name: entry for name, entry in cache.items() if name in sources}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write('\n')
+
+def is_cached(entry, output_exists, input_hash, fingerprint):
+    """
+    Check whether a page was already converted from this exact input with this exact converter
+    Pages that extracted to nothing have no output file and only need a matching entry
+    """
+    if not entry or entry.get('input') != input_hash or entry.get('fingerprint') != fingerprint:
         return False
+    return entry.get('status') == 'empty' or output_exists
 
 def main():
-    # Directories
-    wikitext_dir = Path('difficulties/wikitext')
-    markdown_dir = Path('difficulties/markdown')
+    parser = argparse.ArgumentParser(description='Convert difficulty wikitext files to markdown')
+    parser.add_argument('file', nargs='?', help='Convert only this wikitext file (overwrites existing markdown)')
+    parser.add_argument('--force', action='store_true',
+                        help='Reconvert every page, even if its input and the converter are unchanged')
+    parser.add_argument('--engine', choices=ENGINES, default='pandoc',
+                        help='Converter to use: pandoc, or the built-in python converter (default: pandoc)')
+    parser.add_argument('--batch', action='store_true',
+                        help='Convert many pages per pandoc run instead of starting pandoc for every page')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f'Pages per pandoc run in --batch mode (default: {BATCH_SIZE})')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Number of worker processes for extraction and conversion (default: 1)')
+    parser.add_argument('--packed', action='store_true',
+                        help=f'Read wikitext from {WIKITEXT_STORE} and write markdown to {MARKDOWN_STORE} '
+                             f'instead of the directories')
+    add_arguments(parser, 'markdown')
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    if args.batch_size < 1:
+        parser.error('--batch-size must be at least 1')
+    if args.batch and args.engine != 'pandoc':
+        parser.error('--batch only applies to the pandoc engine')
+
+    metrics = Metrics('markdown')
+    with profiled('markdown', args.profile):
+        convert_all(args, metrics)
+    print(f"📊 Metrics written to {metrics.write_report(args.metrics)}")
+
+def convert_all(args, metrics):
+    """
+    Extract and convert every wikitext file (or the one named in args) whose input or converter changed
+    """
+
+    # Directories; with --packed, paths inside the stores, whose members are named like the files
+    if args.packed:
+        if not os.path.exists(WIKITEXT_STORE):
+            print(f"❌ No packed wikitext at {WIKITEXT_STORE}")
+            print(f"   Run download_difficulty_wikitext.py --packed, or: python scraper/corpus_store.py pack difficulties/wikitext {WIKITEXT_STORE}")
+            return
+        wikitext_store = CorpusStore(WIKITEXT_STORE, create=False)
+        markdown_store = CorpusStore(MARKDOWN_STORE)
+        intro_store = CorpusStore(INTRO_STORE, create=False) if os.path.exists(INTRO_STORE) else None
+        wikitext_dir = Path(WIKITEXT_STORE)
+        markdown_dir = Path(MARKDOWN_STORE)
+        print(f"Input store: {wikitext_dir}")
+        print(f"Output store: {markdown_dir}\n")
+    else:
+        wikitext_store = markdown_store = intro_store = None
+        wikitext_dir = Path('difficulties/wikitext')
+        markdown_dir = Path('difficulties/markdown')
+        
+        # Create output directory
+        markdown_dir.mkdir(parents=True, exist_ok=True)
+        print(f"Output directory: {markdown_dir}\n")
     
-    # Create output directory
-    markdown_dir.mkdir(parents=True, exist_ok=True)
-    print(f"Output directory: {markdown_dir}\n")
+    try:
+        convert_pages(args, metrics, wikitext_dir, markdown_dir, wikitext_store, markdown_store, intro_store)
+    finally:
+        for store in (wikitext_store, markdown_store, intro_store):
+            if store is not None:
+                store.close()
+
+def convert_pages(args, metrics, wikitext_dir, markdown_dir, wikitext_store=None, markdown_store=None, intro_store=None):
+    """
+    The body of convert_all, reading from and writing to either the directories or the corpus stores
+    A page with an introduction section in INTRO_WIKITEXT_DIR (or `intro_store`) is read from there
+    """
     
     # Check if pandoc is available
-    try:
-        result = subprocess.run(['pandoc', '--version'], capture_output=True, timeout=5)
-        if result.returncode != 0:
+    if args.engine == 'pandoc':
+        if not pandoc_available():
             print("❌ Pandoc is not available. Please install it first.")
             print("   Visit: https://pandoc.org/installing.html")
             print("   Windows: winget install pandoc")
+            print("   Or convert without pandoc: --engine python")
             return
         print("✅ Pandoc is available\n")
-    except (FileNotFoundError, subprocess.TimeoutExpired):
-        print("❌ Pandoc is not available. Please install it first.")
-        print("   Visit: https://pandoc.org/installing.html")
-        print("   Windows: winget install pandoc")
-        return
+    else:
+        print("✅ Using the built-in python converter\n")
     
     # Check if a specific file was requested
-    if len(sys.argv) > 1:
+    if args.file:
         # Convert specific file
-        filename = sys.argv[1]
+        filename = args.file
         # Add .wikitext extension if not present
         if not filename.endswith('.wikitext'):
             filename = f"{filename}.wikitext"
         
         wikitext_file = wikitext_dir / filename
-        if not wikitext_file.exists():
+        if not (filename in wikitext_store if wikitext_store is not None else wikitext_file.exists()):
             print(f"❌ File not found: {wikitext_file}")
             print(f"   Looking in: {wikitext_dir.absolute()}")
             return
@@ -242,8 +617,29 @@ def main():
         print(f"Converting specific file: {filename}\n")
     else:
         # Get all wikitext files
-        wikitext_files = list(wikitext_dir.glob('*.wikitext'))
+        if wikitext_store is not None:
+            wikitext_files = [wikitext_dir / name for name in wikitext_store.names() if name.endswith('.wikitext')]
+        else:
+            wikitext_files = list(wikitext_dir.glob('*.wikitext'))
         print(f"Found {len(wikitext_files)} wikitext files\n")
+
+    # Pages refreshed by download_difficulty_wikitext.py --intro-only hold their newer
+    # introduction section apart from the full page; convert that instead
+    intro_dir = Path(INTRO_STORE) if wikitext_store is not None else Path(INTRO_WIKITEXT_DIR)
+    if wikitext_store is not None:
+        intro_names = set(intro_store.names()) if intro_store is not None else set()
+    else:
+        intro_names = {path.name for path in intro_dir.glob('*.wikitext')}
+    wikitext_files = [intro_dir / wikitext_file.name if wikitext_file.name in intro_names else wikitext_file
+                      for wikitext_file in wikitext_files]
+
+    def member_store(wikitext_file):
+        # The store holding a page, with --packed
+        return intro_store if wikitext_file.parent == intro_dir else wikitext_store
+
+    intro_count = sum(1 for wikitext_file in wikitext_files if wikitext_file.parent == intro_dir)
+    if intro_count:
+        print(f"📄 {intro_count} pages are converted from their introduction section alone\n")
     
     # Track statistics
     stats = {
@@ -252,53 +648,113 @@ def main():
         'skipped': 0
     }
     
-    # Process each file
+    cache = load_cache()
+    fingerprint = converter_fingerprint(args.engine)
+    
+    # Work out which files need converting: those whose wikitext or converter changed
+    to_convert = []
     for i, wikitext_file in enumerate(wikitext_files, 1):
         name = wikitext_file.stem
         output_file = markdown_dir / f"{name}.md"
+        with metrics.timer('hash_input'):
+            # The store already knows the hash of each member
+            if wikitext_store is not None:
+                input_hash = member_store(wikitext_file).sha256(wikitext_file.name)
+            else:
+                input_hash = hash_file(wikitext_file)
+        output_exists = output_file.name in markdown_store if markdown_store is not None else output_file.exists()
         
-        # Skip if already converted (unless converting a specific file)
-        if output_file.exists() and len(sys.argv) == 1:
-            print(f"[{i}/{len(wikitext_files)}] ⏭️  Skipping {name} (already exists)")
+        # Skip if converted from the same input by the same converter (unless converting a specific file)
+        if not args.file and not args.force and is_cached(cache.get(name), output_exists, input_hash, fingerprint):
+            print(f"[{i}/{len(wikitext_files)}] ⏭️  Skipping {name} (up to date)")
             stats['skipped'] += 1
             continue
-        elif output_file.exists():
+        elif output_exists:
             print(f"[{i}/{len(wikitext_files)}] 🔄 Overwriting {name}...")
         
-        print(f"[{i}/{len(wikitext_files)}] 🔄 Converting {name}...")
+        to_convert.append((name, wikitext_file, output_file, input_hash))
+    
+    # Extract the main content of each file
+    jobs = max(1, args.jobs)
+    print(f"\n📝 Extracting {len(to_convert)} files with {jobs} worker(s)...\n")
+    if wikitext_store is not None:
+        # One sequential read of the store instead of opening every page
+        texts = dict(wikitext_store.read_all()) if to_convert else {}
+        if intro_store is not None and to_convert:
+            texts.update(intro_store.read_all())
+        extracted = parallel_map(extract_text, [(texts[wikitext_file.name], name) for name, wikitext_file, _, _ in to_convert], jobs)
+    else:
+        extracted = parallel_map(extract_page, [(wikitext_file,) for _, wikitext_file, _, _ in to_convert], jobs)
+    
+    pending = []
+    for i, ((name, wikitext_file, output_file, input_hash), (main_content, log, seconds)) in enumerate(zip(to_convert, extracted), 1):
+        print(f"[{i}/{len(to_convert)}] 📝 Extracting {name}...")
+        print(log, end='')
+        metrics.add_time('extract_page', seconds)
+        metrics.count('wikitext_bytes', member_store(wikitext_file).size(wikitext_file.name) if wikitext_store is not None else wikitext_file.stat().st_size)
+        if main_content is None:
+            cache.pop(name, None)
+            stats['failed'] += 1
+        elif len(main_content) < 10:
+            print(f"  ⚠️  No meaningful content extracted")
+            # Remembered, so an unchanged page is not extracted again next run
+            cache[name] = {'input': input_hash, 'fingerprint': fingerprint, 'status': 'empty'}
+            stats['failed'] += 1
+        else:
+            print(f"  📝 Extracted {len(main_content)} characters")
+            metrics.count('extracted_characters', len(main_content))
+            pending.append((name, output_file, input_hash, main_content))
+    
+    # Convert to markdown
+    print()
+    contents = [main_content for _, _, _, main_content in pending]
+    if args.engine == 'pandoc' and args.batch:
+        print(f"🔄 Converting {len(contents)} pages with pandoc in batches of {args.batch_size}...\n")
+        chunks = [(contents[start:start + args.batch_size], args.batch_size)
+                  for start in range(0, len(contents), args.batch_size)]
+        converted = []
+        for (chunk, _), (markdowns, log, seconds) in zip(chunks, parallel_map(markdown_with_pandoc_batch, chunks, jobs)):
+            print(log, end='')
+            metrics.add_time('pandoc_batch', seconds)
+            converted.extend((markdown_content, '', None) for markdown_content in (markdowns or [None] * len(chunk)))
+    else:
+        convert = markdown_with_python if args.engine == 'python' else markdown_with_pandoc
+        converted = parallel_map(convert, [(main_content,) for main_content in contents], jobs)
+    
+    # Write each result exactly once
+    for i, ((name, output_file, input_hash, _), (markdown_content, log, seconds)) in enumerate(zip(pending, converted), 1):
+        print(log, end='')
+        if seconds is not None:
+            metrics.add_time(f"convert_{args.engine}", seconds)
+        if markdown_content is None:
+            print(f"[{i}/{len(pending)}] ❌ Failed to convert {name}")
+            cache.pop(name, None)
+            stats['failed'] += 1
+            continue
         
         try:
-            # Read wikitext
-            with open(wikitext_file, 'r', encoding='utf-8') as f:
-                wikitext = f.read()
-            
-            # Extract main content (pass the difficulty name from filename)
-            main_content = extract_main_content(wikitext, difficulty_name=name)
-            
-            if not main_content or len(main_content) < 10:
-                print(f"  ⚠️  No meaningful content extracted")
-                stats['failed'] += 1
-                continue
-            
-            print(f"  📝 Extracted {len(main_content)} characters")
-            
-            # Convert to markdown using pandoc
-            if convert_wikitext_to_markdown(main_content, str(output_file)):
-                # Read the converted file to check size
-                with open(output_file, 'r', encoding='utf-8') as f:
-                    markdown_content = f.read()
-                
-                print(f"  ✅ Converted to {output_file.name}")
-                print(f"  📊 Markdown size: {len(markdown_content)} characters")
-                stats['success'] += 1
+            if markdown_store is not None:
+                markdown_store.write(output_file.name, markdown_content)
             else:
-                stats['failed'] += 1
-                
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
+                write_markdown(output_file, markdown_content)
+            print(f"[{i}/{len(pending)}] ✅ Converted to {output_file.name} ({len(markdown_content)} characters)")
+            cache[name] = {'input': input_hash, 'fingerprint': fingerprint, 'status': 'converted'}
+            metrics.count('markdown_characters', len(markdown_content))
+            stats['success'] += 1
+        except OSError as e:
+            print(f"[{i}/{len(pending)}] ❌ Error writing {output_file.name}: {e}")
+            cache.pop(name, None)
             stats['failed'] += 1
-        
-        print()
+    
+    # Forget pages whose wikitext is gone, so the index does not grow with every rename
+    if wikitext_store is not None:
+        sources = {Path(name).stem for name in wikitext_store.names() if name.endswith('.wikitext')}
+    else:
+        sources = {wikitext_file.stem for wikitext_file in wikitext_dir.glob('*.wikitext')}
+    save_cache(cache, sources=sources)
+    for key in ('success', 'failed', 'skipped'):
+        metrics.count(f"pages_{key}", stats[key])
+    print()
     
     # Print summary
     print("=" * 80)
@@ -306,7 +762,7 @@ def main():
     print("=" * 80)
     print(f"Total files: {len(wikitext_files)}")
     print(f"  ✅ Successfully converted: {stats['success']}")
-    print(f"  ⏭️  Skipped (already exist): {stats['skipped']}")
+    print(f"  ⏭️  Skipped (up to date): {stats['skipped']}")
     print(f"  ❌ Failed: {stats['failed']}")
     print("=" * 80)
 
@@ -0,0 +1,296 @@
+"""
+Packed, compressed store for the wikitext and markdown corpus
+
+An alternative to one file per page: every page is a compressed member of a
+single archive, found through an index at the end of the file.
+
+Layout (little-endian):
+    header      MAGIC, version, then the offset and length of the index
+    members     each page's bytes, compressed with zlib or lzma
+    index       zlib-compressed JSON: {name: [offset, length, size, codec, sha256]}
+
+New and replaced members are appended after the last index and a new index is
+written after them on flush(); the header is updated last, so a crash mid-write
+leaves the previous state readable. Space left behind by replaced members and old
+indexes is reclaimed by compact(), which close() runs once it is half the file.
+
+Usage:
+    python scraper/corpus_store.py pack difficulties/wikitext difficulties/wikitext.pack
+    python scraper/corpus_store.py pack difficulties/markdown difficulties/markdown.pack --codec lzma
+    python scraper/corpus_store.py list difficulties/wikitext.pack
+    python scraper/corpus_store.py cat difficulties/wikitext.pack Easy.wikitext
+    python scraper/corpus_store.py unpack difficulties/wikitext.pack difficulties/wikitext
+    python scraper/corpus_store.py compact difficulties/wikitext.pack
+"""
+import argparse
+import hashlib
+import json
+import lzma
+import os
+import struct
+import sys
+import threading
+import zlib
+
+# Default stores, next to the directories they replace
+WIKITEXT_STORE = 'difficulties/wikitext.pack'
+MARKDOWN_STORE = 'difficulties/markdown.pack'
+INTRO_STORE = 'difficulties/wikitext-intro.pack'
+
+MAGIC = b'CORPPACK'
+VERSION = 1
+# magic, version, index offset, index length
+HEADER_FORMAT = '<8sHQQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+CODECS = {
+    'zlib': (lambda data: zlib.compress(data, 9), zlib.decompress),
+    'lzma': (lambda data: lzma.compress(data, preset=9), lzma.decompress),
+}
+DEFAULT_CODEC = 'zlib'
+# compact() on close once this fraction of the file is unused
+COMPACT_THRESHOLD = 0.5
+
+
+class CorpusStore:
+    """
+    Named, compressed members in one archive file, readable by name and appendable in place
+    Written members reach the file at once, but the index that makes them visible to
+    other readers is only written by flush() or close(); use it as a context manager.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path, codec=DEFAULT_CODEC, create=True):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec {codec!r}; use one of: {', '.join(CODECS)}")
+        self.path = path
+        self.codec = codec
+        self.lock = threading.Lock()
+        self.dirty = False
+        if not os.path.exists(path):
+            if not create:
+                raise FileNotFoundError(f"No corpus store at {path}")
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, 0, 0))
+        self.file = open(path, 'r+b')
+        magic, version, index_offset, index_length = struct.unpack(HEADER_FORMAT, self.file.read(HEADER_SIZE))
+        if magic != MAGIC or version != VERSION:
+            self.file.close()
+            raise ValueError(f"{path} is not a version {VERSION} corpus store")
+        self.read_index(index_offset, index_length)
+
+    def read_index(self, index_offset, index_length):
+        self.index = {}
+        if index_length:
+            self.file.seek(index_offset)
+            self.index = json.loads(zlib.decompress(self.file.read(index_length)))
+        self.index_length = index_length
+        self.end = self.file.seek(0, os.SEEK_END)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def names(self):
+        return sorted(self.index)
+
+    def sha256(self, name):
+        """
+        SHA-256 of a member's uncompressed bytes, without reading it
+        """
+        return self.index[name][4]
+
+    def size(self, name):
+        """
+        Uncompressed size of a member in bytes
+        """
+        return self.index[name][2]
+
+    def read_bytes(self, name):
+        """
+        The uncompressed bytes of a member; raises KeyError if there is none
+        """
+        with self.lock:
+            offset, length, _, codec, _ = self.index[name]
+            self.file.seek(offset)
+            data = self.file.read(length)
+        return CODECS[codec][1](data)
+
+    def read(self, name):
+        return self.read_bytes(name).decode('utf-8')
+
+    def read_all_bytes(self):
+        """
+        Yield (name, bytes) for every member, in file order, reading the archive with one sequential read
+        """
+        with self.lock:
+            entries = sorted(self.index.items(), key=lambda item: item[1][0])
+            self.file.seek(0)
+            data = self.file.read()
+        for name, (offset, length, _, codec, _) in entries:
+            yield name, CODECS[codec][1](data[offset:offset + length])
+
+    def read_all(self):
+        """
+        Yield (name, text) for every member, as read_all_bytes does
+        """
+        for name, data in self.read_all_bytes():
+            yield name, data.decode('utf-8')
+
+    def write(self, name, text):
+        """
+        Add or replace a member; unchanged content is not written again
+        Returns True if the member was written
+        """
+        data = text.encode('utf-8') if isinstance(text, str) else text
+        digest = hashlib.sha256(data).hexdigest()
+        compressed = CODECS[self.codec][0](data)
+        with self.lock:
+            if name in self.index and self.index[name][4] == digest:
+                return False
+            self.file.seek(self.end)
+            self.file.write(compressed)
+            self.index[name] = [self.end, len(compressed), len(data), self.codec, digest]
+            self.end += len(compressed)
+            self.dirty = True
+        return True
+
+    def delete(self, name):
+        with self.lock:
+            if self.index.pop(name, None) is not None:
+                self.dirty = True
+
+    def flush(self):
+        """
+        Write the index after the members and point the header at it
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            index = zlib.compress(json.dumps(self.index, ensure_ascii=False, sort_keys=True).encode('utf-8'), 9)
+            self.file.seek(self.end)
+            self.file.write(index)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.seek(0)
+            self.file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, self.end, len(index)))
+            self.file.flush()
+            self.end += len(index)
+            self.index_length = len(index)
+            self.dirty = False
+
+    def wasted_bytes(self):
+        """
+        Bytes held by replaced or deleted members and old indexes
+        """
+        live = sum(entry[1] for entry in self.index.values())
+        return self.end - HEADER_SIZE - live - (0 if self.dirty else self.index_length)
+
+    def compact(self):
+        """
+        Rewrite the archive with only the current members, in name order
+        """
+        self.flush()
+        temporary_path = f"{self.path}.tmp"
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        with self.lock:
+            with CorpusStore(temporary_path, self.codec) as compacted:
+                for name in sorted(self.index):
+                    offset, length, size, codec, digest = self.index[name]
+                    self.file.seek(offset)
+                    data = self.file.read(length)
+                    # Members are copied as they are, without recompressing
+                    compacted.file.seek(compacted.end)
+                    compacted.file.write(data)
+                    compacted.index[name] = [compacted.end, length, size, codec, digest]
+                    compacted.end += length
+                compacted.dirty = True
+            self.file.close()
+            os.replace(temporary_path, self.path)
+            self.file = open(self.path, 'r+b')
+            _, _, index_offset, index_length = struct.unpack(HEADER_FORMAT, self.file.read(HEADER_SIZE))
+            self.read_index(index_offset, index_length)
+
+    def close(self):
+        """
+        Flush, compact if at least COMPACT_THRESHOLD of the file is unused, and close
+        """
+        if self.file.closed:
+            return
+        self.flush()
+        if self.end > HEADER_SIZE and self.wasted_bytes() >= self.end * COMPACT_THRESHOLD:
+            self.compact()
+        self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack, inspect and unpack corpus stores')
+    commands = parser.add_subparsers(dest='command', required=True)
+    pack = commands.add_parser('pack', help='Add every file of a directory to a store')
+    pack.add_argument('directory')
+    pack.add_argument('store')
+    pack.add_argument('--codec', choices=CODECS, default=DEFAULT_CODEC,
+                      help=f'Compression for new members (default: {DEFAULT_CODEC})')
+    unpack = commands.add_parser('unpack', help='Write every member of a store to a directory')
+    unpack.add_argument('store')
+    unpack.add_argument('directory')
+    listing = commands.add_parser('list', help='List the members of a store')
+    listing.add_argument('store')
+    cat = commands.add_parser('cat', help='Print one member')
+    cat.add_argument('store')
+    cat.add_argument('name')
+    compact = commands.add_parser('compact', help='Reclaim space left by replaced members')
+    compact.add_argument('store')
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        with CorpusStore(args.store, args.codec) as store:
+            entries = sorted((entry for entry in os.scandir(args.directory) if entry.is_file()), key=lambda entry: entry.name)
+            written = 0
+            for entry in entries:
+                with open(entry.path, 'rb') as f:
+                    written += store.write(entry.name, f.read())
+        original = sum(entry.stat().st_size for entry in entries)
+        print(f"✅ Packed {len(entries)} files ({written} new or changed) from {args.directory} into {args.store}")
+        print(f"   {original / 1e6:.2f} MB → {os.path.getsize(args.store) / 1e6:.2f} MB")
+        return
+
+    try:
+        store = CorpusStore(args.store, create=False)
+    except (FileNotFoundError, ValueError) as e:
+        parser.error(str(e))
+    with store:
+        if args.command == 'unpack':
+            os.makedirs(args.directory, exist_ok=True)
+            # Members are written back byte for byte, so pack and unpack round-trip exactly
+            for name, data in store.read_all_bytes():
+                with open(os.path.join(args.directory, name), 'wb') as f:
+                    f.write(data)
+            print(f"✅ Unpacked {len(store)} files from {args.store} into {args.directory}")
+        elif args.command == 'list':
+            for name in store.names():
+                print(f"  {name} ({store.size(name)} bytes)")
+            print(f"\n{len(store)} members, {os.path.getsize(args.store) / 1e6:.2f} MB "
+                  f"({store.wasted_bytes() / 1e3:.1f} KB unused)")
+        elif args.command == 'cat':
+            if args.name not in store:
+                parser.error(f"no member named {args.name!r} in {args.store}")
+            sys.stdout.write(store.read(args.name))
+        elif args.command == 'compact':
+            before = os.path.getsize(args.store)
+            store.compact()
+            print(f"✅ Compacted {args.store}: {before / 1e6:.2f} MB → {os.path.getsize(args.store) / 1e6:.2f} MB")
+
+if __name__ == "__main__":
+    main()
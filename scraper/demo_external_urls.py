@@ -1,10 +1,9 @@
 """
 Example: Show how external wiki URLs are now correctly generated
 """
-import json
+from difficulty_index import load_index
 
-with open('difficulties/difficulties.json', 'r', encoding='utf-8') as f:
-    difficulties = json.load(f)
+index = load_index()
 
 print("=" * 80)
 print("EXTERNAL WIKI URL HANDLING - DEMONSTRATION")
@@ -12,23 +11,12 @@ print("=" * 80)
 
 # Find some examples from each wiki
 examples = {
-    'JJT (Internal)': [],
-    'EToH': [],
-    'EToH-Misc': [],
-    'JToH Hardest Towers': []
+    'JJT (Internal)': index.find(host='jtohs-joke-towers.fandom.com')[:2],
+    'EToH': index.find(host='jtoh.fandom.com')[:2],
+    'EToH-Misc': index.find(host='etoh-misc.fandom.com')[:2],
+    'JToH Hardest Towers': index.find(host='jtohs-hardest-towers.fandom.com')[:2]
 }
 
-for diff in difficulties:
-    url = diff['url']
-    if 'jtohs-joke-towers' in url and len(examples['JJT (Internal)']) < 2:
-        examples['JJT (Internal)'].append(diff)
-    elif 'jtoh.fandom.com' in url and len(examples['EToH']) < 2:
-        examples['EToH'].append(diff)
-    elif 'etoh-misc' in url and len(examples['EToH-Misc']) < 2:
-        examples['EToH-Misc'].append(diff)
-    elif 'jtohs-hardest-towers' in url and len(examples['JToH Hardest Towers']) < 2:
-        examples['JToH Hardest Towers'].append(diff)
-
 for wiki_name, diffs in examples.items():
     print(f"\n{wiki_name}:")
     print("-" * 80)
@@ -0,0 +1,235 @@
+"""
+In-memory index over difficulties.json for fast lookups by field
+
+Every difficulty is indexed by name, wiki_name, class, class_section, type and the
+host of its URL. A query such as "class=Class 2 section=Peak host=jtoh.fandom.com"
+is answered by intersecting the sets of matching positions, smallest first,
+instead of scanning every record.
+
+Difficulties with a numeric rating are also kept sorted by their lower rating
+bound, so rating ranges and nearest neighbours are found by binary search. Bounds
+too large for a float are ordered among themselves by their magnitude tier (see ratings.py).
+
+Usage:
+    python scraper/difficulty_index.py class=Class 2 section=Peak
+    python scraper/difficulty_index.py host=jtoh.fandom.com class!=Unclassified
+    python scraper/difficulty_index.py type=Primordial --json
+    python scraper/difficulty_index.py --count-by class
+    python scraper/difficulty_index.py --duplicates name
+    python scraper/difficulty_index.py --between 10 20
+    python scraper/difficulty_index.py --nearest 42.5 --limit 5
+"""
+import argparse
+import bisect
+import json
+import math
+import re
+from functools import lru_cache
+from urllib.parse import urlparse
+
+from ratings import rating_keys
+
+DIFFICULTIES_FILE = 'difficulties/difficulties.json'
+INDEXED_FIELDS = ('name', 'wiki_name', 'class', 'class_section', 'type', 'host')
+# Shorter names accepted in queries
+FIELD_ALIASES = {'section': 'class_section', 'wiki': 'wiki_name'}
+# One "field=value" or "field!=value" term; a value runs until the next term
+QUERY_TERM_RE = re.compile(r'(\w+)(!?=)(.*?)(?=\s+\w+!?=|$)')
+
+
+def field_value(difficulty, field):
+    """
+    The value of an indexed field; 'host' is derived from the difficulty's URL
+    """
+    if field == 'host':
+        return urlparse(difficulty.get('url', '')).netloc
+    return difficulty.get(field)
+
+
+class DifficultyIndex:
+    """
+    Difficulties together with, for each indexed field, a map from value to the set of positions having it
+    Query results keep the order of difficulties.json
+    """
+
+    def __init__(self, difficulties):
+        self.difficulties = list(difficulties)
+        self.indexes = {field: {} for field in INDEXED_FIELDS}
+        for position, difficulty in enumerate(self.difficulties):
+            for field in INDEXED_FIELDS:
+                self.indexes[field].setdefault(field_value(difficulty, field), set()).add(position)
+        # (lower, upper, position) of every difficulty with a numeric rating, sorted, where each
+        # bound is a (value, magnitude tier) key; rating_keys holds just the lower bounds, for bisect
+        self.by_rating = sorted((*keys, position) for position, keys in
+                                ((position, rating_keys(difficulty)) for position, difficulty in enumerate(self.difficulties))
+                                if keys is not None)
+        self.rating_keys = [lower for lower, _, _ in self.by_rating]
+
+    @classmethod
+    def load(cls, path=DIFFICULTIES_FILE):
+        """
+        Build an index from a difficulties.json file
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.difficulties)
+
+    def indexed_field(self, field):
+        """
+        Resolve a field alias, raising ValueError if the field is not indexed
+        """
+        field = FIELD_ALIASES.get(field, field)
+        if field not in self.indexes:
+            raise ValueError(f"'{field}' is not indexed; use one of: {', '.join(INDEXED_FIELDS)}")
+        return field
+
+    def positions(self, field, value):
+        """
+        Positions of the difficulties whose `field` equals `value`
+        """
+        return self.indexes[self.indexed_field(field)].get(value, set())
+
+    def query(self, include=None, exclude=None):
+        """
+        Difficulties matching every {field: value} in `include` and none in `exclude`
+        Without `include`, everything except the excluded difficulties matches
+        """
+        include = include or {}
+        exclude = exclude or {}
+        matches = None
+        for found in sorted((self.positions(field, value) for field, value in include.items()), key=len):
+            matches = set(found) if matches is None else matches & found
+            if not matches:
+                return []
+        if matches is None:
+            matches = set(range(len(self.difficulties)))
+        for field, value in exclude.items():
+            matches -= self.positions(field, value)
+        return [self.difficulties[position] for position in sorted(matches)]
+
+    def find(self, **include):
+        """
+        query() with keyword arguments, e.g. find(host='jtoh.fandom.com', section='Peak')
+        `class` is a keyword, so pass it as find(**{'class': 'Class 2'})
+        """
+        return self.query(include)
+
+    def count_by(self, field):
+        """
+        Number of difficulties per value of `field`
+        """
+        return {value: len(positions) for value, positions in self.indexes[self.indexed_field(field)].items()}
+
+    def duplicates(self, field='name'):
+        """
+        Values of `field` shared by more than one difficulty, mapped to those difficulties,
+        in order of first appearance
+        """
+        shared = [(min(positions), value, positions)
+                  for value, positions in self.indexes[self.indexed_field(field)].items() if len(positions) > 1]
+        return {value: [self.difficulties[position] for position in sorted(positions)]
+                for _, value, positions in sorted(shared, key=lambda item: item[0])}
+
+    def between(self, low, high):
+        """
+        Difficulties whose rating lies within [low, high], ordered by rating
+        A ranged rating is placed by its lower bound and must end by `high`
+        """
+        start = bisect.bisect_left(self.rating_keys, (low, -math.inf))
+        end = bisect.bisect_right(self.rating_keys, (high, math.inf))
+        return [self.difficulties[position] for _, (upper, _), position in self.by_rating[start:end] if upper <= high]
+
+    def nearest(self, rating, count=5):
+        """
+        The `count` difficulties whose lower rating bound is closest to `rating`, closest first
+        """
+        right = bisect.bisect_left(self.rating_keys, (rating, -math.inf))
+        left = right - 1
+        found = []
+        while len(found) < count and (left >= 0 or right < len(self.by_rating)):
+            if right >= len(self.by_rating) or (left >= 0 and rating - self.rating_keys[left][0] <= self.rating_keys[right][0] - rating):
+                found.append(self.by_rating[left][2])
+                left -= 1
+            else:
+                found.append(self.by_rating[right][2])
+                right += 1
+        return [self.difficulties[position] for position in found]
+
+
+@lru_cache(maxsize=None)
+def load_index(path=DIFFICULTIES_FILE):
+    """
+    Load difficulties.json and index it, once per process and path
+    """
+    return DifficultyIndex.load(path)
+
+def parse_query(text):
+    """
+    Parse "class=Class 2 section=Peak host!=jtoh.fandom.com" into ({field: value}, {field: value})
+    for included and excluded values; values may contain spaces
+    """
+    include = {}
+    exclude = {}
+    text = text.strip()
+    for match in QUERY_TERM_RE.finditer(text):
+        field, operator, value = match.groups()
+        (exclude if operator == '!=' else include)[field] = value.strip()
+    if text and not include and not exclude:
+        raise ValueError(f"Could not parse query: {text!r} (expected field=value terms)")
+    return include, exclude
+
+def main():
+    parser = argparse.ArgumentParser(description='Query difficulties.json by indexed fields')
+    parser.add_argument('query', nargs='*',
+                        help=f"field=value or field!=value terms; fields: {', '.join(INDEXED_FIELDS)} "
+                             f"(section and wiki are short for class_section and wiki_name)")
+    parser.add_argument('--file', default=DIFFICULTIES_FILE, help=f'Difficulties file (default: {DIFFICULTIES_FILE})')
+    parser.add_argument('--json', action='store_true', help='Print the matching difficulties as JSON')
+    parser.add_argument('--count-by', metavar='FIELD', help='Count the matching difficulties per value of FIELD')
+    parser.add_argument('--duplicates', metavar='FIELD', help='List values of FIELD shared by several difficulties')
+    parser.add_argument('--between', type=float, nargs=2, metavar=('LOW', 'HIGH'),
+                        help="Only difficulties rated between LOW and HIGH, in rating order; "
+                             "pass ' -inf' (with a leading space) or inf for an open end")
+    parser.add_argument('--nearest', type=float, metavar='RATING', help='The difficulties rated closest to RATING')
+    parser.add_argument('--limit', type=int, default=5, help='Number of difficulties shown by --nearest (default: 5)')
+    args = parser.parse_args()
+
+    index = load_index(args.file)
+    try:
+        include, exclude = parse_query(' '.join(args.query))
+        if args.duplicates:
+            duplicates = index.duplicates(args.duplicates)
+            print(f"{len(duplicates)} duplicated value(s) of {args.duplicates}:")
+            for value, entries in duplicates.items():
+                print(f"  '{value}' appears {len(entries)} times:")
+                for entry in entries:
+                    print(f"     - Class: {entry.get('class')}, Section: {entry.get('class_section')}, Rating: {entry.get('rating')}")
+            return
+        matches = index.query(include, exclude)
+        if args.between or args.nearest is not None:
+            # Keep the rating order, restricted to the query's matches
+            matching = {id(difficulty) for difficulty in matches}
+            rated = index.between(*args.between) if args.between else index.nearest(args.nearest, len(index))
+            matches = [difficulty for difficulty in rated if id(difficulty) in matching]
+            if args.nearest is not None:
+                matches = matches[:args.limit]
+        if args.count_by:
+            counts = DifficultyIndex(matches).count_by(args.count_by)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.count_by:
+        for value, count in sorted(counts.items(), key=lambda item: str(item[0])):
+            print(f"  {value}: {count}")
+        print(f"\nTotal: {len(matches)} difficulties")
+    elif args.json:
+        print(json.dumps(matches, indent=2, ensure_ascii=False))
+    else:
+        for difficulty in matches:
+            print(f"  - {difficulty['name']} ({difficulty['class']}, {difficulty.get('class_section')}, {difficulty['rating']}) {difficulty['url']}")
+        print(f"\n{len(matches)} of {len(index)} difficulties match")
+
+if __name__ == "__main__":
+    main()
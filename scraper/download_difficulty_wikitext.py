@@ -1,16 +1,45 @@
 """
 Download wikitext content for all difficulties from their wiki pages
 """
+import argparse
+import io
 import json
 import os
-import requests
 import time
-from urllib.parse import urlparse, unquote
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from urllib.parse import quote, urlparse, unquote
+
+from charts import CHART_API_URL, CHART_PAGES
+from convert_wikitext_to_markdown import INTRO_HEADER_RE, INTRO_WIKITEXT_DIR, read_intro
+from corpus_store import INTRO_STORE, WIKITEXT_STORE, CorpusStore
+from flow_control import MAXLAG, AdaptiveConcurrency
+from http_client import HTTP_CACHE, HttpClient
+from metrics import Metrics, add_arguments, profiled
+from paths import sanitize_filename
+from rate_limit import HostRateLimiter
+from wiki_pages import HEADING_RE, MAX_TITLES, normalize_title, page_section
+from wiki_urls import add_base_url_argument, set_base_url
+
+# Requests per second allowed against each wiki host
+DEFAULT_RATE = 2.0
+DEFAULT_JOBS = 4
+# Requests in flight per wiki host when a download starts; flow_control.py adapts it up to --jobs
+INITIAL_CONCURRENCY = 2
+# Titles fetched per revisions query, at most what the API accepts
+BATCH_SIZE = MAX_TITLES
+# Revision ID and timestamp of every downloaded page, keyed by wikitext filename
+MANIFEST_FILE = 'difficulties/wikitext-manifest.json'
+# Categories of the chart wiki whose members --discover category enumerates
+DISCOVERY_CATEGORIES = ['Category:Difficulties', 'Category:Difficulty']
+# Pages found by --discover that no difficulty in difficulties.json points to
+DISCOVERED_FILE = 'difficulties/discovered-pages.json'
 
 def get_api_url_from_wiki_url(wiki_url):
     """
-    Convert a wiki page URL to the API endpoint URL
-    Example: https://jtoh.fandom.com/wiki/Easy -> https://jtoh.fandom.com/api.php
+    Convert a wiki page URL to the API endpoint URL and page title
+    Example: https://jtoh.fandom.com/wiki/Easy -> https://jtoh.fandom.com/api.php, Easy
     """
     parsed = urlparse(wiki_url)
     base_url = f"{parsed.scheme}://{parsed.netloc}"
@@ -19,80 +48,315 @@ def get_api_url_from_wiki_url(wiki_url):
     page_title = parsed.path.replace('/wiki/', '')
     page_title = unquote(page_title)  # Decode URL encoding
     
-    # Construct API URL
-    api_url = f"{base_url}/api.php?action=query&prop=revisions&titles={page_title}&rvslots=main&rvprop=content&formatversion=2&format=json"
-    
-    return api_url, page_title
+    return f"{base_url}/api.php", page_title
 
-def download_wikitext(api_url, page_title):
+def chunked(items, size):
+    """
+    Split a list into consecutive chunks of at most `size` items
     """
-    Download wikitext content from the Fandom API
-    Returns the wikitext content or None if failed
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def revisions_params(rvprop):
     """
+    Parameters of a prop=revisions query for the latest revision of each page
+    """
+    return {
+        'action': 'query',
+        'prop': 'revisions',
+        'rvslots': 'main',
+        'rvprop': rvprop,
+        'formatversion': 2,
+        'format': 'json',
+        # Let the wiki turn us away while its database replicas are lagging
+        'maxlag': MAXLAG
+    }
+
+def fetch_pages(api_url, params, client, description):
+    """
+    Run a query to the end, following `continue` and merging the pages of every response
+    `description` names what was asked for in error messages, e.g. '50 pages'
+    Returns (pages by title, list of (requested title, normalized title)), or None if it failed
+    """
+    pages_by_title = {}
+    normalized = []
+    host = urlparse(api_url).netloc
+
     try:
-        response = requests.get(api_url, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        # Navigate through the JSON structure
-        pages = data.get('query', {}).get('pages', [])
-        if not pages:
-            print(f"  ❌ No pages found for {page_title}")
-            return None
-        
-        page = pages[0]
-        
-        # Check if page exists
-        if 'missing' in page:
-            print(f"  ❌ Page does not exist: {page_title}")
-            return None
-        
-        # Get the wikitext content
-        revisions = page.get('revisions', [])
-        if not revisions:
-            print(f"  ❌ No revisions found for {page_title}")
-            return None
-        
-        wikitext = revisions[0].get('slots', {}).get('main', {}).get('content')
-        
-        if wikitext:
-            return wikitext
-        else:
-            print(f"  ❌ No content found for {page_title}")
-            return None
+        # Large batches can exceed the API's result size and come back in several parts
+        continue_params = {}
+        while True:
+            data = client.get_json(api_url, {**params, **continue_params})
+            if 'error' in data:
+                # e.g. nosuchsection: one page of the batch has no section `rvsection`
+                error = data['error']
+                print(f"  ❌ API error for {description} on {host}: {error.get('code')}: {error.get('info')}")
+                if client.metrics:
+                    client.metrics.count('api_errors')
+                return None
+            query = data.get('query', {})
+
+            # The API normalizes titles (e.g. underscores to spaces) and reports the mapping
+            normalized.extend((entry['from'], entry['to']) for entry in query.get('normalized', []))
+
+            for page in query.get('pages', []):
+                known = pages_by_title.setdefault(page['title'], page)
+                if known is not page and page.get('revisions'):
+                    known['revisions'] = page['revisions']
+
+            if 'continue' not in data:
+                break
+            continue_params = data['continue']
             
     except requests.exceptions.RequestException as e:
-        print(f"  ❌ Request failed for {page_title}: {e}")
+        print(f"  ❌ Request failed for {description} on {host}: {e}")
+        if client.metrics:
+            client.metrics.count('request_errors')
         return None
     except (KeyError, IndexError, json.JSONDecodeError) as e:
-        print(f"  ❌ Failed to parse response for {page_title}: {e}")
+        print(f"  ❌ Failed to parse response for {description} on {host}: {e}")
+        if client.metrics:
+            client.metrics.count('response_errors')
         return None
+    return pages_by_title, normalized
 
-def sanitize_filename(name):
+def query_revisions(api_url, page_titles, rvprop, client, section=None):
     """
-    Sanitize filename by removing/replacing invalid characters
+    Query the latest revision of up to BATCH_SIZE pages from one wiki in a single request
+    `rvprop` selects the revision fields, e.g. 'ids|timestamp' or 'ids|timestamp|content'
+    `section` limits the content to that section of every page (0 is the text before the first header)
+    `client` (an HttpClient) paces, retries and caches the requests and records their metrics
+    Returns a dict mapping each requested title to its revision dict (None if it failed)
     """
-    # Replace invalid filename characters
-    invalid_chars = '<>:"/\\|?*'
-    for char in invalid_chars:
-        name = name.replace(char, '_')
-    
-    # Remove leading/trailing spaces and dots
-    name = name.strip('. ')
-    
-    # Limit length
-    if len(name) > 200:
-        name = name[:200]
-    
-    return name
+    results = {title: None for title in page_titles}
+    params = {**revisions_params(rvprop), 'titles': '|'.join(page_titles)}
+    if section is not None:
+        params['rvsection'] = section
+
+    fetched = fetch_pages(api_url, params, client, f"{len(page_titles)} pages")
+    if fetched is None:
+        return results
+    pages_by_title, normalized = fetched
+
+    # Requested title -> title the API reports the page under
+    resolved = {title: title for title in page_titles}
+    for source, target in normalized:
+        for title, current in resolved.items():
+            if current == source:
+                resolved[title] = target
+
+    for title in page_titles:
+        page = pages_by_title.get(resolved[title])
+
+        if page is None:
+            print(f"  ❌ No page returned for {title}")
+            continue
+
+        # Check if page exists
+        if page.get('missing') or page.get('invalid'):
+            print(f"  ❌ Page does not exist: {title}")
+            continue
+        
+        revisions = page.get('revisions', [])
+        if not revisions:
+            print(f"  ❌ No revisions found for {title}")
+            continue
+
+        results[title] = revisions[0]
+
+    return results
+
+def download_wikitext_batch(api_url, page_titles, client, section=None):
+    """
+    Download wikitext content for up to BATCH_SIZE pages from one wiki in a single query
+    With `section`, only that section of each page is downloaded
+    Returns a dict mapping each requested title to its latest revision
+    ({'revid', 'timestamp', 'content'}), or None if it failed
+    """
+    revisions = query_revisions(api_url, page_titles, 'ids|timestamp|content', client, section)
+
+    results = {}
+    for title, revision in revisions.items():
+        wikitext = revision.get('slots', {}).get('main', {}).get('content') if revision else None
+        if revision and not wikitext:
+            print(f"  ❌ No content found for {title}")
+        results[title] = {
+            'revid': revision.get('revid'),
+            'timestamp': revision.get('timestamp'),
+            'content': wikitext
+        } if wikitext else None
+    return results
+
+def discovery_queries(mode, categories):
+    """
+    (description, generator parameters) of the queries that enumerate the chart wiki's difficulty pages
+    `mode` is 'links' (every article linked from the chart pages) or 'category' (members of `categories`)
+    """
+    if mode == 'links':
+        titles = '|'.join(title for title, _ in CHART_PAGES)
+        return [("pages linked from the charts",
+                 {'generator': 'links', 'titles': titles, 'gplnamespace': 0, 'gpllimit': 'max'})]
+    return [(f"members of {category}",
+             {'generator': 'categorymembers', 'gcmtitle': category, 'gcmnamespace': 0, 'gcmlimit': 'max'})
+            for category in categories]
+
+def discover_pages(api_url, generator_params, client, description):
+    """
+    Enumerate pages with a generator and receive their latest revision in the same paginated responses
+    Returns a dict mapping each page title found to its latest revision ({'revid', 'timestamp', 'content'}),
+    or None for pages that do not exist; returns None if the query failed
+    """
+    params = {**revisions_params('ids|timestamp|content'), **generator_params}
+    fetched = fetch_pages(api_url, params, client, description)
+    if fetched is None:
+        return None
+    pages_by_title, _ = fetched
+
+    results = {}
+    for title, page in pages_by_title.items():
+        revisions = page.get('revisions') or [{}]
+        wikitext = revisions[0].get('slots', {}).get('main', {}).get('content')
+        results[title] = {
+            'revid': revisions[0].get('revid'),
+            'timestamp': revisions[0].get('timestamp'),
+            'content': wikitext
+        } if wikitext else None
+    return results
+
+def fetch_revision_info(api_url, page_titles, client):
+    """
+    Fetch only the latest revision ID and timestamp of each page, without content
+    Returns a dict mapping each requested title to {'revid', 'timestamp'}, or None if it failed
+    """
+    return query_revisions(api_url, page_titles, 'ids|timestamp', client)
+
+def load_manifest(path=MANIFEST_FILE):
+    """
+    Load the revision manifest, mapping each wikitext filename to the revision it holds
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    """
+    Save the revision manifest
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write('\n')
+
+def is_up_to_date(entry, output_file, url, revision, exists=os.path.exists, intro_exists=None):
+    """
+    Check whether a downloaded page still matches the latest revision on the wiki
+    `exists` checks whether the page's output is present. With `intro_exists`, an introduction
+    section that --intro-only downloaded from the latest revision counts as well
+    """
+    if not entry or entry.get('url') != url or revision is None:
+        return False
+    # Files written by older versions of --intro-only hold a section where the full page belongs
+    if entry.get('section') is not None:
+        return False
+    if exists(output_file) and entry.get('revid') == revision.get('revid'):
+        return True
+    intro = entry.get('intro')
+    return bool(intro_exists and intro and intro.get('revid') == revision.get('revid') and intro_exists(output_file))
+
+def is_intro_section(text, section):
+    """
+    Check that `text`, section number `section` of a page alone, still looks like its introduction:
+    section 0, or a section with an introduction header
+    """
+    return section == 0 or any(INTRO_HEADER_RE.match(line) for line in text.split('\n'))
+
+def find_intro_section(content):
+    """
+    The number of the smallest section whose text alone gives the converter's read_intro
+    the same introduction as the whole page, or None if no single section does (e.g. when
+    the converter and MediaWiki disagree on what counts as a header)
+    """
+    # The API trims the whitespace around a section, so trailing blank lines don't count
+    intro = read_intro(io.StringIO(content)).rstrip()
+    best = None
+    for section in range(len(HEADING_RE.findall(content)) + 1):
+        text = page_section(content, section)
+        if (is_intro_section(text, section) and read_intro(io.StringIO(text)).rstrip() == intro
+                and (best is None or len(text) < best[1])):
+            best = (section, len(text))
+    return best[0] if best else None
+
+def run_batches(batches, worker, jobs, client):
+    """
+    Run `worker(api_url, titles, client)` for every batch concurrently
+    Yields each batch together with its result as soon as it finishes
+    """
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = {executor.submit(worker, api_url, list(dict.fromkeys(title for _, _, title in batch)), client): batch
+                   for api_url, batch in batches}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def group_batches(entries, batch_size):
+    """
+    Group (difficulty, output_file, page_title) entries by wiki into batches of titles
+    Returns a list of (api_url, batch)
+    """
+    by_api = {}
+    for difficulty, output_file, page_title in entries:
+        api_url, _ = get_api_url_from_wiki_url(difficulty['url'])
+        by_api.setdefault(api_url, []).append((difficulty, output_file, page_title))
+    return [(api_url, batch) for api_url, items in by_api.items() for batch in chunked(items, batch_size)]
 
 def main():
-    import sys
+    parser = argparse.ArgumentParser(description='Download wikitext for all difficulties')
+    parser.add_argument('name', nargs='?', help='Only download the difficulty with this name')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help=f'Number of concurrent downloads (default: {DEFAULT_JOBS})')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f'Maximum requests per second per wiki host; 0 leaves pacing to the adaptive '
+                             f'concurrency limit alone (default: {DEFAULT_RATE})')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f'Titles fetched per API request (default: {BATCH_SIZE})')
+    parser.add_argument('--force', action='store_true',
+                        help='Download every page again without checking revisions')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'Send every request unconditionally, without the HTTP cache {HTTP_CACHE}')
+    parser.add_argument('--intro-only', action='store_true',
+                        help=f'Download only the section holding each page\'s introduction, where an earlier '
+                             f'download recorded it, into {INTRO_WIKITEXT_DIR} (or {INTRO_STORE} with --packed); '
+                             f'the full pages are left as they are, and are still downloaded in full the first time')
+    parser.add_argument('--discover', choices=['links', 'category'],
+                        help='First enumerate the chart wiki\'s difficulty pages with a generator query, receiving '
+                             'their content in the same responses: every article linked from the chart pages '
+                             '(links) or every member of the --category categories (category)')
+    parser.add_argument('--category', action='append', dest='categories',
+                        help=f'Category enumerated by --discover category; may be repeated '
+                             f'(default: {", ".join(DISCOVERY_CATEGORIES)})')
+    parser.add_argument('--packed', action='store_true',
+                        help=f'Write pages to the packed store {WIKITEXT_STORE} instead of one file each')
+    add_base_url_argument(parser)
+    add_arguments(parser, 'wikitext')
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    if not 1 <= args.batch_size <= BATCH_SIZE:
+        parser.error(f'--batch-size must be between 1 and {BATCH_SIZE}, the API\'s limit on titles per request')
+    if args.discover and args.name:
+        parser.error('--discover enumerates every page, it cannot be limited to one difficulty')
+    set_base_url(args.base_url)
+
+    metrics = Metrics('wikitext')
+    with profiled('wikitext', args.profile):
+        download_all(args, metrics)
+    print(f"📊 Metrics written to {metrics.write_report(args.metrics)}")
+
+def download_all(args, metrics):
+    """
+    Download the wikitext of every difficulty (or the one named in args) that changed on its wiki
+    """
     # Check for optional argument
-    specific_name = None
-    if len(sys.argv) > 1:
-        specific_name = sys.argv[1].strip()
+    specific_name = args.name.strip() if args.name else None
+    if specific_name:
         print(f"Filtering for difficulty name: {specific_name}\n")
 
     # Load difficulties
@@ -111,64 +375,241 @@ def main():
 
     # Create output directory
     output_dir = 'difficulties/wikitext'
-    os.makedirs(output_dir, exist_ok=True)
-    print(f"Output directory: {output_dir}\n")
+    if args.packed:
+        # Members are named like the files they replace, shown as paths inside the store
+        output_dir = WIKITEXT_STORE
+        store = CorpusStore(WIKITEXT_STORE)
+        exists = lambda output_file: os.path.basename(output_file) in store
+        print(f"Output store: {WIKITEXT_STORE}\n")
+    else:
+        store = None
+        exists = os.path.exists
+        os.makedirs(output_dir, exist_ok=True)
+        print(f"Output directory: {output_dir}\n")
+
+    # Introduction sections never overwrite the full pages, which the snapshot, the extraction
+    # tests and the mock server read too; they go next to them, for the markdown stage only
+    intro_dir = INTRO_STORE if args.packed else INTRO_WIKITEXT_DIR
+    intro_store = None
+    if args.packed:
+        if args.intro_only or os.path.exists(INTRO_STORE):
+            intro_store = CorpusStore(INTRO_STORE)
+        intro_exists = lambda output_file: intro_store is not None and os.path.basename(output_file) in intro_store
+    else:
+        if args.intro_only:
+            os.makedirs(intro_dir, exist_ok=True)
+        intro_exists = lambda output_file: os.path.exists(os.path.join(intro_dir, os.path.basename(output_file)))
 
     # Track statistics
     stats = {
         'success': 0,
         'failed': 0,
         'skipped': 0,
+        'intro_only': 0,
+        'intro_fallbacks': 0,
+        'discovered': 0,
         'by_wiki': {}
     }
 
-    # Process each difficulty
-    for i, difficulty in enumerate(difficulties, 1):
-        name = difficulty['name']
-        url = difficulty['url']
+    manifest = load_manifest()
+    # Hosts are rate limited independently, so different wikis download in parallel
+    limiter = HostRateLimiter(args.rate) if args.rate > 0 else None
+    # Requests in flight per host grow while the wiki keeps up and shrink when it throttles or slows down
+    controller = AdaptiveConcurrency(min(INITIAL_CONCURRENCY, args.jobs), 1, args.jobs)
+    # Unchanged responses are revalidated against the HTTP cache instead of downloaded again
+    client = HttpClient(args.jobs, None if args.no_cache else HTTP_CACHE, limiter, controller, metrics)
 
+    entries = []
+    for difficulty in difficulties:
         # Extract wiki domain for statistics
-        wiki_domain = urlparse(url).netloc
+        wiki_domain = urlparse(difficulty['url']).netloc
         if wiki_domain not in stats['by_wiki']:
             stats['by_wiki'][wiki_domain] = {'success': 0, 'failed': 0}
 
         # Create safe filename
-        safe_name = sanitize_filename(name)
+        safe_name = sanitize_filename(difficulty['name'])
         output_file = os.path.join(output_dir, f"{safe_name}.wikitext")
+        _, page_title = get_api_url_from_wiki_url(difficulty['url'])
+        entries.append((difficulty, output_file, page_title))
 
-        # Skip if already downloaded
-        if os.path.exists(output_file):
-            print(f"[{i}/{len(difficulties)}] ⏭️  Skipping {name} (already exists)")
-            stats['skipped'] += 1
-            continue
+    done = 0
+    total = 0
+
+    def write(target_store, path, content):
+        if target_store is not None:
+            target_store.write(os.path.basename(path), content)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+
+    def save(difficulty, output_file, page_title, revision, section=None):
+        nonlocal done
+        done += 1
+        wiki_domain = urlparse(difficulty['url']).netloc
+        key = os.path.basename(output_file)
+        intro_file = os.path.join(intro_dir, key)
+        if section is not None:
+            # The full page keeps its older revision, so a run without --intro-only downloads it again
+            write(intro_store, intro_file, revision['content'])
+            manifest[key]['intro'] = {
+                'revid': revision['revid'],
+                'timestamp': revision['timestamp'],
+                'section': section
+            }
+            output_file = intro_file
+        else:
+            write(store, output_file, revision['content'])
+            # An introduction section from an older revision would now hide the full page
+            if intro_exists(output_file):
+                if intro_store is not None:
+                    intro_store.delete(key)
+                else:
+                    os.remove(intro_file)
+            manifest[key] = {
+                'url': difficulty['url'],
+                'title': page_title,
+                'revid': revision['revid'],
+                'timestamp': revision['timestamp'],
+                'intro_section': find_intro_section(revision['content'])
+            }
+        part = f" (section {section})" if section is not None else ""
+        print(f"[{done}/{total}] ✅ {difficulty['name']} → {output_file}{part} ({len(revision['content'])} characters)")
+        stats['success'] += 1
+        stats['by_wiki'][wiki_domain]['success'] += 1
 
-        print(f"[{i}/{len(difficulties)}] 📥 Downloading {name}...")
-        print(f"  URL: {url}")
+    # With --discover, one generator query lists the chart wiki's pages and returns their content too,
+    # so the pages it finds need neither a revision check nor a download of their own
+    discovered = {}
+    if args.discover:
+        chart_wiki = urlparse(CHART_API_URL).netloc
+        print(f"🧭 Discovering pages on {chart_wiki}...\n")
+        queries = discovery_queries(args.discover, args.categories or DISCOVERY_CATEGORIES)
+        with metrics.timer('discovery'):
+            for description, generator_params in queries:
+                pages = discover_pages(CHART_API_URL, generator_params, client, description)
+                if pages is not None:
+                    print(f"  🔗 {len(pages)} {description}")
+                    discovered.update(pages)
 
-        # Get API URL
-        api_url, page_title = get_api_url_from_wiki_url(url)
+        listed = set()
+        changed = []
+        remaining = []
+        for difficulty, output_file, page_title in entries:
+            title = normalize_title(page_title)
+            on_chart_wiki = urlparse(difficulty['url']).netloc == chart_wiki
+            revision = discovered.get(title) if on_chart_wiki else None
+            if revision is None:
+                remaining.append((difficulty, output_file, page_title))
+                continue
+            listed.add(title)
+            stats['discovered'] += 1
+            if not args.force and is_up_to_date(manifest.get(os.path.basename(output_file)), output_file,
+                                                difficulty['url'], revision, exists):
+                stats['skipped'] += 1
+            else:
+                changed.append((difficulty, output_file, page_title, revision))
+        entries = remaining
 
-        # Download wikitext
-        wikitext = download_wikitext(api_url, page_title)
+        total = len(changed)
+        for difficulty, output_file, page_title, revision in changed:
+            save(difficulty, output_file, page_title, revision)
 
-        if wikitext:
-            # Save to file
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(wikitext)
+        # Articles the chart parser missed (or that are not difficulties at all) are listed for review
+        charts = {normalize_title(title) for title, _ in CHART_PAGES}
+        unlisted = sorted(title for title, revision in discovered.items()
+                          if revision and title not in listed and title not in charts)
+        with open(DISCOVERED_FILE, 'w', encoding='utf-8') as f:
+            json.dump([{'title': title, 'url': f"https://{chart_wiki}/wiki/{quote(title.replace(' ', '_'))}"}
+                       for title in unlisted], f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        stats['unlisted'] = len(unlisted)
+        print(f"\n🧭 {stats['discovered']} difficulties found by discovery ({len(changed)} changed), "
+              f"{len(entries)} left to check, {len(unlisted)} other pages listed in {DISCOVERED_FILE}\n")
 
-            print(f"  ✅ Saved to {output_file}")
-            print(f"  📊 Size: {len(wikitext)} characters")
-            stats['success'] += 1
-            stats['by_wiki'][wiki_domain]['success'] += 1
+    # Cheap metadata-only pass: find which pages changed since they were downloaded
+    order = {id(entry[0]): position for position, entry in enumerate(entries)}
+    if args.force:
+        pending = entries
+    else:
+        print(f"🔍 Checking revisions of {len(entries)} pages...\n")
+        pending = []
+        with metrics.timer('revision_check'):
+            checked = list(run_batches(group_batches(entries, args.batch_size), fetch_revision_info,
+                                       args.jobs, client))
+        for batch, revisions in checked:
+            for difficulty, output_file, page_title in batch:
+                key = os.path.basename(output_file)
+                revision = revisions.get(page_title)
+                if is_up_to_date(manifest.get(key), output_file, difficulty['url'], revision, exists,
+                                 intro_exists if args.intro_only else None):
+                    stats['skipped'] += 1
+                elif revision is None and exists(output_file):
+                    # Could not check this page; keep what we have
+                    print(f"⚠️  Could not check {difficulty['name']}, keeping existing file")
+                    stats['skipped'] += 1
+                else:
+                    pending.append((difficulty, output_file, page_title))
+        # Batches finish in any order; keep the difficulties' order so that the same pages form
+        # the same requests from run to run, and so hit the same HTTP cache entries
+        pending.sort(key=lambda entry: order[id(entry[0])])
+
+    # With --intro-only, a page whose introduction section an earlier download recorded
+    # fetches that section alone, batched with the pages whose intro is in the same section
+    by_section = {}
+    full = []
+    for entry in pending:
+        known = manifest.get(os.path.basename(entry[1])) if args.intro_only else None
+        if (known and known.get('url') == entry[0]['url'] and known.get('intro_section') is not None
+                and known.get('section') is None and exists(entry[1])):
+            by_section.setdefault(known['intro_section'], []).append(entry)
         else:
-            print(f"  ❌ Failed to download")
-            stats['failed'] += 1
-            stats['by_wiki'][wiki_domain]['failed'] += 1
+            full.append(entry)
 
-        print()
+    batch_count = sum(len(group_batches(items, args.batch_size)) for items in [full, *by_section.values()])
+    rate = f"{args.rate:g} requests/s per wiki" if limiter else "no fixed rate limit"
+    print(f"\n📥 Downloading {len(pending)} changed pages in {batch_count} batches with {args.jobs} workers "
+          f"({rate})\n")
+    total = done + len(pending)
+    download_start = time.perf_counter()
+    if by_section:
+        print(f"📄 {len(pending) - len(full)} pages fetch only their introduction section\n")
+
+    for section, items in sorted(by_section.items()):
+        worker = partial(download_wikitext_batch, section=section)
+        for batch, revisions in run_batches(group_batches(items, args.batch_size), worker, args.jobs, client):
+            for difficulty, output_file, page_title in batch:
+                revision = revisions.get(page_title)
+                if revision and is_intro_section(revision['content'], section):
+                    save(difficulty, output_file, page_title, revision, section)
+                    stats['intro_only'] += 1
+                else:
+                    # The section request failed, or the page changed shape; fetch it whole instead
+                    print(f"  ↩️  Could not use section {section} of {difficulty['name']}, downloading the full page")
+                    full.append((difficulty, output_file, page_title))
+                    stats['intro_fallbacks'] += 1
+    full.sort(key=lambda entry: order[id(entry[0])])
 
-        # Be nice to the API - rate limiting
-        time.sleep(0.5)  # Wait 500ms between requests
+    for batch, revisions in run_batches(group_batches(full, args.batch_size), download_wikitext_batch, args.jobs, client):
+        for difficulty, output_file, page_title in batch:
+            revision = revisions.get(page_title)
+            if revision:
+                save(difficulty, output_file, page_title, revision)
+            else:
+                done += 1
+                wiki_domain = urlparse(difficulty['url']).netloc
+                print(f"[{done}/{total}] ❌ Failed to download {difficulty['name']} ({difficulty['url']})")
+                stats['failed'] += 1
+                stats['by_wiki'][wiki_domain]['failed'] += 1
+    metrics.add_time('download', time.perf_counter() - download_start)
+    print()
+
+    client.close()
+    for opened in (store, intro_store):
+        if opened is not None:
+            opened.close()
+    save_manifest(manifest)
+    for key in ('success', 'failed', 'skipped', 'intro_only', 'intro_fallbacks', 'discovered'):
+        metrics.count(f"pages_{key}", stats[key])
 
     # Print summary
     print("=" * 80)
@@ -176,14 +617,31 @@ def main():
     print("=" * 80)
     print(f"Total difficulties: {len(difficulties)}")
     print(f"  ✅ Successfully downloaded: {stats['success']}")
-    print(f"  ⏭️  Skipped (already exist): {stats['skipped']}")
+    print(f"  ⏭️  Skipped (up to date): {stats['skipped']}")
     print(f"  ❌ Failed: {stats['failed']}")
+    if args.discover:
+        print(f"  🧭 Found by discovery: {stats['discovered']} "
+              f"({stats['unlisted']} other pages listed in {DISCOVERED_FILE})")
+    if args.intro_only:
+        print(f"  📄 Introduction section only: {stats['intro_only']} "
+              f"({stats['intro_fallbacks']} fell back to the full page)")
     print()
     print("By wiki:")
     for wiki, counts in stats['by_wiki'].items():
         print(f"  {wiki}:")
         print(f"    Success: {counts['success']}")
         print(f"    Failed: {counts['failed']}")
+    limits = controller.limits()
+    if limits:
+        print()
+        print("Requests in flight per wiki (final adaptive limit):")
+        for wiki, limit in sorted(limits.items()):
+            print(f"  {wiki}: {limit:.1f}")
+    counters = metrics.report()['counters']
+    if counters.get('cache_hits'):
+        print(f"Answered {counters['cache_hits']} requests from the HTTP cache (not modified upstream)")
+    if counters.get('retries'):
+        print(f"Retried {counters['retries']} requests ({counters.get('throttled', 0)} throttled by the wiki)")
     print("=" * 80)
 
 if __name__ == "__main__":
@@ -1,11 +1,23 @@
-import requests
+"""
+Download the wikitext of every difficulty chart page listed in charts.py
+"""
+import argparse
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-def download_wikitext(url, filename):
-    if not os.path.exists(filename):
+from charts import CHART_API_URL, CHART_PAGES
+from flow_control import MAXLAG, AdaptiveConcurrency
+from http_client import HTTP_CACHE, HttpClient
+from metrics import Metrics, add_arguments, profiled
+from wiki_urls import add_base_url_argument, set_base_url
+
+def download_wikitext(url, filename, client, params=None, force=False):
+    if force or not os.path.exists(filename):
         print(f"Downloading {filename}...")
-        webpage = requests.get(url)
-        wikitext = webpage.json()['query']['pages'][0]['revisions'][0]['slots']['main']['content']
+        # Throttling, maxlag and server errors are retried with backoff, and an unchanged page is
+        # answered from the HTTP cache (see flow_control.py and http_client.py)
+        data = client.get_json(url, params)
+        wikitext = data['query']['pages'][0]['revisions'][0]['slots']['main']['content']
         with open(filename, 'w', encoding='utf-8') as file:
             file.write(wikitext)
     else:
@@ -14,4 +26,45 @@ def download_wikitext(url, filename):
             wikitext = file.read()
     return wikitext
 
-download_wikitext('https://jtohs-joke-towers.fandom.com/api.php?action=query&prop=revisions&titles=Main_Difficulty_Chart&rvslots=main&rvprop=content&formatversion=2&format=json', 'difficulties/source.wikitext')
\ No newline at end of file
+def download_chart(page_title, filename, client, force=False):
+    params = {
+        'action': 'query',
+        'prop': 'revisions',
+        'titles': page_title,
+        'rvslots': 'main',
+        'rvprop': 'content',
+        'formatversion': 2,
+        'format': 'json',
+        'maxlag': MAXLAG
+    }
+    return download_wikitext(CHART_API_URL, filename, client, params, force)
+
+def download_charts(chart_pages=CHART_PAGES, force=False, metrics=None, cache=HTTP_CACHE):
+    """
+    Download all chart pages in parallel
+    Pages already on disk are reused unless force is set; forced downloads are still
+    conditional requests when the HTTP `cache` (a path, or None for none) has the page
+    """
+    # The chart pages share one wiki, so they share its adaptive concurrency limit
+    jobs = max(1, len(chart_pages))
+    controller = AdaptiveConcurrency(maximum=jobs)
+    with HttpClient(jobs, cache, controller=controller, metrics=metrics) as client, \
+            ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(download_chart, page_title, filename, client, force)
+                   for page_title, filename in chart_pages]
+        return [future.result() for future in futures]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Download the difficulty chart pages')
+    parser.add_argument('--force', action='store_true', help='Download chart pages again even if they exist')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'Send every request unconditionally, without the HTTP cache {HTTP_CACHE}')
+    add_base_url_argument(parser)
+    add_arguments(parser, 'charts')
+    args = parser.parse_args()
+    set_base_url(args.base_url)
+
+    metrics = Metrics('charts')
+    with profiled('charts', args.profile):
+        download_charts(force=args.force, metrics=metrics, cache=None if args.no_cache else HTTP_CACHE)
+    print(f"📊 Metrics written to {metrics.write_report(args.metrics)}")
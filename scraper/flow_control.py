@@ -0,0 +1,236 @@
+"""
+Adaptive concurrency and retries for the scraper downloaders
+
+Each wiki host gets an AIMD limit on in-flight requests: it grows by about one
+request per round trip while responses are fast and successful, and is cut
+multiplicatively when the wiki throttles (429, MediaWiki maxlag), when the error
+rate climbs, or when latency rises well above the best seen. A Retry-After from
+the wiki also pauses every request to that host until it has passed.
+
+Transient failures (429, 5xx, maxlag, timeouts, dropped connections) are retried
+with jittered exponential backoff, added on top of any Retry-After so that
+requests paused together do not all come back at the same moment; anything else
+fails at once.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from wiki_urls import request_url
+
+TRANSIENT_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_RETRIES = 5
+# Backoff before retry n (from 0) is a random time up to min(BACKOFF_CAP, BACKOFF_BASE * 2**n) seconds
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+# Seconds of replication lag at which MediaWiki should refuse our requests
+MAXLAG = 5
+# Multiplicative decrease applied to a host's limit on throttling or errors
+DECREASE = 0.5
+# Smaller decrease when latency alone says the wiki is getting slower
+LATENCY_DECREASE = 0.9
+# Latency (EWMA) this many times the best seen counts as the wiki slowing down
+LATENCY_TOLERANCE = 2.0
+# Error rate (EWMA) above which the limit is cut
+ERROR_THRESHOLD = 0.1
+EWMA_WEIGHT = 0.2
+
+
+class TransientError(requests.exceptions.RequestException):
+    """
+    A failure worth retrying, with how long the wiki asked us to wait (or None)
+    """
+
+    def __init__(self, message, retry_after=None, throttled=False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.throttled = throttled
+
+
+class HostConcurrency:
+    """
+    AIMD limit on the number of requests in flight to one host
+    """
+
+    def __init__(self, initial=2, minimum=1, maximum=16):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.latency = None
+        self.best_latency = None
+        self.error_rate = 0.0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Block until a request may start: the host is not paused and the limit has room
+        """
+        with self.condition:
+            while True:
+                pause = self.blocked_until - time.monotonic()
+                if pause > 0:
+                    self.condition.wait(pause)
+                elif self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                else:
+                    self.condition.wait()
+
+    def decrease(self, factor):
+        """
+        Cut the limit, at most once per round trip so one burst of failures counts once
+        """
+        now = time.monotonic()
+        if now - self.last_decrease >= (self.latency or 0.0):
+            self.limit = max(self.minimum, self.limit * factor)
+            self.last_decrease = now
+
+    def release(self, seconds=None, ok=True, throttled=False, retry_after=None):
+        """
+        Finish a request and adjust the limit from how it went
+        """
+        with self.condition:
+            self.in_flight -= 1
+            self.error_rate += EWMA_WEIGHT * ((0.0 if ok else 1.0) - self.error_rate)
+            if throttled:
+                self.decrease(DECREASE)
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            elif not ok:
+                if self.error_rate > ERROR_THRESHOLD:
+                    self.decrease(DECREASE)
+            else:
+                self.latency = seconds if self.latency is None else self.latency + EWMA_WEIGHT * (seconds - self.latency)
+                self.best_latency = self.latency if self.best_latency is None else min(self.best_latency, self.latency)
+                if self.latency > self.best_latency * LATENCY_TOLERANCE:
+                    self.decrease(LATENCY_DECREASE)
+                else:
+                    # Additive increase: about one more request in flight per round trip
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+
+class AdaptiveConcurrency:
+    """
+    One HostConcurrency per host, so each wiki is paced by its own responses
+    """
+
+    def __init__(self, initial=2, minimum=1, maximum=16):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def host(self, host):
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostConcurrency(self.initial, self.minimum, self.maximum)
+            return self.hosts[host]
+
+    def acquire(self, host):
+        self.host(host).acquire()
+
+    def release(self, host, **outcome):
+        self.host(host).release(**outcome)
+
+    def limits(self):
+        """
+        The current limit of every host, e.g. for a summary
+        """
+        with self.lock:
+            return {host: state.limit for host, state in self.hosts.items()}
+
+
+def parse_retry_after(value):
+    """
+    Seconds to wait from a Retry-After header (seconds or an HTTP date), or None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def transferred_bytes(response):
+    """
+    Bytes of a response's body that came over the network, before decompression
+    Responses answered from a cache (see http_client.py) transferred none.
+    """
+    body = response.content
+    try:
+        return response.raw.tell()
+    except AttributeError:
+        return len(body)
+
+def backoff(attempt):
+    """
+    Jittered exponential backoff before retry number `attempt` (from 0)
+    """
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+def get_json(session, url, params, host, controller=None, limiter=None, metrics=None,
+             retries=DEFAULT_RETRIES, timeout=30):
+    """
+    GET a wiki API URL and decode its JSON, retrying transient failures
+    `session` is a requests session or an HttpClient (see http_client.py), or None.
+    `limiter` (a HostRateLimiter) caps the request rate and `controller` (an
+    AdaptiveConcurrency) the requests in flight to `host`; either may be None.
+    Raises requests.exceptions.RequestException once retries run out or on a permanent failure.
+    """
+    for attempt in range(retries + 1):
+        # Take the concurrency slot first, so a rate limit token is never spent waiting for one
+        if controller:
+            controller.acquire(host)
+        if limiter:
+            limiter.acquire(host)
+        start = time.perf_counter()
+        try:
+            response = (session or requests).get(request_url(url), params=params, timeout=timeout)
+            seconds = time.perf_counter() - start
+            if metrics:
+                metrics.observe_latency(host, seconds)
+                metrics.count('requests')
+                metrics.count('bytes_downloaded', transferred_bytes(response))
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if response.status_code in TRANSIENT_STATUSES:
+                raise TransientError(f"{response.status_code} {response.reason}", retry_after,
+                                     throttled=response.status_code == 429)
+            response.raise_for_status()
+            data = response.json()
+            error = data.get('error', {}) if isinstance(data, dict) else {}
+            if error.get('code') == 'maxlag':
+                raise TransientError(f"maxlag: {error.get('info', 'database lag')}", retry_after or MAXLAG, throttled=True)
+        except (TransientError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            retry_after = getattr(e, 'retry_after', None)
+            throttled = getattr(e, 'throttled', False)
+            if controller:
+                controller.release(host, ok=False, throttled=throttled, retry_after=retry_after)
+            if metrics:
+                metrics.count('throttled' if throttled else 'transient_errors')
+            if attempt == retries:
+                raise
+            delay = (retry_after or 0.0) + backoff(attempt)
+            print(f"  ⏳ {host}: {e}; retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+            if metrics:
+                metrics.count('retries')
+            time.sleep(delay)
+            continue
+        except (requests.exceptions.RequestException, ValueError):
+            if controller:
+                controller.release(host, ok=False)
+            raise
+        if controller:
+            controller.release(host, seconds=seconds)
+        return data
@@ -0,0 +1,138 @@
+"""
+Shared HTTP client for the scraper downloaders
+
+A pooled, keep-alive requests session with a persistent response cache: every
+response that carries an ETag or Last-Modified is kept, body and validators, in
+a corpus store (difficulties/http-cache.pack, see corpus_store.py). The next
+request for the same URL is sent as a conditional GET (If-None-Match /
+If-Modified-Since) and a 304 Not Modified is answered from the cache, so
+re-running a downloader when nothing changed upstream moves little more than
+headers. Responses are requested compressed (requests advertises gzip and
+deflate and decodes them transparently).
+
+The client also carries a run's rate limiter, adaptive concurrency controller
+and metrics, so get_json() paces and retries requests as flow_control.py does.
+"""
+import hashlib
+import json
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from corpus_store import CorpusStore
+from flow_control import DEFAULT_RETRIES, get_json
+
+HTTP_CACHE = 'difficulties/http-cache.pack'
+DEFAULT_POOL_SIZE = 4
+# Response headers kept with a cached body
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class HttpCache:
+    """
+    Response bodies and their validators, keyed by the full request URL
+    Each entry is one store member: the headers as a line of JSON, then the body.
+    """
+
+    def __init__(self, path=HTTP_CACHE):
+        self.store = CorpusStore(path)
+
+    @staticmethod
+    def key(url):
+        # URLs can be far longer than a sensible member name, so members are named by digest
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def lookup(self, url):
+        """
+        The (headers, body) cached for `url`, or None
+        """
+        key = self.key(url)
+        if key not in self.store:
+            return None
+        header_line, _, body = self.store.read_bytes(key).partition(b'\n')
+        entry = json.loads(header_line)
+        # Guard against digest collisions, however unlikely
+        if entry['url'] != url:
+            return None
+        return entry['headers'], body
+
+    def save(self, url, headers, body):
+        header_line = json.dumps({'url': url, 'headers': headers}, ensure_ascii=False, sort_keys=True)
+        self.store.write(self.key(url), header_line.encode('utf-8') + b'\n' + body)
+
+    def close(self):
+        self.store.close()
+
+
+class HttpClient:
+    """
+    Cache-aware HTTP session shared by a downloader's worker threads
+    Use it as a context manager so the cache index is saved when done.
+    `cache` is the cache store path, or None to send every request unconditionally.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, cache=HTTP_CACHE, limiter=None, controller=None, metrics=None,
+                 retries=DEFAULT_RETRIES):
+        self.session = requests.Session()
+        # Connections are kept alive and reused, up to `pool_size` per host
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.cache = HttpCache(cache) if cache else None
+        self.limiter = limiter
+        self.controller = controller
+        self.metrics = metrics
+        self.retries = retries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def get(self, url, params=None, timeout=30):
+        """
+        GET `url`, as a conditional request if a copy with validators is cached
+        A 304 comes back as the cached 200 response, with `from_cache` set on it
+        """
+        url = requests.Request('GET', url, params=params).prepare().url
+        cached = self.cache.lookup(url) if self.cache is not None else None
+        headers = {}
+        if cached:
+            cached_headers, _ = cached
+            if 'ETag' in cached_headers:
+                headers['If-None-Match'] = cached_headers['ETag']
+            if 'Last-Modified' in cached_headers:
+                headers['If-Modified-Since'] = cached_headers['Last-Modified']
+
+        response = self.session.get(url, headers=headers, timeout=timeout)
+        response.from_cache = False
+        if response.status_code == 304 and cached:
+            cached_headers, body = cached
+            response.status_code = 200
+            response.reason = 'OK (cached)'
+            response.headers.update(cached_headers)
+            response._content = body
+            response.from_cache = True
+            if self.metrics:
+                self.metrics.count('cache_hits')
+        elif response.status_code == 200 and self.cache is not None:
+            validators = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+            if 'ETag' in validators or 'Last-Modified' in validators:
+                self.cache.save(url, validators, response.content)
+                if self.metrics:
+                    self.metrics.count('cache_stores')
+        return response
+
+    def get_json(self, url, params=None):
+        """
+        GET a wiki API URL and decode its JSON, paced and retried per flow_control.get_json
+        """
+        return get_json(self, url, params, urlparse(url).netloc, self.controller, self.limiter, self.metrics,
+                        self.retries)
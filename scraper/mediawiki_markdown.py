@@ -0,0 +1,392 @@
+"""
+Pure-Python MediaWiki to Markdown converter
+
+Handles the subset of MediaWiki that extract_main_content() leaves in a difficulty
+introduction: headings, paragraphs, bold/italic, lists, links, simple tables,
+references and inline HTML. The output follows pandoc's markdown writer
+(`-t markdown --wrap=none --markdown-headings=atx`) closely enough to be used in its place.
+
+Lines that start with a space are treated as ordinary text rather than preformatted
+blocks; in these pages they are stray indentation, not code.
+"""
+import html
+import re
+
+HEADING_RE = re.compile(r'^(={1,6})\s*(.+?)\s*(={1,6})\s*$')
+HTML_HEADING_RE = re.compile(r'<h([1-6])[^>]*>(.*?)</h\1>', re.IGNORECASE | re.DOTALL)
+LIST_RE = re.compile(r'^([*#:;]+)\s*(.*)$')
+HR_RE = re.compile(r'^-{4,}\s*$')
+PARAGRAPH_TAG_RE = re.compile(r'</?p(?:\s[^>]*)?>', re.IGNORECASE)
+
+# HTML tables are rewritten into wiki table markup before block parsing
+HTML_TABLE_TAGS = [
+    (re.compile(r'<table[^>]*>', re.IGNORECASE), '\n{|\n'),
+    (re.compile(r'</table\s*>', re.IGNORECASE), '\n|}\n'),
+    (re.compile(r'<tr[^>]*>', re.IGNORECASE), '\n|-\n'),
+    (re.compile(r'</t[rdh]\s*>', re.IGNORECASE), ''),
+    (re.compile(r'<td[^>]*>', re.IGNORECASE), '\n|'),
+    (re.compile(r'<th[^>]*>', re.IGNORECASE), '\n!'),
+    (re.compile(r'</?(?:tbody|thead|tfoot)[^>]*>', re.IGNORECASE), ''),
+]
+
+INLINE_TOKEN_RE = re.compile(r"""
+    (?P<nowiki><nowiki>(?P<nowiki_text>.*?)</nowiki>)
+  | (?P<code><code>(?P<code_text>.*?)</code>)
+  | (?P<ref><ref(?:\s[^>]*)?>(?P<ref_text>.*?)</ref\s*>|<ref[^>]*/>)
+  | (?P<comment><!--.*?-->)
+  | (?P<wikilink>\[\[(?P<wl_target>[^\]|]+)(?:\|(?P<wl_text>[^\]]*))?\]\])
+  | (?P<extlink>\[(?P<el_url>(?:https?:)?//[^\s\]]+)(?:\s+(?P<el_text>[^\]]*))?\])
+  | (?P<url>https?://[^\s<>\[\]]+)
+  | (?P<quotes>'{2,})
+  | (?P<tag></?(?P<tag_name>[a-zA-Z][a-zA-Z0-9]*)(?:\s[^>]*)?/?>)
+""", re.VERBOSE | re.DOTALL)
+
+# Inline HTML tags that map onto Markdown; every other tag is dropped and its content kept
+TAG_MARKERS = {
+    'b': 'bold', 'strong': 'bold',
+    'i': 'italic', 'em': 'italic',
+    's': 'strike', 'del': 'strike', 'strike': 'strike',
+    'sup': 'sup', 'sub': 'sub',
+    'q': 'quote',
+}
+MARKERS = {
+    'bold': ('**', '**'),
+    'italic': ('*', '*'),
+    'strike': ('~~', '~~'),
+    'sup': ('^', '^'),
+    'sub': ('~', '~'),
+    'quote': ('"', '"'),
+}
+
+# Characters pandoc escapes in markdown text
+ESCAPE_RE = re.compile(r'([\\`*\[\]<$^~|])')
+UNDERSCORE_RE = re.compile(r'(?<![0-9A-Za-z])_|_(?![0-9A-Za-z])')
+LINE_START_ESCAPE_RE = re.compile(r'^(?:(#|>|\+ |- )|(\d+)(\.\s))')
+
+LEADING_BREAK_RE = re.compile(r'^(?:\s|\\\n)+')
+TRAILING_BREAK_RE = re.compile(r'(?:\s|\\\n)+$')
+
+HORIZONTAL_RULE = '-' * 72
+
+
+def escape_text(text):
+    """
+    Escape Markdown syntax characters in plain text
+    """
+    text = ESCAPE_RE.sub(r'\\\1', text)
+    return UNDERSCORE_RE.sub(r'\\_', text)
+
+
+class InlineConverter:
+    """
+    Converts the inline markup of one line, tracking open emphasis the way MediaWiki does:
+    quote runs toggle bold/italic, mis-nested markers are closed and reopened,
+    and anything still open at the end of the line is closed.
+    """
+
+    def __init__(self, notes):
+        self.notes = notes
+        self.stack = []
+        self.root = []
+
+    def emit(self, text):
+        (self.stack[-1][1] if self.stack else self.root).append(text)
+
+    def open(self, kind):
+        self.stack.append((kind, []))
+
+    def close_top(self):
+        kind, parts = self.stack.pop()
+        content = ''.join(parts)
+        stripped = content.strip()
+        if not stripped:
+            self.emit(content)
+            return kind
+        # Markdown emphasis cannot start or end with whitespace, so move it outside
+        start, end = MARKERS[kind]
+        leading = content[:len(content) - len(content.lstrip())]
+        trailing = content[len(content.rstrip()):]
+        if kind in ('sup', 'sub'):
+            stripped = stripped.replace(' ', '\\ ')
+        self.emit(f"{leading}{start}{stripped}{end}{trailing}")
+        return kind
+
+    def close(self, kind):
+        if not any(open_kind == kind for open_kind, _ in self.stack):
+            return
+        reopen = []
+        while True:
+            closed = self.close_top()
+            if closed == kind:
+                break
+            reopen.append(closed)
+        for inner in reversed(reopen):
+            self.open(inner)
+
+    def toggle(self, kind):
+        if any(open_kind == kind for open_kind, _ in self.stack):
+            self.close(kind)
+        else:
+            self.open(kind)
+
+    def quotes(self, run):
+        length = len(run)
+        if length == 4:
+            self.emit("'")
+            length = 3
+        elif length > 5:
+            self.emit("'" * (length - 5))
+            length = 5
+        if length == 2:
+            self.toggle('italic')
+        elif length == 3:
+            self.toggle('bold')
+        else:
+            # ''''' toggles both; close whichever was opened last first
+            if self.stack and self.stack[-1][0] == 'bold':
+                self.toggle('bold')
+                self.toggle('italic')
+            else:
+                self.toggle('italic')
+                self.toggle('bold')
+
+    def text(self, text):
+        self.emit(escape_text(html.unescape(text)))
+
+    def convert(self, line):
+        pos = 0
+        for match in INLINE_TOKEN_RE.finditer(line):
+            if match.start() > pos:
+                self.text(line[pos:match.start()])
+            pos = match.end()
+            self.token(match)
+        if pos < len(line):
+            self.text(line[pos:])
+        while self.stack:
+            self.close_top()
+        return ''.join(self.root)
+
+    def token(self, match):
+        if match.group('nowiki'):
+            self.text(match.group('nowiki_text'))
+        elif match.group('code'):
+            code = html.unescape(match.group('code_text'))
+            fence = '``' if '`' in code else '`'
+            self.emit(f"{fence}{code}{fence}")
+        elif match.group('ref'):
+            note = match.group('ref_text')
+            if note and note.strip():
+                self.notes.append(convert_inline(note.strip(), self.notes))
+                self.emit(f"[^{len(self.notes)}]")
+        elif match.group('comment'):
+            pass
+        elif match.group('wikilink'):
+            target = match.group('wl_target').strip()
+            label = match.group('wl_text')
+            label = convert_inline(label if label else target, self.notes)
+            self.emit(f'[{label}]({target.replace(" ", "_")} "wikilink")')
+        elif match.group('extlink'):
+            url = match.group('el_url')
+            label = match.group('el_text')
+            if label and label.strip():
+                self.emit(f"[{convert_inline(label.strip(), self.notes)}]({url})")
+            else:
+                self.emit(f"<{url}>")
+        elif match.group('url'):
+            self.emit(f"<{match.group('url')}>")
+        elif match.group('quotes'):
+            self.quotes(match.group('quotes'))
+        elif match.group('tag'):
+            self.tag(match.group('tag'), match.group('tag_name').lower())
+
+    def tag(self, tag, name):
+        if name == 'br':
+            self.emit('\\\n')
+            return
+        kind = TAG_MARKERS.get(name)
+        if not kind:
+            return
+        if tag.startswith('</'):
+            self.close(kind)
+        elif not tag.endswith('/>'):
+            self.open(kind)
+
+
+def convert_inline(text, notes):
+    """
+    Convert the inline markup of a single line to Markdown
+    """
+    return InlineConverter(notes).convert(text)
+
+
+def split_cells(line, separator):
+    """
+    Split a table row line into cells, dropping attribute prefixes like `style="..."|`
+    """
+    cells = []
+    for cell in line[1:].split(separator):
+        # An attribute prefix is separated by a single | outside of links
+        depth = 0
+        for index, char in enumerate(cell):
+            if cell.startswith('[[', index):
+                depth += 1
+            elif cell.startswith(']]', index):
+                depth -= 1
+            elif char == '|' and depth == 0 and not cell.startswith('||', index):
+                if '=' in cell[:index]:
+                    cell = cell[index + 1:]
+                break
+        cells.append(cell.strip())
+    return cells
+
+
+def convert_table(lines, notes):
+    """
+    Convert the lines of a {| ... |} table into a Markdown pipe table
+    """
+    rows = []
+    row = None
+    for line in lines:
+        if line.startswith('{|') or line.startswith('|}') or line.startswith('|+'):
+            continue
+        if line.startswith('|-'):
+            row = None
+            continue
+        if line.startswith('!') or line.startswith('|'):
+            if row is None:
+                row = []
+                rows.append(row)
+            separator = '!!' if line.startswith('!') and '!!' in line else '||'
+            row.extend(split_cells(line, separator))
+        elif row:
+            # Continuation of the previous cell
+            row[-1] = f"{row[-1]} {line}".strip()
+
+    rows = [row for row in rows if row]
+    if not rows:
+        return None
+    width = max(len(row) for row in rows)
+    rendered = []
+    for index, row in enumerate(rows):
+        # Pipes in cell text are already escaped; line breaks cannot appear in a pipe table
+        cells = [convert_inline(cell, notes).replace('\\\n', ' ') for cell in row]
+        cells += [''] * (width - len(cells))
+        rendered.append('| ' + ' | '.join(cells) + ' |')
+        if index == 0:
+            rendered.append('|' + '|'.join(['---'] * width) + '|')
+    return '\n'.join(rendered)
+
+
+def list_item(prefix, text, notes):
+    """
+    Convert one list line (`*`, `#`, `:` or `;` prefixed) to a Markdown list line
+    """
+    indent = ''
+    for marker in prefix[:-1]:
+        indent += '   ' if marker == '#' else '  '
+    marker = prefix[-1]
+    if marker == ';':
+        term, _, definition = text.partition(':')
+        line = f"{indent}**{convert_inline(term.strip(), notes)}**"
+        if definition.strip():
+            line += f"\n{indent}:   {convert_inline(definition.strip(), notes)}"
+        return line
+    content = convert_inline(text, notes)
+    if marker == '*':
+        return f"{indent}- {content}"
+    if marker == '#':
+        return f"{indent}1. {content}"
+    # ':' indents: a blockquote at the top level, continuation text inside a list
+    return f"{indent}{content}" if indent else f"> {content}"
+
+
+def convert(wikitext):
+    """
+    Convert a MediaWiki fragment to Markdown
+    """
+    text = wikitext.replace('\r\n', '\n')
+    text = HTML_HEADING_RE.sub(lambda m: f"\n{'=' * int(m.group(1))}{m.group(2).strip()}{'=' * int(m.group(1))}\n", text)
+    text = PARAGRAPH_TAG_RE.sub('\n\n', text)
+    for pattern, replacement in HTML_TABLE_TAGS:
+        text = pattern.sub(replacement, text)
+
+    notes = []
+    blocks = []
+    paragraph = []
+    items = []
+    table = None
+
+    # Kind of the list block being collected: 'list' (* and #), 'quote' (:) or 'definition' (;)
+    items_kind = None
+
+    def flush():
+        if paragraph:
+            # Line breaks at the edges of a paragraph have no effect
+            text = ' '.join(paragraph).replace('\\\n ', '\\\n')
+            blocks.append(TRAILING_BREAK_RE.sub('', LEADING_BREAK_RE.sub('', text)))
+            paragraph.clear()
+        if items:
+            blocks.append('\n'.join(items))
+            items.clear()
+
+    for raw_line in text.split('\n'):
+        line = raw_line.strip()
+
+        if table is not None:
+            table.append(line)
+            if line.startswith('|}'):
+                converted = convert_table(table, notes)
+                if converted:
+                    blocks.append(converted)
+                table = None
+            continue
+
+        if not line:
+            flush()
+            continue
+
+        if line.startswith('{|'):
+            flush()
+            table = [line]
+            continue
+
+        heading = HEADING_RE.match(line)
+        if heading:
+            flush()
+            level = min(len(heading.group(1)), len(heading.group(3)))
+            blocks.append(f"{'#' * level} {convert_inline(heading.group(2), notes)}")
+            continue
+
+        if HR_RE.match(line):
+            flush()
+            blocks.append(HORIZONTAL_RULE)
+            continue
+
+        list_match = LIST_RE.match(line)
+        if list_match:
+            kind = {':': 'quote', ';': 'definition'}.get(list_match.group(1)[0], 'list')
+            if paragraph or kind != items_kind:
+                flush()
+            items_kind = kind
+            items.append(list_item(list_match.group(1), list_match.group(2), notes))
+            continue
+
+        if items:
+            flush()
+        content = convert_inline(line, notes)
+        if not paragraph:
+            # Text that would otherwise start a heading, quote or list
+            content = LINE_START_ESCAPE_RE.sub(lambda m: f"\\{m.group(1)}" if m.group(1) else f"{m.group(2)}\\{m.group(3)}", content)
+        if content.strip():
+            paragraph.append(content)
+
+    if table is not None:
+        converted = convert_table(table, notes)
+        if converted:
+            blocks.append(converted)
+    flush()
+
+    for number, note in enumerate(notes, 1):
+        blocks.append(f"[^{number}]: {note}")
+
+    return '\n\n'.join(block for block in blocks if block.strip()) + '\n'
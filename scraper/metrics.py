@@ -0,0 +1,185 @@
+"""
+Metrics and profiling shared by the scraper scripts
+
+Each script collects counters, timers and per-host request latency histograms in a
+Metrics object and writes them as a JSON report when it finishes. With --profile
+the script's main work also runs under cProfile, and the stats are saved next to
+the report for inspection with pstats or snakeviz.
+"""
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from datetime import datetime, timezone
+
+METRICS_DIR = 'difficulties/metrics'
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Summary:
+    """
+    Count, total, min and max of a series of values
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.total / self.count if self.count else None,
+        }
+
+
+class Histogram(Summary):
+    """
+    Summary that also counts values per LATENCY_BUCKETS bucket
+    Buckets are cumulative, like Prometheus: each counts the values up to its bound
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        super().__init__()
+        self.bounds = buckets
+        self.buckets = [0] * (len(buckets) + 1)
+
+    def add(self, value):
+        super().add(value)
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    def as_dict(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip([str(bound) for bound in self.bounds] + ['+Inf'], self.buckets):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {**super().as_dict(), 'buckets': buckets}
+
+
+class Metrics:
+    """
+    Thread-safe counters, timers and per-host latency histograms for one stage of the scraper
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.started = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.counters = {}
+        self.timers = {}
+        self.latency = {}
+        self.lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        """
+        Add `amount` to a counter
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_time(self, name, seconds):
+        """
+        Record one duration under a timer
+        """
+        with self.lock:
+            self.timers.setdefault(name, Summary()).add(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """
+        Time the body of a with block
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def observe_latency(self, host, seconds):
+        """
+        Record the latency of one request to `host`
+        """
+        with self.lock:
+            self.latency.setdefault(host, Histogram()).add(seconds)
+
+    def report(self):
+        """
+        Everything recorded so far, as a JSON-serializable dict
+        """
+        with self.lock:
+            return {
+                'stage': self.stage,
+                'started': self.started.isoformat(timespec='seconds'),
+                'wall_seconds': time.perf_counter() - self.start,
+                'counters': dict(sorted(self.counters.items())),
+                'timers': {name: summary.as_dict() for name, summary in sorted(self.timers.items())},
+                'latency': {host: histogram.as_dict() for host, histogram in sorted(self.latency.items())},
+            }
+
+    def write_report(self, path=None):
+        """
+        Write the report as JSON, by default to difficulties/metrics/<stage>.json
+        Returns the path written to
+        """
+        path = path or os.path.join(METRICS_DIR, f"{self.stage}.json")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+            f.write('\n')
+        return path
+
+
+def add_arguments(parser, stage):
+    """
+    Add the --metrics and --profile options shared by the scraper scripts
+    """
+    parser.add_argument('--metrics', default=os.path.join(METRICS_DIR, f"{stage}.json"),
+                        help=f'Where to write the JSON metrics report (default: {METRICS_DIR}/{stage}.json)')
+    parser.add_argument('--profile', action='store_true',
+                        help=f'Profile the run with cProfile and save the stats to {METRICS_DIR}/{stage}.prof '
+                             f'(only the main thread is profiled, not worker threads or processes)')
+
+@contextlib.contextmanager
+def profiled(stage, enabled, path=None):
+    """
+    Run the body of a with block under cProfile if `enabled`, saving the stats
+    to difficulties/metrics/<stage>.prof and printing the top functions
+    """
+    if not enabled:
+        yield
+        return
+
+    path = path or os.path.join(METRICS_DIR, f"{stage}.prof")
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(path)
+        print(f"\n🔬 Profile saved to {path}; top functions by cumulative time:")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
@@ -0,0 +1,450 @@
+"""
+Local stand-in for the Fandom wikis, for testing and benchmarking the downloaders offline
+
+Serves the MediaWiki revisions API (including rvsection and the links and categorymembers
+generators) and Special:FilePath from the files already in
+the repository: chart pages from difficulties/source*.wikitext, difficulty pages
+from difficulties/wikitext and images from difficulties/image. Latency, random
+server errors, 429 throttling and MediaWiki maxlag errors can be injected to
+exercise concurrency and retries. Responses carry an ETag (and images a
+Last-Modified), conditional requests for unchanged content get 304 Not Modified,
+and text responses are gzipped for clients that accept it, so the HTTP cache of
+http_client.py can be checked too.
+
+Point the downloaders at it with --base-url or FANDOM_BASE_URL (see wiki_urls.py);
+requests carry the real wiki's host as the first path segment:
+    /jtoh.fandom.com/api.php?action=query&prop=revisions&titles=Easy&...
+    /jtohs-joke-towers.fandom.com/wiki/Special:FilePath/Easy.png
+
+Usage:
+    python scraper/mock_fandom.py                                  # Serve on http://127.0.0.1:8765
+    python scraper/mock_fandom.py --latency 0.2 --jitter 0.1       # Slow responses
+    python scraper/mock_fandom.py --error-rate 0.05 --throttle 10  # 5% 503s, 429 above 10 requests/s per wiki
+    python scraper/mock_fandom.py --maxlag-rate 0.1                # 10% of maxlag= API requests refused
+    python scraper/mock_fandom.py --no-validators                  # No ETag or Last-Modified, never 304
+    FANDOM_BASE_URL=http://127.0.0.1:8765 python scraper/download_difficulty_wikitext.py --force
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import gzip
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from charts import CHART_API_URL, CHART_PAGES
+from paths import image_filename, sanitize_filename
+from rate_limit import HostRateLimiter
+from wiki_pages import MAX_TITLES, normalize_title, page_section
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Host assumed for requests without one in their path
+DEFAULT_WIKI = urlparse(CHART_API_URL).netloc
+DIFFICULTIES_FILE = 'difficulties/difficulties.json'
+WIKITEXT_DIR = 'difficulties/wikitext'
+IMAGE_DIR = 'difficulties/image'
+FILE_PATH_PREFIX = '/wiki/Special:FilePath/'
+STATIC_PREFIX = '/static/'
+# Replication lag (seconds) reported by injected maxlag errors
+MOCK_LAG = 7
+# Text bodies at least this large are gzipped when the client accepts it
+GZIP_MIN_SIZE = 1024
+# Most pages a generator lists per response (MediaWiki's 'max' for clients without the apihighlimits right)
+GENERATOR_LIMIT = 500
+# Parameter prefix of each supported generator, e.g. gplcontinue for generator=links
+GENERATOR_PREFIXES = {'links': 'gpl', 'categorymembers': 'gcm'}
+LINK_RE = re.compile(r'\[\[([^\]|#]+)')
+IMAGE_TYPES = {'.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.gif': 'image/gif', '.webp': 'image/webp'}
+
+
+class Fixtures:
+    """
+    The pages and images the mock serves, found from difficulties.json and the chart list
+    Page contents are read on first request and kept in memory.
+    """
+
+    def __init__(self, root='.'):
+        self.root = root
+        self.pages = {}
+        self.images = {}
+        self.contents = {}
+        self.lock = threading.Lock()
+
+        for title, filename in CHART_PAGES:
+            self.pages[(DEFAULT_WIKI, normalize_title(title))] = os.path.join(root, filename)
+
+        with open(os.path.join(root, DIFFICULTIES_FILE), 'r', encoding='utf-8') as f:
+            difficulties = json.load(f)
+        image_dir = os.path.join(root, IMAGE_DIR)
+        if os.path.isdir(image_dir):
+            for entry in os.scandir(image_dir):
+                self.images[entry.name] = entry.path
+        for difficulty in difficulties:
+            url = urlparse(difficulty['url'])
+            title = normalize_title(unquote(url.path.replace('/wiki/', '', 1)))
+            self.pages.setdefault((url.netloc, title), os.path.join(root, WIKITEXT_DIR, f"{sanitize_filename(difficulty['name'])}.wikitext"))
+            # Images are saved under the difficulty's name, but requested by their wiki file name
+            saved = self.images.get(image_filename(difficulty['name']))
+            if difficulty.get('image') and saved:
+                self.images.setdefault(difficulty['image'], saved)
+
+    def titles(self, host):
+        """
+        Titles of the pages the mock has for one wiki
+        """
+        return [title for page_host, title in self.pages if page_host == host]
+
+    def page(self, host, title):
+        """
+        (page id, content, timestamp) of a page, or None if there is no such page
+        """
+        path = self.pages.get((host, title))
+        if path is None or not os.path.exists(path):
+            return None
+        with self.lock:
+            if path not in self.contents:
+                with open(path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                timestamp = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+                self.contents[path] = (len(self.contents) + 1, content, timestamp)
+            return self.contents[path]
+
+
+class MockFandomServer(ThreadingHTTPServer):
+    """
+    HTTP server holding the fixtures, the fault injection settings and request statistics
+    """
+    daemon_threads = True
+
+    def __init__(self, address, fixtures, latency=0.0, jitter=0.0, error_rate=0.0, throttle=None,
+                 maxlag_rate=0.0, validators=True, content_limit=MAX_TITLES, seed=None, verbose=False):
+        super().__init__(address, MockFandomHandler)
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle = HostRateLimiter(throttle) if throttle else None
+        self.throttle_rate = throttle
+        self.maxlag_rate = maxlag_rate
+        self.validators = validators
+        self.content_limit = content_limit
+        self.random = random.Random(seed)
+        self.verbose = verbose
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def chance(self, probability):
+        with self.lock:
+            return self.random.random() < probability
+
+    def delay(self):
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+
+class MockFandomHandler(BaseHTTPRequestHandler):
+    server_version = 'MockFandom/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_body(self, status, body, content_type, headers=None):
+        if (status == 200 and len(body) >= GZIP_MIN_SIZE and not content_type.startswith('image/')
+                and 'gzip' in self.headers.get('Accept-Encoding', '')):
+            body = gzip.compress(body, compresslevel=6)
+            headers = {**(headers or {}), 'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'}
+            self.server.count('gzipped')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count(f"status_{status}")
+        self.server.count('bytes_sent', len(body))
+
+    def send_json(self, data, status=200, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_body(status, body, 'application/json; charset=utf-8', headers)
+
+    def send_cacheable(self, body, content_type, last_modified=None):
+        """
+        Send a 200 with an ETag (and Last-Modified, if given), or 304 Not Modified
+        when the request's If-None-Match or If-Modified-Since shows the client has it
+        """
+        if not self.server.validators:
+            self.send_body(200, body, content_type)
+            return
+        etag = f'"{zlib.crc32(body):08x}-{len(body)}"'
+        headers = {'ETag': etag}
+        if last_modified is not None:
+            headers['Last-Modified'] = formatdate(last_modified, usegmt=True)
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            not_modified = etag in [tag.strip() for tag in if_none_match.split(',')]
+        else:
+            not_modified = False
+            if last_modified is not None and self.headers.get('If-Modified-Since'):
+                try:
+                    not_modified = int(last_modified) <= parsedate_to_datetime(self.headers['If-Modified-Since']).timestamp()
+                except (TypeError, ValueError):
+                    pass
+        if not_modified:
+            self.send_body(304, b'', content_type, headers)
+        else:
+            self.send_body(200, body, content_type, headers)
+
+    def do_GET(self):
+        server = self.server
+        server.count('requests')
+        url = urlparse(self.path)
+        if url.path == '/stats':
+            # Copy under the lock, but send outside it: sending counts into the stats too
+            with server.lock:
+                stats = dict(server.stats)
+            self.send_json(stats)
+            return
+
+        # /<wiki host>/<path>; a missing host means the chart wiki
+        host, _, path = url.path.lstrip('/').partition('/')
+        if '.' not in host:
+            host, path = DEFAULT_WIKI, url.path.lstrip('/')
+        path = f"/{path}"
+
+        time.sleep(server.delay())
+        if server.throttle and not server.throttle.try_acquire(host):
+            retry_after = max(1, math.ceil(1 / server.throttle_rate))
+            self.send_json({'error': {'code': 'ratelimited', 'info': 'You have exceeded your rate limit.'}},
+                           429, {'Retry-After': str(retry_after)})
+            return
+        if server.error_rate and server.chance(server.error_rate):
+            self.send_body(503, b'Service Unavailable', 'text/plain')
+            return
+
+        if path == '/api.php':
+            params = parse_qs(url.query)
+            # Like MediaWiki, refuse requests that set maxlag while the (pretend) replicas lag behind
+            maxlag = params.get('maxlag', [None])[0]
+            if maxlag is not None and server.maxlag_rate and server.chance(server.maxlag_rate):
+                self.send_json({'error': {'code': 'maxlag', 'info': f'Waiting for a database server: {MOCK_LAG} seconds lagged.'}},
+                               200, {'Retry-After': '1', 'X-Database-Lag': str(MOCK_LAG)})
+                server.count('maxlag_errors')
+                return
+            body = json.dumps(self.query(host, params), ensure_ascii=False).encode('utf-8')
+            self.send_cacheable(body, 'application/json; charset=utf-8')
+        elif path.startswith(FILE_PATH_PREFIX):
+            self.file_path(host, unquote(path[len(FILE_PATH_PREFIX):]))
+        elif path.startswith(STATIC_PREFIX):
+            self.static_file(unquote(path[len(STATIC_PREFIX):]))
+        else:
+            self.send_body(404, b'Not Found', 'text/plain')
+
+    def query(self, host, params):
+        """
+        The response to an action=query&prop=revisions request, in formatversion=2 shape
+        Only `content_limit` pages get their content per response; the rest come with `continue`
+        With generator=links or generator=categorymembers the pages are the ones the generator lists,
+        up to its limit per response, and `continue` carries on through the generator too
+        """
+        if params.get('action', [''])[0] != 'query' or params.get('prop', [''])[0] != 'revisions':
+            return {'error': {'code': 'badvalue', 'info': 'The mock only serves action=query&prop=revisions.'}}
+        titles = [title for title in params.get('titles', [''])[0].split('|') if title]
+        if len(titles) > MAX_TITLES:
+            return {'error': {'code': 'toomanyvalues', 'info': f'Too many values supplied for parameter "titles". The limit is {MAX_TITLES}.'}}
+        generator = params.get('generator', [None])[0]
+        generator_continue = None
+        if generator is not None:
+            prefix = GENERATOR_PREFIXES.get(generator)
+            if prefix is None:
+                return {'error': {'code': 'badvalue', 'info': f'The mock does not serve generator={generator}.'}}
+            limit = params.get(f'{prefix}limit', ['10'])[0]
+            limit = GENERATOR_LIMIT if limit == 'max' else min(GENERATOR_LIMIT, int(limit))
+            offset = int(params.get(f'{prefix}continue', ['0'])[0])
+            generated = self.generate(host, generator, titles, params)
+            titles = generated[offset:offset + limit]
+            # Resume the generator where this response stops, or repeat it while page contents are pending
+            generator_continue = (f'{prefix}continue', offset, offset + limit if offset + limit < len(generated) else None)
+        rvprop = set(params.get('rvprop', ['ids|timestamp'])[0].split('|'))
+        start = int(params.get('rvcontinue', ['0'])[0])
+        section = params.get('rvsection', [None])[0]
+
+        normalized = []
+        pages = []
+        with_content = 0
+        # Where the next continue request should resume, if some pages' content did not fit
+        next_start = None
+        for index, title in enumerate(titles):
+            name = normalize_title(title)
+            if name != title and generator is None:
+                normalized.append({'fromencoded': False, 'from': title, 'to': name})
+            found = self.server.fixtures.page(host, name)
+            if found is None:
+                pages.append({'ns': 0, 'title': name, 'missing': True})
+                continue
+            page_id, content, timestamp = found
+            page = {'pageid': page_id, 'ns': 0, 'title': name}
+            pages.append(page)
+            if 'content' in rvprop:
+                # Pages before `start` were sent by an earlier response, later ones wait for the next
+                if index < start:
+                    continue
+                if with_content == self.server.content_limit:
+                    next_start = index if next_start is None else next_start
+                    continue
+                with_content += 1
+                self.server.count('pages_served')
+            revision = {}
+            if 'ids' in rvprop:
+                revision.update(revid=zlib.crc32(content.encode('utf-8')) & 0x7FFFFFFF, parentid=0)
+            if 'timestamp' in rvprop:
+                revision['timestamp'] = timestamp
+            if 'content' in rvprop:
+                if section is not None:
+                    # Like MediaWiki, one page without the section fails the whole request
+                    text = page_section(content, int(section)) if section.isdigit() else None
+                    if text is None:
+                        return {'error': {'code': 'nosuchsection', 'info': f'There is no section {section} in r{revision.get("revid", 0)}.'}}
+                    content = text
+                revision['slots'] = {'main': {'contentmodel': 'wikitext', 'contentformat': 'text/x-wiki', 'content': content}}
+            page['revisions'] = [revision]
+
+        response = {'query': {'pages': pages}}
+        if normalized:
+            response['query']['normalized'] = normalized
+        if next_start is not None:
+            response['continue'] = {'rvcontinue': str(next_start), 'continue': '||'}
+            if generator_continue:
+                name, offset, _ = generator_continue
+                response['continue'].update({name: str(offset), 'continue': f'{name}||'})
+        elif generator_continue and generator_continue[2] is not None:
+            name, _, following = generator_continue
+            response['continue'] = {name: str(following), 'continue': '-||'}
+            response['batchcomplete'] = True
+        else:
+            response['batchcomplete'] = True
+        return response
+
+    def generate(self, host, generator, titles, params):
+        """
+        Every title a generator lists, sorted like MediaWiki sorts them
+        links: the articles linked from the pages in `titles`; categorymembers: the pages in the
+        category `gcmtitle` (a [[Category:...]] link in their wikitext). Both keep to namespace 0.
+        """
+        fixtures = self.server.fixtures
+        found = set()
+        if generator == 'links':
+            for title in titles:
+                page = fixtures.page(host, normalize_title(title))
+                if page is None:
+                    continue
+                for target in LINK_RE.findall(page[1]):
+                    # Links with a colon go to other namespaces (File:, :Category:) or other wikis
+                    if ':' not in target and target.strip():
+                        found.add(normalize_title(target))
+        else:
+            category = normalize_title(params.get('gcmtitle', [''])[0])
+            for title in fixtures.titles(host):
+                page = fixtures.page(host, title)
+                if page is None:
+                    continue
+                categories = re.findall(r'\[\[\s*Category\s*:([^\]|]+)', page[1])
+                if category in (normalize_title(f'Category:{name}') for name in categories):
+                    found.add(title)
+        return sorted(found)
+
+    def file_path(self, host, name):
+        """
+        Special:FilePath redirects to where the file is stored, like Fandom's image CDN
+        """
+        if normalize_title(name) not in self.server.fixtures.images and name not in self.server.fixtures.images:
+            self.send_body(404, b'No such file', 'text/plain')
+            return
+        name = name if name in self.server.fixtures.images else normalize_title(name)
+        location = f"http://{self.headers.get('Host', DEFAULT_HOST)}{STATIC_PREFIX}{quote(name)}"
+        self.send_body(302, b'', 'text/plain', {'Location': location})
+
+    def static_file(self, name):
+        path = self.server.fixtures.images.get(name)
+        if path is None:
+            self.send_body(404, b'Not Found', 'text/plain')
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        content_type = IMAGE_TYPES.get(os.path.splitext(path)[1].lower(), 'application/octet-stream')
+        self.send_cacheable(body, content_type, os.path.getmtime(path))
+        self.server.count('images_served')
+
+
+def start_server(host=DEFAULT_HOST, port=DEFAULT_PORT, root='.', **options):
+    """
+    Start a mock server in a background thread; port 0 picks a free port
+    Returns the server; its `url` is the base URL to give the downloaders, and shutdown() stops it
+    """
+    server = MockFandomServer((host, port), Fixtures(root), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the wiki API and images from local files')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Address to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--root', default='.', help='Repository whose difficulties/ files are served (default: .)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response (default: 0)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random +/- seconds on top of --latency (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503 (default: 0)')
+    parser.add_argument('--throttle', type=float, default=None,
+                        help='Requests per second allowed per wiki; the rest get 429 with Retry-After (default: no limit)')
+    parser.add_argument('--maxlag-rate', type=float, default=0.0,
+                        help='Fraction of API requests with maxlag= refused with a maxlag error (default: 0)')
+    parser.add_argument('--no-validators', action='store_true',
+                        help='Send no ETag or Last-Modified and never answer 304')
+    parser.add_argument('--content-limit', type=int, default=MAX_TITLES,
+                        help=f'Pages with content per API response; more need continue requests (default: {MAX_TITLES})')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for the injected errors and jitter')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    server = MockFandomServer((args.host, args.port), Fixtures(args.root), latency=args.latency, jitter=args.jitter,
+                              error_rate=args.error_rate, throttle=args.throttle, maxlag_rate=args.maxlag_rate,
+                              validators=not args.no_validators,
+                              content_limit=max(1, args.content_limit), seed=args.seed, verbose=args.verbose)
+    print(f"🧪 Mock Fandom serving {len(server.fixtures.pages)} pages and {len(set(server.fixtures.images.values()))} images on {server.url}")
+    print(f"   Use: FANDOM_BASE_URL={server.url} (or --base-url {server.url}); statistics at {server.url}/stats\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    print()
+    print("=" * 80)
+    print("SUMMARY")
+    print("=" * 80)
+    for name, value in sorted(server.stats.items()):
+        print(f"  {name}: {value}")
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
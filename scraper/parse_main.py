@@ -1,262 +1,421 @@
+import argparse
+import os
 import re
 import json
-from typing import List, Dict, Optional
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-def parse_wikitext_difficulties(wikitext_file: str) -> List[Dict]:
+from charts import CHART_PAGES
+from metrics import Metrics, add_arguments, profiled
+from ratings import normalize_rating
+
+# Class header, e.g. "|Class 2 | Normal" (with or without <nowiki> tags)
+CLASS_HEADER_RE = re.compile(r'\|(?:<nowiki>)?Class (Negative|\d+|[A-Z][a-z]+) \| (.+?)(?:</nowiki>)?(?:\||\n|$)')
+# Any class header, used to find where the unclassified section ends
+CLASS_BOUNDARY_RE = re.compile(r'Class (Negative|\d+|[A-Z][a-z]+) \|')
+CLASS_SECTION_RE = re.compile(r"'''(Baseline|Low|Mid|High|Peak|Skyline|Chains)(?:\s*\([^)]*\))?'''")
+UNCLASSIFIED_SECTION_RE = re.compile(r"'''([^']+)'''")
+IMAGE_RE = re.compile(r'File:([^|\]]+)')
+# Image template, e.g. {{Class0Difficulties|Win|50px}}
+IMAGE_TEMPLATE_RE = re.compile(r'{{[^|]+\|([^|]+)\|')
+EXTERNAL_LINK_RE = re.compile(r'\[\[w:c:([^:]+):([^\]|]+)(?:\|([^\]]+))?\]\]')
+CLASSIFIED_LINK_RE = re.compile(r'\[\[(?:File:[^\]]+\|)?([^\]|]+)(?:\|([^\]]+))?\]\]')
+UNCLASSIFIED_LINK_RE = re.compile(r'\[\[([^\]|]+)(?:\|([^\]]+))?\]\]')
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+BOLD_ITALIC_RE = re.compile(r"'''|''")
+BIG_TAG_RE = re.compile(r'<big>|</big>')
+TYPE_MARKUP_RE = re.compile(r"'''|''|<big>|</big>")
+
+# Number of lines after the image line that make up a difficulty row (name, type, rating)
+ROW_LOOKAHEAD = 3
+
+
+def parse_name_link(name_line: str, internal_link_re: re.Pattern) -> Optional[Tuple[str, str, str]]:
     """
-    Parse wikitext file to extract difficulties with their ratings, classes, and URLs.
-    
-    Returns a list of dictionaries with keys:
-    - name: difficulty name
-    - rating: difficulty rating
-    - type: difficulty type (Normal, Sub-Difficulty, etc.)
-    - class: class name (e.g., "Class Negative", "Class 0", etc.)
-    - class_section: section within class (Baseline, Low, Mid, High, Peak, etc.)
-    - image: image filename
-    - url: wiki URL (constructed from name)
+    Extract (display_name, wiki_name, wiki_url) from a wiki link such as
+    [[Name]], [[Name|Display]] or [[w:c:jtoh:Name|Display]].
+    Returns None if the line has no link.
     """
-    
-    with open(wikitext_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    difficulties = []
-    current_class = None
-    current_class_section = None
-    in_table = False
-    
-    lines = content.split('\n')
-    i = 0
-    
-    while i < len(lines):
-        line = lines[i].strip()
-        
+    # Check for external wiki first
+    external_wiki_match = EXTERNAL_LINK_RE.search(name_line)
+
+    if external_wiki_match:
+        # External wiki link
+        wiki_subdomain = external_wiki_match.group(1)
+        wiki_page = external_wiki_match.group(2)
+        display_name = external_wiki_match.group(3) if external_wiki_match.group(3) else wiki_page
+        wiki_url = f"https://{wiki_subdomain}.fandom.com/wiki/{wiki_page.replace(' ', '_')}"
+        return display_name, wiki_page, wiki_url
+
+    # Internal wiki link
+    name_match = internal_link_re.search(name_line)
+    if not name_match:
+        return None
+
+    display_name = name_match.group(2) if name_match.group(2) else name_match.group(1)
+    wiki_name = name_match.group(1)
+    wiki_url = f"https://jtohs-joke-towers.fandom.com/wiki/{wiki_name.replace(' ', '_')}"
+    return display_name, wiki_name, wiki_url
+
+
+def clean_display_name(display_name: str) -> str:
+    """
+    Remove HTML tags and bold/italic markup from a display name.
+    """
+    display_name = HTML_TAG_RE.sub('', display_name)
+    display_name = BOLD_ITALIC_RE.sub('', display_name)
+    display_name = BIG_TAG_RE.sub('', display_name)
+    return display_name.strip()
+
+
+def row_field(ahead: Tuple[str, ...], offset: int) -> str:
+    """
+    Return the `offset`-th line after the image line of a row, or "" past the end of the chart.
+    """
+    return ahead[offset - 1] if len(ahead) >= offset else ""
+
+
+class ClassifiedState:
+    """
+    Tracks the class tables (Class Negative, Class 0, ...) while the chart is scanned.
+    """
+
+    def __init__(self):
+        self.current_class = None
+        self.current_class_section = None
+        self.in_table = False
+        self.skip = 0
+
+    def feed(self, line: str, ahead: Tuple[str, ...]) -> Optional[Dict]:
+        """
+        Process one stripped line; `ahead` holds the next ROW_LOOKAHEAD stripped lines.
+        Returns a difficulty when the line starts a classified difficulty row.
+        """
+        if self.skip:
+            self.skip -= 1
+            return None
+
         # Detect class headers (with or without <nowiki> tags)
-        class_match = re.search(r'\|(?:<nowiki>)?Class (Negative|\d+|[A-Z][a-z]+) \| (.+?)(?:</nowiki>)?(?:\||\n|$)', line)
+        class_match = CLASS_HEADER_RE.search(line)
         if class_match:
-            current_class = f"Class {class_match.group(1)}"
-            in_table = False
-        
+            self.current_class = f"Class {class_match.group(1)}"
+            self.in_table = False
+
         # Detect table start for difficulties
-        if 'wikitable mw-collapsible' in line and current_class:
-            in_table = True
-        
+        if 'wikitable mw-collapsible' in line and self.current_class:
+            self.in_table = True
+
+        if not self.in_table:
+            return None
+
         # Detect class sections (Baseline, Low, Mid, High, Peak, Skyline)
-        if in_table and ('background:' in line or 'style="background:' in line):
-            section_match = re.search(r"'''(Baseline|Low|Mid|High|Peak|Skyline|Chains)(?:\s*\([^)]*\))?'''", line)
+        if 'background:' in line:
+            section_match = CLASS_SECTION_RE.search(line)
             if section_match:
-                current_class_section = section_match.group(1)
-                i += 1
-                continue
-        
+                self.current_class_section = section_match.group(1)
+                return None
+
         # Parse difficulty rows
-        if in_table and line.startswith('|') and not line.startswith('|-') and not line.startswith('|colspan') and not line.startswith('!'):
-            # Check if this is a difficulty entry (has File: pattern)
-            if 'File:' in line or '{{Class' in line:
-                # Try to extract difficulty info across multiple lines
-                difficulty_lines = [line]
-                
-                # Collect the next 3 lines (image, name, type, rating)
-                for j in range(1, 4):
-                    if i + j < len(lines):
-                        difficulty_lines.append(lines[i + j].strip())
-                
-                # Parse image
-                image_match = re.search(r'File:([^|\]]+)', difficulty_lines[0])
-                image = None
-                if image_match:
-                    image = image_match.group(1)
-                else:
-                    # Try template pattern like {{Class0Difficulties|Win|50px}}
-                    template_match = re.search(r'{{[^|]+\|([^|]+)\|', difficulty_lines[0])
-                    if template_match:
-                        image = f"{template_match.group(1)}.png"
-                
-                if image:
-                    
-                    # Parse name (next line)
-                    name_line = difficulty_lines[1] if len(difficulty_lines) > 1 else ""
-                    
-                    # Extract name from wiki link [[Name]] or [[w:c:jtoh:Name|Display]]
-                    # Check for external wiki first
-                    external_wiki_match = re.search(r'\[\[w:c:([^:]+):([^\]|]+)(?:\|([^\]]+))?\]\]', name_line)
-                    
-                    if external_wiki_match:
-                        # External wiki link
-                        wiki_subdomain = external_wiki_match.group(1)
-                        wiki_page = external_wiki_match.group(2)
-                        display_name = external_wiki_match.group(3) if external_wiki_match.group(3) else wiki_page
-                        wiki_name = wiki_page
-                        wiki_url = f"https://{wiki_subdomain}.fandom.com/wiki/{wiki_page.replace(' ', '_')}"
-                    else:
-                        # Internal wiki link
-                        name_match = re.search(r'\[\[(?:File:[^\]]+\|)?([^\]|]+)(?:\|([^\]]+))?\]\]', name_line)
-                        if not name_match:
-                            i += 1
-                            continue
-                        
-                        display_name = name_match.group(2) if name_match.group(2) else name_match.group(1)
-                        wiki_name = name_match.group(1)
-                        wiki_url = f"https://jtohs-joke-towers.fandom.com/wiki/{wiki_name.replace(' ', '_')}"
-                    
-                    # Remove HTML tags and markdown
-                    display_name = re.sub(r'<[^>]+>', '', display_name)
-                    display_name = re.sub(r"'''|''", '', display_name)
-                    display_name = re.sub(r'<big>|</big>', '', display_name)
-                    display_name = display_name.strip()
-                    
-                    # Parse type (2 lines down)
-                    type_line = difficulty_lines[2] if len(difficulty_lines) > 2 else ""
-                    difficulty_type = type_line.lstrip('|').strip()
-                    difficulty_type = re.sub(r"'''|''|<big>|</big>", '', difficulty_type)
-                    
-                    # Parse rating (3 lines down)
-                    rating_line = difficulty_lines[3] if len(difficulty_lines) > 3 else ""
-                    rating = rating_line.lstrip('|').strip()
-                    rating = re.sub(r'<[^>]+>', '', rating)
-                    rating = re.sub(r"'''|''", '', rating)
-                    
-                    # Skip header rows and section markers
-                    if difficulty_type not in ['Difficulty Type', 'EJT', 'EToH'] and display_name and current_class_section != 'Chains':
-                        difficulty = {
-                            'name': display_name,
-                            'wiki_name': wiki_name,
-                            'rating': rating,
-                            'type': difficulty_type,
-                            'class': current_class,
-                            'class_section': current_class_section,
-                            'image': image,
-                            'url': wiki_url
-                        }
-                        difficulties.append(difficulty)
-                        
-                        # Skip the lines we just processed
-                        i += 3
-        
-        i += 1
-    
-    return difficulties
+        if not line.startswith('|') or line.startswith('|-') or line.startswith('|colspan') or line.startswith('!'):
+            return None
+        # Check if this is a difficulty entry (has File: pattern)
+        if 'File:' not in line and '{{Class' not in line:
+            return None
 
+        # Parse image
+        image_match = IMAGE_RE.search(line)
+        if image_match:
+            image = image_match.group(1)
+        else:
+            # Try template pattern like {{Class0Difficulties|Win|50px}}
+            template_match = IMAGE_TEMPLATE_RE.search(line)
+            if not template_match:
+                return None
+            image = f"{template_match.group(1)}.png"
 
-def parse_unclassified_difficulties(wikitext_file: str) -> List[Dict]:
+        # Parse name (next line)
+        link = parse_name_link(row_field(ahead, 1), CLASSIFIED_LINK_RE)
+        if not link:
+            return None
+        display_name, wiki_name, wiki_url = link
+        display_name = clean_display_name(display_name)
+
+        # Parse type (2 lines down)
+        difficulty_type = row_field(ahead, 2).lstrip('|').strip()
+        difficulty_type = TYPE_MARKUP_RE.sub('', difficulty_type)
+
+        # Parse rating (3 lines down)
+        raw_rating = row_field(ahead, 3).lstrip('|').strip()
+        rating = HTML_TAG_RE.sub('', raw_rating)
+        rating = BOLD_ITALIC_RE.sub('', rating)
+
+        # Skip header rows and section markers
+        if difficulty_type in ['Difficulty Type', 'EJT', 'EToH'] or not display_name or self.current_class_section == 'Chains':
+            return None
+
+        # Skip the lines we just processed
+        self.skip = ROW_LOOKAHEAD
+        return {
+            'name': display_name,
+            'wiki_name': wiki_name,
+            'rating': rating,
+            **normalize_rating(raw_rating),
+            'type': difficulty_type,
+            'class': self.current_class,
+            'class_section': self.current_class_section,
+            'image': image,
+            'url': wiki_url
+        }
+
+
+class UnclassifiedState:
     """
-    Parse unclassified difficulties from the wikitext.
+    Tracks the Unclassified Difficulties table while the chart is scanned.
     """
-    with open(wikitext_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    difficulties = []
-    in_unclassified = False
-    in_table = False
-    current_section = None
-    
-    lines = content.split('\n')
-    i = 0
-    
-    while i < len(lines):
-        line = lines[i].strip()
-        
+
+    def __init__(self):
+        self.in_unclassified = False
+        self.in_table = False
+        self.current_section = None
+        self.done = False
+        self.skip = 0
+
+    def feed(self, line: str, ahead: Tuple[str, ...]) -> Optional[Dict]:
+        """
+        Process one stripped line; `ahead` holds the next ROW_LOOKAHEAD stripped lines.
+        Returns a difficulty when the line starts an unclassified difficulty row.
+        """
+        if self.done:
+            return None
+        if self.skip:
+            self.skip -= 1
+            return None
+
         # Detect unclassified section
         if 'Unclassified Difficulties' in line and '|width' in line:
-            in_unclassified = True
-        
-        if in_unclassified and 'wikitable' in line:
-            in_table = True
-        
+            self.in_unclassified = True
+
+        if self.in_unclassified and 'wikitable' in line:
+            self.in_table = True
+
         # End of unclassified section - stop when we hit Navigation or Class sections
-        if in_unclassified and ('Navigation between Charts' in line or 
-                                re.search(r'Class (Negative|\d+|[A-Z][a-z]+) \|', line)):
-            break
-        
+        if self.in_unclassified and ('Navigation between Charts' in line or CLASS_BOUNDARY_RE.search(line)):
+            self.done = True
+            return None
+
+        if not self.in_table:
+            return None
+
         # Detect subsections
-        if in_table and 'background:#' in line and "'''" in line:
-            section_match = re.search(r"'''([^']+)'''", line)
+        if 'background:#' in line and "'''" in line:
+            section_match = UNCLASSIFIED_SECTION_RE.search(line)
             if section_match:
-                current_section = section_match.group(1)
-        
+                self.current_section = section_match.group(1)
+
         # Parse difficulty rows
-        if in_table and line.startswith('|[[File:'):
-            difficulty_lines = [line]
-            for j in range(1, 4):
-                if i + j < len(lines):
-                    difficulty_lines.append(lines[i + j].strip())
-            
-            # Parse image
-            image_match = re.search(r'File:([^|\]]+)', difficulty_lines[0])
-            if image_match:
-                image = image_match.group(1)
-                
-                # Parse name
-                name_line = difficulty_lines[1] if len(difficulty_lines) > 1 else ""
-                
-                # Check for external wiki first
-                external_wiki_match = re.search(r'\[\[w:c:([^:]+):([^\]|]+)(?:\|([^\]]+))?\]\]', name_line)
-                
-                if external_wiki_match:
-                    # External wiki link
-                    wiki_subdomain = external_wiki_match.group(1)
-                    wiki_page = external_wiki_match.group(2)
-                    display_name = external_wiki_match.group(3) if external_wiki_match.group(3) else wiki_page
-                    wiki_name = wiki_page
-                    wiki_url = f"https://{wiki_subdomain}.fandom.com/wiki/{wiki_page.replace(' ', '_')}"
-                else:
-                    # Internal wiki link
-                    name_match = re.search(r'\[\[([^\]|]+)(?:\|([^\]]+))?\]\]', name_line)
-                    if not name_match:
-                        i += 1
-                        continue
-                    
-                    display_name = name_match.group(2) if name_match.group(2) else name_match.group(1)
-                    wiki_name = name_match.group(1)
-                    wiki_url = f"https://jtohs-joke-towers.fandom.com/wiki/{wiki_name.replace(' ', '_')}"
-                
-                # Remove HTML tags and markdown
-                display_name = re.sub(r'<[^>]+>', '', display_name)
-                display_name = re.sub(r"'''|''", '', display_name)
-                display_name = display_name.strip()
-                
-                # Parse type
-                type_line = difficulty_lines[2] if len(difficulty_lines) > 2 else ""
-                difficulty_type = type_line.lstrip('|').strip()
-                
-                # Parse rating
-                rating_line = difficulty_lines[3] if len(difficulty_lines) > 3 else ""
-                rating = rating_line.lstrip('|').strip()
-                
-                if display_name and difficulty_type not in ['Difficulty Type']:
-                    difficulty = {
-                        'name': display_name,
-                        'wiki_name': wiki_name,
-                        'rating': rating,
-                        'type': difficulty_type,
-                        'class': 'Unclassified',
-                        'class_section': current_section,
-                        'image': image,
-                        'url': wiki_url
-                    }
-                    difficulties.append(difficulty)
-                    i += 3
-        
-        i += 1
-    
-    return difficulties
+        if not line.startswith('|[[File:'):
+            return None
+
+        # Parse image
+        image_match = IMAGE_RE.search(line)
+        if not image_match:
+            return None
+        image = image_match.group(1)
+
+        # Parse name
+        link = parse_name_link(row_field(ahead, 1), UNCLASSIFIED_LINK_RE)
+        if not link:
+            return None
+        display_name, wiki_name, wiki_url = link
+        display_name = clean_display_name(display_name)
+
+        # Parse type and rating
+        difficulty_type = row_field(ahead, 2).lstrip('|').strip()
+        rating = row_field(ahead, 3).lstrip('|').strip()
+
+        if not display_name or difficulty_type in ['Difficulty Type']:
+            return None
+
+        self.skip = ROW_LOOKAHEAD
+        return {
+            'name': display_name,
+            'wiki_name': wiki_name,
+            'rating': rating,
+            **normalize_rating(rating),
+            'type': difficulty_type,
+            'class': 'Unclassified',
+            'class_section': self.current_section,
+            'image': image,
+            'url': wiki_url
+        }
+
+
+def iter_with_lookahead(lines: Iterable[str], size: int = ROW_LOOKAHEAD) -> Iterator[Tuple[str, Tuple[str, ...]]]:
+    """
+    Yield each stripped line together with the next `size` stripped lines,
+    keeping only a small window of the input in memory.
+    """
+    window = deque()
+    for raw_line in lines:
+        window.append(raw_line.rstrip('\n').strip())
+        if len(window) > size:
+            line = window.popleft()
+            yield line, tuple(window)
+    while window:
+        line = window.popleft()
+        yield line, tuple(window)
+
+
+def parse_chart(lines: Iterable[str]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Parse the difficulty chart in a single pass over its lines.
+
+    Returns (classified, unclassified), two lists of dictionaries with keys:
+    - name: difficulty name
+    - wiki_name: page name on the wiki
+    - rating: difficulty rating, as shown on the chart
+    - rating_min, rating_max: numeric bounds of the rating, "Infinity"/"-Infinity" when
+      unbounded, None for placements and unreadable ratings (see ratings.py)
+    - rating_min_tier, rating_max_tier: magnitude tier of each bound, ordering the numbers
+      too large for a float among themselves; 0 for every other number (see ratings.py)
+    - rating_placement: whether the rating is a placement rather than a number
+    - type: difficulty type (Normal, Sub-Difficulty, etc.)
+    - class: class name (e.g., "Class Negative", "Class 0", "Unclassified", etc.)
+    - class_section: section within class (Baseline, Low, Mid, High, Peak, etc.)
+    - image: image filename
+    - url: wiki URL (constructed from name)
+    """
+    classified_state = ClassifiedState()
+    unclassified_state = UnclassifiedState()
+    classified = []
+    unclassified = []
+
+    for line, ahead in iter_with_lookahead(lines):
+        difficulty = classified_state.feed(line, ahead)
+        if difficulty:
+            classified.append(difficulty)
+        difficulty = unclassified_state.feed(line, ahead)
+        if difficulty:
+            unclassified.append(difficulty)
+
+    return classified, unclassified
+
+
+def parse_chart_file(wikitext_file: str) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Stream a chart wikitext file through parse_chart.
+    """
+    with open(wikitext_file, 'r', encoding='utf-8') as f:
+        return parse_chart(f)
+
+
+def parse_wikitext_difficulties(wikitext_file: str) -> List[Dict]:
+    """
+    Parse wikitext file to extract classified difficulties with their ratings, classes, and URLs.
+    """
+    return parse_chart_file(wikitext_file)[0]
+
+
+def parse_unclassified_difficulties(wikitext_file: str) -> List[Dict]:
+    """
+    Parse unclassified difficulties from the wikitext.
+    """
+    return parse_chart_file(wikitext_file)[1]
+
+
+def merge_charts(parsed_charts: List[Tuple[List[Dict], List[Dict]]]) -> List[Dict]:
+    """
+    Merge the (classified, unclassified) results of several chart pages, in chart order.
+    Unclassified difficulties come first, then classified ones. A difficulty listed
+    under the same class by more than one chart is only kept from the first chart.
+    """
+    unclassified = []
+    classified = []
+    seen = set()
+    for chart_classified, chart_unclassified in parsed_charts:
+        chart_keys = set()
+        for target, difficulties in ((unclassified, chart_unclassified), (classified, chart_classified)):
+            for difficulty in difficulties:
+                key = (difficulty['url'], difficulty['class'])
+                if key in seen:
+                    continue
+                chart_keys.add(key)
+                target.append(difficulty)
+        seen |= chart_keys
+    return unclassified + classified
+
+
+def timed_parse_chart_file(wikitext_file: str) -> Tuple[Tuple[List[Dict], List[Dict]], float]:
+    """
+    parse_chart_file, also returning how long it took in seconds.
+    """
+    start = time.perf_counter()
+    result = parse_chart_file(wikitext_file)
+    return result, time.perf_counter() - start
+
+
+def parse_charts(wikitext_files: List[str], jobs: Optional[int] = None,
+                 metrics: Optional[Metrics] = None) -> List[Tuple[List[Dict], List[Dict]]]:
+    """
+    Parse several chart files, in a process pool when there is more than one.
+    Returns the per-file (classified, unclassified) results in the order given.
+    The parse time of each file is recorded in `metrics` if given.
+    """
+    if len(wikitext_files) <= 1 or jobs == 1:
+        timed = [timed_parse_chart_file(wikitext_file) for wikitext_file in wikitext_files]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            timed = list(executor.map(timed_parse_chart_file, wikitext_files))
+    if metrics:
+        for wikitext_file, (_, seconds) in zip(wikitext_files, timed):
+            metrics.add_time('parse_chart', seconds)
+            metrics.count('chart_bytes', os.path.getsize(wikitext_file))
+    return [result for result, _ in timed]
 
 
 if __name__ == "__main__":
-    # Parse the wikitext file
-    difficulties = parse_wikitext_difficulties('difficulties/source.wikitext')
-    unclassified = parse_unclassified_difficulties('difficulties/source.wikitext')
-
-    # Combine both lists
-    all_difficulties = unclassified + difficulties
-    
-    # Save to JSON
-    with open('difficulties/difficulties.json', 'w', encoding='utf-8') as f:
-        json.dump(all_difficulties, f, indent=2, ensure_ascii=False)
-    
-    print(f"Parsed {len(all_difficulties)} difficulties ({len(unclassified)} unclassified + {len(difficulties)} classified)")
-    print(f"Saved to difficulties/difficulties.json")
-    
-    # Print some examples
-    print("\nExample difficulties:")
-    for diff in all_difficulties[:5]:
-        print(f"  - {diff['name']} ({diff['class']}, {diff['rating']})")
+    parser = argparse.ArgumentParser(description='Parse the difficulty chart pages into difficulties.json')
+    parser.add_argument('--jobs', type=int, default=None, help='Number of chart pages parsed in parallel')
+    add_arguments(parser, 'parse')
+    args = parser.parse_args()
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+
+    metrics = Metrics('parse')
+    with profiled('parse', args.profile):
+        # Parse every chart page that has been downloaded
+        wikitext_files = []
+        for page_title, wikitext_file in CHART_PAGES:
+            if os.path.exists(wikitext_file):
+                wikitext_files.append(wikitext_file)
+            else:
+                print(f"⚠️  Skipping {page_title}: {wikitext_file} not found (run download_main.py first)")
+
+        parsed_charts = parse_charts(wikitext_files, args.jobs, metrics)
+        with metrics.timer('merge'):
+            all_difficulties = merge_charts(parsed_charts)
+        unclassified_count = sum(1 for diff in all_difficulties if diff['class'] == 'Unclassified')
+
+        # Save to JSON
+        with metrics.timer('write_json'), open('difficulties/difficulties.json', 'w', encoding='utf-8') as f:
+            json.dump(all_difficulties, f, indent=2, ensure_ascii=False)
+        metrics.count('difficulties', len(all_difficulties))
+        metrics.count('unclassified', unclassified_count)
+        unreadable = [diff for diff in all_difficulties if diff['rating_min'] is None and not diff['rating_placement']]
+        metrics.count('unreadable_ratings', len(unreadable))
+
+        for wikitext_file, (classified, unclassified) in zip(wikitext_files, parsed_charts):
+            print(f"  {wikitext_file}: {len(unclassified)} unclassified + {len(classified)} classified")
+        print(f"Parsed {len(all_difficulties)} difficulties ({unclassified_count} unclassified + {len(all_difficulties) - unclassified_count} classified)")
+        print(f"Saved to difficulties/difficulties.json")
+        for diff in unreadable:
+            print(f"⚠️  Could not read the rating of {diff['name']} ({diff['class']}): {diff['rating']!r}")
+
+        # Print some examples
+        print("\nExample difficulties:")
+        for diff in all_difficulties[:5]:
+            print(f"  - {diff['name']} ({diff['class']}, {diff['rating']})")
+
+    print(f"\n📊 Metrics written to {metrics.write_report(args.metrics)}")
@@ -0,0 +1,40 @@
+"""
+File names the scraper gives each difficulty's pages
+
+Shared by the downloaders and by the tools that only read their output
+(validate.py, snapshot.py, mock_fandom.py), so those don't have to import
+the downloaders and their network stack to find a file.
+"""
+import re
+
+# Characters download-images.js keeps when it names an image after its difficulty
+IMAGE_NAME_UNSAFE_RE = re.compile(r'[^a-zA-Z0-9 _\-.]')
+HTML_ENTITIES = (('&#39;', "'"), ('&quot;', '"'), ('&amp;', '&'), ('&lt;', '<'), ('&gt;', '>'))
+
+
+def sanitize_filename(name):
+    """
+    Sanitize filename by removing/replacing invalid characters
+    """
+    # Replace invalid filename characters
+    invalid_chars = '<>:"/\\|?*'
+    for char in invalid_chars:
+        name = name.replace(char, '_')
+
+    # Remove leading/trailing spaces and dots
+    name = name.strip('. ')
+
+    # Limit length
+    if len(name) > 200:
+        name = name[:200]
+
+    return name
+
+def image_filename(name):
+    """
+    The file download-images.js saves a difficulty's image as
+    """
+    for entity, char in HTML_ENTITIES:
+        name = name.replace(entity, char)
+    name = IMAGE_NAME_UNSAFE_RE.sub('', name.strip())
+    return f"{' '.join(name.split())}.png"
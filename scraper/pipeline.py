@@ -0,0 +1,354 @@
+"""
+Run the scraper pipeline as a dependency graph of stages
+
+Each stage is one of the scraper scripts. A stage only runs when it is out of
+date: an output is missing, the hash of one of its inputs (including its own
+scripts) changed since it last ran, or the options passed to it changed.
+Stages whose dependencies are done run concurrently.
+
+Usage:
+    python -m scraper                     # Bring every stage up to date
+    python -m scraper markdown            # Bring markdown (and what it needs) up to date
+    python -m scraper --dry-run           # Show what would run, and why
+    python -m scraper --refresh           # Also re-fetch stages that read from the wiki
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from charts import CHART_PAGES
+from wiki_urls import add_base_url_argument, set_base_url
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_FILE = 'difficulties/pipeline-state.json'
+
+
+class Stage:
+    """
+    One step of the pipeline: a command, the files it reads and writes, and the stages it needs
+    Inputs and outputs are paths or glob patterns relative to the repository root.
+    `options` maps pipeline options (e.g. 'jobs') to the stage's own flag for them.
+    `remote` stages fetch from the wiki, so once up to date they only run again on
+    --refresh, which also passes them `refresh_flag` if they have one.
+    """
+
+    def __init__(self, name, command, inputs=(), outputs=(), deps=(), options=None, remote=False, refresh_flag=None):
+        self.name = name
+        self.command = list(command)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.options = options or {}
+        self.remote = remote
+        self.refresh_flag = refresh_flag
+
+    def arguments(self, args):
+        """
+        The stage's command line for the given pipeline options, without the refresh flag
+        """
+        command = list(self.command)
+        for option, flag in self.options.items():
+            value = getattr(args, option, None)
+            if value is not None:
+                command.extend([flag, str(value)])
+        return command
+
+    def run_arguments(self, args):
+        """
+        The command line to run, including the refresh flag on --refresh
+        """
+        command = self.arguments(args)
+        if args.refresh and self.refresh_flag:
+            command.append(self.refresh_flag)
+        return command
+
+
+def python_script(path):
+    """
+    Command that runs a scraper script with the current interpreter
+    """
+    return [sys.executable, path]
+
+STAGES = [
+    Stage(
+        'charts', python_script('scraper/download_main.py'),
+        inputs=['scraper/download_main.py', 'scraper/charts.py', 'scraper/metrics.py', 'scraper/wiki_urls.py', 'scraper/flow_control.py',
+                'scraper/http_client.py', 'scraper/corpus_store.py'],
+        outputs=[filename for _, filename in CHART_PAGES],
+        remote=True,
+        refresh_flag='--force',
+    ),
+    Stage(
+        'parse', python_script('scraper/parse_main.py'),
+        inputs=[filename for _, filename in CHART_PAGES] + ['scraper/parse_main.py', 'scraper/charts.py', 'scraper/metrics.py', 'scraper/ratings.py'],
+        outputs=['difficulties/difficulties.json'],
+        deps=['charts'],
+        options={'jobs': '--jobs'},
+    ),
+    Stage(
+        'wikitext', python_script('scraper/download_difficulty_wikitext.py'),
+        inputs=['difficulties/difficulties.json', 'scraper/download_difficulty_wikitext.py', 'scraper/rate_limit.py', 'scraper/metrics.py',
+                'scraper/corpus_store.py', 'scraper/wiki_urls.py', 'scraper/wiki_pages.py', 'scraper/flow_control.py', 'scraper/http_client.py',
+                'scraper/convert_wikitext_to_markdown.py', 'scraper/charts.py', 'scraper/paths.py'],
+        outputs=['difficulties/wikitext-manifest.json'],
+        deps=['parse'],
+        options={'jobs': '--jobs'},
+        remote=True,
+    ),
+    Stage(
+        'markdown', python_script('scraper/convert_wikitext_to_markdown.py'),
+        inputs=['difficulties/wikitext/*.wikitext', 'difficulties/wikitext-intro/*.wikitext',
+                'scraper/convert_wikitext_to_markdown.py', 'scraper/mediawiki_markdown.py', 'scraper/metrics.py',
+                'scraper/corpus_store.py'],
+        outputs=['difficulties/markdown-cache.json'],
+        deps=['wikitext'],
+        options={'jobs': '--jobs', 'engine': '--engine'},
+    ),
+    Stage(
+        'snapshot', python_script('scraper/snapshot.py'),
+        inputs=['difficulties/difficulties.json', 'difficulties/markdown/*.md', 'difficulties/wikitext/*.wikitext',
+                'scraper/snapshot.py', 'scraper/ratings.py', 'scraper/paths.py'],
+        outputs=['difficulties/snapshot.bin'],
+        deps=['markdown'],
+    ),
+    Stage(
+        'images', ['node', 'scripts/download-images.js'],
+        inputs=['difficulties/difficulties.json', 'scripts/download-images.js'],
+        outputs=['difficulties/image'],
+        deps=['parse'],
+        remote=True,
+    ),
+]
+
+def hash_file(path):
+    """
+    SHA-256 of a file's bytes, read in chunks
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_inputs(stage):
+    """
+    Hash every file matched by the stage's inputs
+    Returns {path: sha256}, with paths relative to the repository root
+    """
+    hashes = {}
+    for pattern in stage.inputs:
+        for path in sorted(glob.glob(os.path.join(ROOT, pattern))):
+            if os.path.isfile(path):
+                hashes[os.path.relpath(path, ROOT).replace(os.sep, '/')] = hash_file(path)
+    return hashes
+
+def load_state(path=STATE_FILE):
+    """
+    Load the pipeline state, mapping each stage to the input hashes and command of its last successful run
+    """
+    path = os.path.join(ROOT, path)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_state(state, path=STATE_FILE):
+    """
+    Save the pipeline state
+    """
+    with open(os.path.join(ROOT, path), 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write('\n')
+
+def count_changes(old_hashes, new_hashes):
+    """
+    Number of files added, removed or modified between two {path: hash} maps
+    """
+    return sum(1 for path in set(old_hashes) | set(new_hashes) if old_hashes.get(path) != new_hashes.get(path))
+
+def stale_reason(stage, entry, hashes, command, args):
+    """
+    Why the stage has to run, or None if it is up to date
+    """
+    if args.force:
+        return 'forced'
+    if stage.remote and args.refresh:
+        return 'refreshing from the wiki'
+    for pattern in stage.outputs:
+        if not glob.glob(os.path.join(ROOT, pattern)):
+            return f"missing {pattern}"
+    if not entry:
+        return 'never run'
+    if entry.get('command') != command[1:]:
+        return 'options changed'
+    changes = count_changes(entry.get('inputs', {}), hashes)
+    if changes:
+        return f"{changes} of {len(hashes)} inputs changed"
+    return None
+
+def select_stages(targets, stages=STAGES):
+    """
+    The requested stages and everything they depend on, in pipeline order
+    """
+    by_name = {stage.name: stage for stage in stages}
+    selected = set()
+    todo = list(targets or by_name)
+    while todo:
+        name = todo.pop()
+        if name not in selected:
+            selected.add(name)
+            todo.extend(by_name[name].deps)
+    return [stage for stage in stages if stage.name in selected]
+
+def plan(stages, state, args):
+    """
+    Work out which stages a run would execute
+    A stage downstream of one that will run is assumed to run too, since its inputs may change
+    Returns a list of (stage, reason), with reason None for stages that are up to date
+    """
+    will_run = set()
+    steps = []
+    for stage in stages:
+        command = stage.arguments(args)
+        reason = stale_reason(stage, state.get(stage.name), hash_inputs(stage), command, args)
+        if reason is None:
+            upstream = [dep for dep in stage.deps if dep in will_run]
+            if upstream:
+                reason = f"after {', '.join(upstream)}"
+        if reason is not None:
+            will_run.add(stage.name)
+        steps.append((stage, reason))
+    return steps
+
+def stream_output(stage, process):
+    """
+    Print a stage's output line by line, prefixed with the stage name
+    """
+    for line in process.stdout:
+        print(f"[{stage.name}] {line.decode('utf-8', errors='replace').rstrip()}", flush=True)
+
+def run_stage(stage, state, state_lock, args):
+    """
+    Run one stage if it is out of date, recording its input hashes once it succeeds
+    Returns a result dict with its status ('ran', 'up to date' or 'failed'), reason and wall time
+    """
+    command = stage.arguments(args)
+    hashes = hash_inputs(stage)
+    with state_lock:
+        entry = state.get(stage.name)
+    reason = stale_reason(stage, entry, hashes, command, args)
+    if reason is None:
+        print(f"⏭️  {stage.name}: up to date", flush=True)
+        return {'status': 'up to date', 'reason': None, 'seconds': 0.0}
+
+    print(f"▶️  {stage.name}: running ({reason})", flush=True)
+    start = time.perf_counter()
+    env = dict(os.environ, PYTHONIOENCODING='utf-8', PYTHONUNBUFFERED='1')
+    try:
+        process = subprocess.Popen(stage.run_arguments(args), cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    except FileNotFoundError as e:
+        print(f"❌ {stage.name}: could not start: {e}", flush=True)
+        return {'status': 'failed', 'reason': reason, 'seconds': 0.0}
+    stream_output(stage, process)
+    returncode = process.wait()
+    seconds = time.perf_counter() - start
+
+    if returncode != 0:
+        print(f"❌ {stage.name}: failed with exit code {returncode} after {seconds:.1f}s", flush=True)
+        return {'status': 'failed', 'reason': reason, 'seconds': seconds}
+
+    print(f"✅ {stage.name}: done in {seconds:.1f}s", flush=True)
+    with state_lock:
+        state[stage.name] = {'inputs': hashes, 'command': command[1:]}
+        save_state(state)
+    return {'status': 'ran', 'reason': reason, 'seconds': seconds}
+
+def run_pipeline(stages, state, args):
+    """
+    Run the stages in dependency order, starting each as soon as all of its dependencies succeeded
+    Stages that depend on a failed stage are not run
+    Returns {stage name: result dict}
+    """
+    results = {}
+    pending = list(stages)
+    selected = {stage.name for stage in stages}
+    state_lock = threading.Lock()
+
+    with ThreadPoolExecutor(max_workers=max(1, len(stages))) as executor:
+        running = {}
+        while pending or running:
+            for stage in list(pending):
+                if any(dep in selected and dep not in results for dep in stage.deps):
+                    continue
+                pending.remove(stage)
+                failed = [dep for dep in stage.deps if results.get(dep, {}).get('status') in ('failed', 'blocked')]
+                if failed:
+                    print(f"⛔ {stage.name}: skipped because {', '.join(failed)} failed", flush=True)
+                    results[stage.name] = {'status': 'blocked', 'reason': None, 'seconds': 0.0}
+                else:
+                    running[executor.submit(run_stage, stage, state, state_lock, args)] = stage
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future).name] = future.result()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the scraper pipeline, skipping stages that are up to date')
+    parser.add_argument('stages', nargs='*', metavar='stage',
+                        help=f"Stages to bring up to date, with their dependencies (default: all of {', '.join(stage.name for stage in STAGES)})")
+    parser.add_argument('--dry-run', action='store_true', help='Show which stages would run, and why, without running them')
+    parser.add_argument('--force', action='store_true', help='Run the selected stages even if they are up to date')
+    parser.add_argument('--refresh', action='store_true', help='Also run the stages that fetch from the wiki')
+    parser.add_argument('--jobs', type=int, default=None, help='Passed on to the stages that take --jobs')
+    parser.add_argument('--engine', default=None, help='Markdown converter engine, passed on to the markdown stage')
+    add_base_url_argument(parser)
+    args = parser.parse_args()
+    # Inherited by every stage, including scripts/download-images.js
+    set_base_url(args.base_url)
+
+    unknown = [name for name in args.stages if name not in {stage.name for stage in STAGES}]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    stages = select_stages(args.stages)
+    state = load_state()
+
+    if args.dry_run:
+        print("📋 Plan:")
+        for stage, reason in plan(stages, state, args):
+            status = f"▶️  run ({reason})" if reason else "⏭️  up to date"
+            print(f"  {stage.name:<10} {status}")
+            if reason:
+                print(f"  {'':<10} $ {' '.join(stage.run_arguments(args))}")
+        return
+
+    start = time.perf_counter()
+    results = run_pipeline(stages, state, args)
+    total = time.perf_counter() - start
+
+    print()
+    print("=" * 80)
+    print("SUMMARY")
+    print("=" * 80)
+    icons = {'ran': '✅', 'up to date': '⏭️ ', 'failed': '❌', 'blocked': '⛔'}
+    for stage in stages:
+        result = results[stage.name]
+        timing = f" in {result['seconds']:.1f}s" if result['status'] in ('ran', 'failed') else ''
+        print(f"  {icons[result['status']]} {stage.name:<10} {result['status']}{timing}")
+    print(f"Total wall time: {total:.1f}s")
+    print("=" * 80)
+
+    if any(result['status'] in ('failed', 'blocked') for result in results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Token-bucket rate limiting shared by the scraper downloaders
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    Tokens refill continuously at `rate` per second up to `capacity`;
+    acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Take one token, sleeping until one is available
+        """
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def try_acquire(self):
+        """
+        Take one token if one is available, without waiting
+        Returns whether a token was taken
+        """
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class HostRateLimiter:
+    """
+    One token bucket per host, so independent wikis never throttle each other
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, host):
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.capacity)
+            return self.buckets[host]
+
+    def acquire(self, host):
+        """
+        Block until a request to `host` is allowed
+        """
+        self.bucket(host).acquire()
+
+    def try_acquire(self, host):
+        """
+        Take a token for `host` if one is available, without waiting
+        """
+        return self.bucket(host).try_acquire()
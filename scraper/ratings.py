@@ -0,0 +1,148 @@
+"""
+Normalize difficulty ratings into numeric bounds
+
+Chart ratings are text: plain numbers ("12.5", "-1,000"), ranges ("-28 to 15.99",
+"-∞ to ∞"), powers written with <sup> ("-10<sup>100</sup>"), named huge numbers
+("-TREE(3)") and placements ("Anonymous Placement", "?"). normalize_rating turns
+each into a lower and an upper bound, so consumers can order and filter
+difficulties without reparsing the text.
+
+Infinite bounds are stored as the strings "Infinity" and "-Infinity", which JSON
+can hold and both float() and JavaScript's Number() read back. Numbers too large
+for a float (TREE(3), 10^10^10^1,000,000) are clamped to the largest float and
+given a magnitude tier (rating_min_tier, rating_max_tier), which orders them among
+themselves: the height of a power tower that overflows, or a fixed rank for named
+googology numbers (G64 < TREE(3) < Rayo < FOOT). Tiers carry the sign of their
+bound and are 0 for every number a float can hold, so (bound, tier) sorts in order.
+"""
+import math
+import re
+import sys
+
+# Markup around a rating that carries no meaning, e.g. <big>, <font size="6">, '''bold'''
+RATING_MARKUP_RE = re.compile(r"</?(?!su[bp]\b)[a-z]+[^>]*>|'''|''", re.IGNORECASE)
+RANGE_SEPARATOR_RE = re.compile(r'\s+to\s+')
+NUMBER_RE = re.compile(r'^(\d[\d,]*(?:\.\d+)?)(?:\.x)?$')
+# "10<sup>100</sup>"; the exponent may itself hold a power
+POWER_RE = re.compile(r'^(\d[\d,]*(?:\.\d+)?)<sup>(.+)</sup>$')
+# Number followed by a short scale suffix, e.g. "1Qd" (quadrillion)
+SUFFIX_NUMBER_RE = re.compile(r'^(\d+(?:\.\d+)?)([A-Za-z]+)$')
+NUMBER_SUFFIXES = {'K': 1e3, 'M': 1e6, 'B': 1e9, 'T': 1e12, 'Qd': 1e15, 'Qn': 1e18, 'Sx': 1e21, 'Sp': 1e24}
+# Googology notations that are far larger than any float
+HUGE_NUMBER_RE = re.compile(r'^\(?(?:(?P<graham>G\d|[FG]<sub>)|(?P<tree>TREE)|(?P<rayo>Rayo)|(?P<foot>FOOT))')
+# Magnitude tier of each named number, in increasing size; all outrank any power tower written out in full
+HUGE_NUMBER_TIERS = {'graham': 1000, 'tree': 1001, 'rayo': 1002, 'foot': 1003}
+# A range end given as "???" has no bound on that side
+UNKNOWN_BOUND_RE = re.compile(r'^\?+$')
+INFINITY = '∞'
+# Ratings that say where a difficulty sits in the chart rather than how hard it is
+PLACEMENT_RE = re.compile(r'placement|unconfirmed|^\?+$', re.IGNORECASE)
+
+
+def parse_magnitude(text):
+    """
+    (value, tier) of an unsigned number, power or named huge number
+    The value is math.inf and the tier positive if it does not fit in a float, otherwise the tier is 0
+    Raises ValueError if the text is not one of those
+    """
+    match = NUMBER_RE.match(text)
+    if match:
+        return float(match.group(1).replace(',', '')), 0
+    match = POWER_RE.match(text)
+    if match:
+        base = float(match.group(1).replace(',', ''))
+        exponent, tier = parse_magnitude(match.group(2))
+        if tier:
+            # One level higher in the tower than its exponent
+            return math.inf, tier + 1
+        try:
+            return math.pow(base, exponent), 0
+        except OverflowError:
+            return math.inf, 1
+    match = SUFFIX_NUMBER_RE.match(text)
+    if match and match.group(2) in NUMBER_SUFFIXES:
+        return float(match.group(1)) * NUMBER_SUFFIXES[match.group(2)], 0
+    match = HUGE_NUMBER_RE.match(text)
+    if match:
+        return math.inf, HUGE_NUMBER_TIERS[match.lastgroup]
+    raise ValueError(f"unrecognized rating: {text!r}")
+
+def parse_bound(text, side):
+    """
+    One end of a rating as (float, signed magnitude tier); `side` is 'lower' or 'upper'
+    "105.x" covers 105 to 105.99, so it gives a different value for each side
+    """
+    text = text.strip()
+    if UNKNOWN_BOUND_RE.match(text):
+        return (-math.inf if side == 'lower' else math.inf), 0
+    sign = -1 if text.startswith('-') else 1
+    text = text.lstrip('-').strip()
+    if text == INFINITY:
+        return sign * math.inf, 0
+    value, tier = parse_magnitude(text)
+    # Finite numbers too large for a float still rank below a true infinity; the tier orders them
+    if math.isinf(value):
+        value = sys.float_info.max
+    if side == 'upper' and text.endswith('.x'):
+        value += 0.99
+    return sign * value, sign * tier
+
+def encode_bound(value):
+    """
+    A bound as stored in JSON: a number, or "Infinity"/"-Infinity"
+    """
+    if math.isinf(value):
+        return 'Infinity' if value > 0 else '-Infinity'
+    return int(value) if value.is_integer() and abs(value) < 2 ** 53 else value
+
+def decode_bound(value):
+    """
+    A stored bound back as a float (float() already understands "Infinity"), or None if there is none
+    """
+    return None if value is None else float(value)
+
+def normalize_rating(rating):
+    """
+    Split a rating (raw chart markup or plain text) into
+    {'rating_min': ..., 'rating_max': ..., 'rating_min_tier': int, 'rating_max_tier': int, 'rating_placement': bool}
+    Placements and ratings that cannot be read have no bounds or tiers (None)
+    """
+    text = RATING_MARKUP_RE.sub('', rating or '').strip()
+    unbounded = {'rating_min': None, 'rating_max': None, 'rating_min_tier': None, 'rating_max_tier': None}
+    if not text or PLACEMENT_RE.search(text):
+        return {**unbounded, 'rating_placement': True}
+    ends = RANGE_SEPARATOR_RE.split(text, maxsplit=1)
+    try:
+        lower = parse_bound(ends[0], 'lower')
+        upper = parse_bound(ends[-1], 'upper')
+    except ValueError:
+        return {**unbounded, 'rating_placement': False}
+    if lower > upper:
+        lower, upper = upper, lower
+    return {'rating_min': encode_bound(lower[0]), 'rating_max': encode_bound(upper[0]),
+            'rating_min_tier': lower[1], 'rating_max_tier': upper[1], 'rating_placement': False}
+
+def rating_bounds(difficulty):
+    """
+    (lower, upper) floats of a difficulty's rating, or None if it has none
+    Uses the normalized fields when present, and normalizes the rating text otherwise
+    """
+    if 'rating_min' not in difficulty:
+        difficulty = normalize_rating(difficulty.get('rating'))
+    lower = decode_bound(difficulty.get('rating_min'))
+    upper = decode_bound(difficulty.get('rating_max'))
+    if lower is None or upper is None:
+        return None
+    return lower, upper
+
+def rating_keys(difficulty):
+    """
+    ((lower, tier), (upper, tier)) sort keys of a difficulty's rating, or None if it has none
+    Unlike the bounds alone, these order the numbers too large for a float among themselves
+    """
+    if 'rating_min_tier' not in difficulty:
+        difficulty = normalize_rating(difficulty.get('rating'))
+    bounds = rating_bounds(difficulty)
+    if bounds is None:
+        return None
+    return (bounds[0], difficulty.get('rating_min_tier') or 0), (bounds[1], difficulty.get('rating_max_tier') or 0)
@@ -0,0 +1,269 @@
+"""
+Export the difficulty dataset as one compact, memory-mappable binary snapshot
+
+The snapshot holds every record of difficulties.json together with its markdown
+description and wikitext, so tools can load the whole dataset, or seek straight
+to one difficulty's description, without parsing JSON or opening hundreds of files.
+
+Layout (little-endian):
+    header      MAGIC, version, then the counts and offsets of the sections below
+    strings     offset table (count + 1 uint32) followed by the UTF-8 bytes of
+                every distinct string value, so repeated classes, types and hosts
+                are stored once
+    records     one fixed-size RECORD_FORMAT entry per difficulty: a string id per
+                STRING_FIELDS field, the rating bounds as float64 and their magnitude
+                tiers as int16, a flags byte, and the offset and length of its
+                markdown and wikitext blobs
+    blobs       the markdown and wikitext bytes, back to back
+
+Records have a fixed size, so record i is found at records + i * RECORD_SIZE.
+
+Usage:
+    python scraper/snapshot.py                   # Write difficulties/snapshot.bin
+    python scraper/snapshot.py --no-wikitext     # Leave the wikitext out (much smaller)
+    python scraper/snapshot.py --show Easy       # Print one difficulty from the snapshot
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+
+from paths import sanitize_filename
+from ratings import decode_bound, normalize_rating
+
+DIFFICULTIES_FILE = 'difficulties/difficulties.json'
+MARKDOWN_DIR = 'difficulties/markdown'
+WIKITEXT_DIR = 'difficulties/wikitext'
+SNAPSHOT_FILE = 'difficulties/snapshot.bin'
+
+MAGIC = b'DIFFSNAP'
+VERSION = 2
+# magic, version, record count, string count, then the offsets of the strings, records and blobs sections
+HEADER_FORMAT = '<8sHIIQQQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+STRING_FIELDS = ('name', 'wiki_name', 'rating', 'type', 'class', 'class_section', 'image', 'url')
+# String ids, rating_min, rating_max, rating_min_tier, rating_max_tier, flags,
+# markdown offset and length, wikitext offset and length
+RECORD_FORMAT = '<' + 'I' * len(STRING_FIELDS) + 'ddhhB' + 'QI' * 2
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+# String id of a missing value
+NO_STRING = 0xFFFFFFFF
+# Flag bits
+PLACEMENT = 1
+HAS_MARKDOWN = 2
+HAS_WIKITEXT = 4
+
+
+def read_bytes(path):
+    """
+    A file's bytes, or None if it does not exist
+    """
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def build_snapshot(difficulties, markdown_dir=MARKDOWN_DIR, wikitext_dir=WIKITEXT_DIR, include_wikitext=True):
+    """
+    The snapshot of `difficulties` as bytes, with each difficulty's markdown and wikitext
+    read from the files named after it
+    """
+    string_ids = {}
+    strings = []
+    records = []
+    blobs = []
+    blob_size = 0
+
+    def intern(value):
+        if value is None:
+            return NO_STRING
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value.encode('utf-8'))
+        return string_ids[value]
+
+    def add_blob(data):
+        nonlocal blob_size
+        if data is None:
+            return 0, 0
+        offset = blob_size
+        blobs.append(data)
+        blob_size += len(data)
+        return offset, len(data)
+
+    for difficulty in difficulties:
+        stem = sanitize_filename(difficulty['name'])
+        markdown = read_bytes(os.path.join(markdown_dir, f"{stem}.md"))
+        wikitext = read_bytes(os.path.join(wikitext_dir, f"{stem}.wikitext")) if include_wikitext else None
+        rating = difficulty if 'rating_min_tier' in difficulty else normalize_rating(difficulty.get('rating'))
+        # Ratings without bounds are stored as NaN, with tier 0
+        bounds = [decode_bound(rating.get(bound)) for bound in ('rating_min', 'rating_max')]
+        bounds = [math.nan if bound is None else bound for bound in bounds]
+        tiers = [rating.get(tier) or 0 for tier in ('rating_min_tier', 'rating_max_tier')]
+        flags = ((PLACEMENT if rating.get('rating_placement') else 0)
+                 | (HAS_MARKDOWN if markdown is not None else 0)
+                 | (HAS_WIKITEXT if wikitext is not None else 0))
+        records.append(struct.pack(
+            RECORD_FORMAT,
+            *(intern(difficulty.get(field)) for field in STRING_FIELDS),
+            *bounds, *tiers, flags,
+            *add_blob(markdown), *add_blob(wikitext),
+        ))
+
+    string_offsets = [0]
+    for data in strings:
+        string_offsets.append(string_offsets[-1] + len(data))
+    string_table = struct.pack(f'<{len(string_offsets)}I', *string_offsets) + b''.join(strings)
+
+    strings_offset = HEADER_SIZE
+    records_offset = strings_offset + len(string_table)
+    blobs_offset = records_offset + RECORD_SIZE * len(records)
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(records), len(strings),
+                         strings_offset, records_offset, blobs_offset)
+    return b''.join([header, string_table, *records, *blobs])
+
+def write_snapshot(output_file=SNAPSHOT_FILE, difficulties_file=DIFFICULTIES_FILE, **options):
+    """
+    Export difficulties.json and its markdown and wikitext files to a snapshot
+    Returns (number of difficulties, size of the snapshot in bytes)
+    """
+    with open(difficulties_file, 'r', encoding='utf-8') as f:
+        difficulties = json.load(f)
+    data = build_snapshot(difficulties, **options)
+    # Write to a temporary file first so readers never map a half-written snapshot
+    temporary_file = f"{output_file}.tmp"
+    with open(temporary_file, 'wb') as f:
+        f.write(data)
+    os.replace(temporary_file, output_file)
+    return len(difficulties), len(data)
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file
+    Records and strings are decoded on access, so opening a snapshot costs the same
+    however large it is; use it as a context manager to unmap it when done.
+    """
+
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.count, self.string_count,
+         self.strings_offset, self.records_offset, self.blobs_offset) = struct.unpack_from(HEADER_FORMAT, self.data)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} difficulty snapshot")
+        self.string_bytes_offset = self.strings_offset + 4 * (self.string_count + 1)
+        self.string_cache = {}
+        self.positions = None
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def string(self, string_id):
+        """
+        The interned string with the given id, or None for NO_STRING
+        """
+        if string_id == NO_STRING:
+            return None
+        if string_id not in self.string_cache:
+            start, end = struct.unpack_from('<II', self.data, self.strings_offset + 4 * string_id)
+            offset = self.string_bytes_offset
+            self.string_cache[string_id] = self.data[offset + start:offset + end].decode('utf-8')
+        return self.string_cache[string_id]
+
+    def raw_record(self, position):
+        """
+        The unpacked RECORD_FORMAT tuple of the difficulty at `position`
+        """
+        if not 0 <= position < self.count:
+            raise IndexError(position)
+        return struct.unpack_from(RECORD_FORMAT, self.data, self.records_offset + position * RECORD_SIZE)
+
+    def __getitem__(self, position):
+        """
+        The difficulty at `position`, as in difficulties.json plus its normalized rating
+        """
+        fields = self.raw_record(position)
+        difficulty = {field: self.string(string_id) for field, string_id in zip(STRING_FIELDS, fields)}
+        rating_min, rating_max, min_tier, max_tier, flags = fields[len(STRING_FIELDS):len(STRING_FIELDS) + 5]
+        # NaN bounds mean the rating has none
+        difficulty['rating_min'] = None if math.isnan(rating_min) else rating_min
+        difficulty['rating_max'] = None if math.isnan(rating_max) else rating_max
+        difficulty['rating_min_tier'] = None if math.isnan(rating_min) else min_tier
+        difficulty['rating_max_tier'] = None if math.isnan(rating_max) else max_tier
+        difficulty['rating_placement'] = bool(flags & PLACEMENT)
+        return difficulty
+
+    def __iter__(self):
+        return (self[position] for position in range(self.count))
+
+    def position(self, name):
+        """
+        Position of the first difficulty called `name`, or None
+        """
+        if self.positions is None:
+            self.positions = {}
+            for position in range(self.count):
+                self.positions.setdefault(self.string(self.raw_record(position)[0]), position)
+        return self.positions.get(name)
+
+    def blob(self, position, which):
+        """
+        The markdown (which=0) or wikitext (which=1) of the difficulty at `position`, or None
+        """
+        fields = self.raw_record(position)
+        flags = fields[len(STRING_FIELDS) + 4]
+        if not flags & (HAS_MARKDOWN if which == 0 else HAS_WIKITEXT):
+            return None
+        offset, length = fields[len(STRING_FIELDS) + 5 + 2 * which:len(STRING_FIELDS) + 7 + 2 * which]
+        start = self.blobs_offset + offset
+        return self.data[start:start + length].decode('utf-8')
+
+    def description(self, position):
+        """
+        The markdown description of the difficulty at `position`, or None
+        """
+        return self.blob(position, 0)
+
+    def wikitext(self, position):
+        """
+        The wikitext page of the difficulty at `position`, or None
+        """
+        return self.blob(position, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the difficulty dataset as a binary snapshot')
+    parser.add_argument('--output', default=SNAPSHOT_FILE, help=f'Snapshot file (default: {SNAPSHOT_FILE})')
+    parser.add_argument('--no-wikitext', action='store_true', help='Leave the wikitext pages out of the snapshot')
+    parser.add_argument('--show', metavar='NAME', help='Print one difficulty from an existing snapshot instead')
+    args = parser.parse_args()
+
+    if args.show:
+        with Snapshot(args.output) as snapshot:
+            position = snapshot.position(args.show)
+            if position is None:
+                parser.error(f"no difficulty named {args.show!r} in {args.output}")
+            print(json.dumps(snapshot[position], indent=2, ensure_ascii=False))
+            print(f"\n{snapshot.description(position) or '(no description)'}")
+        return
+
+    count, size = write_snapshot(args.output, include_wikitext=not args.no_wikitext)
+    print(f"✅ Wrote {count} difficulties to {args.output} ({size / 1e6:.2f} MB)")
+
+if __name__ == "__main__":
+    main()
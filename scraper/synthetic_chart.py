@@ -0,0 +1,87 @@
+"""
+Generate synthetic difficulty charts N times the size of the real one, for scalability testing
+
+The real chart is copied as is (class headers, wikitable mw-collapsible tables,
+section markers) and every difficulty row in it is repeated N times. The copies
+keep the row's image and link style ([[Name]], [[Name|Display]] or
+[[w:c:wiki:Name|Display]]) but get a numbered name, so a chart generated at
+scale N parses to N times as many difficulties.
+
+Usage:
+    python scraper/synthetic_chart.py 100                      # Write difficulties/synthetic/source-100x.wikitext
+    python scraper/synthetic_chart.py 10 100 1000 --output /tmp/charts
+"""
+import argparse
+import os
+import re
+
+from charts import CHART_PAGES
+
+SOURCE_FILE = CHART_PAGES[0][1]
+OUTPUT_DIR = 'difficulties/synthetic'
+# First line of a difficulty row: the image, as a File: link or a Class...Difficulties template
+ROW_IMAGE_RE = re.compile(r'^\|\s*(?:\[\[File:|\{\{Class)')
+# Link on the name line; group 1 is the target, group 2 the optional |display
+NAME_LINK_RE = re.compile(r'\[\[(?!File:)([^\]|]+)(\|[^\]]+)?\]\]')
+# Lines in a row: image, name, type, rating
+ROW_LINES = 4
+
+def rename(name_line, copy):
+    """
+    Give the link on a name line a numbered target (and display name, if it has one)
+    Name lines that only hold an image link get the number on its last parameter
+    """
+    def numbered(match):
+        display = f"{match.group(2)} {copy}" if match.group(2) else ''
+        return f"[[{match.group(1)} {copy}{display}]]"
+    if NAME_LINK_RE.search(name_line):
+        return NAME_LINK_RE.sub(numbered, name_line, count=1)
+    end = name_line.rfind(']]')
+    return f"{name_line[:end]} {copy}{name_line[end:]}"
+
+def scale_chart(lines, scale):
+    """
+    Yield the lines of `lines` with every difficulty row repeated `scale` times
+    """
+    lines = list(lines)
+    i = 0
+    while i < len(lines):
+        row = lines[i:i + ROW_LINES]
+        if len(row) == ROW_LINES and ROW_IMAGE_RE.match(row[0].strip()) and ']]' in row[1]:
+            yield from row
+            for copy in range(2, scale + 1):
+                yield '|-\n'
+                yield row[0]
+                yield rename(row[1], copy)
+                yield from row[2:]
+            i += ROW_LINES
+        else:
+            yield lines[i]
+            i += 1
+
+def write_scaled_chart(scale, output_file, source_file=SOURCE_FILE):
+    """
+    Write the source chart scaled by `scale` to output_file
+    Returns the size of the written file in bytes
+    """
+    with open(source_file, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.writelines(scale_chart(lines, scale))
+    return os.path.getsize(output_file)
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate difficulty charts scaled up from the real one')
+    parser.add_argument('scales', nargs='+', type=int, help='Scale factors, e.g. 10 100 1000')
+    parser.add_argument('--source', default=SOURCE_FILE, help=f'Chart to scale (default: {SOURCE_FILE})')
+    parser.add_argument('--output', default=OUTPUT_DIR, help=f'Directory to write to (default: {OUTPUT_DIR})')
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    for scale in args.scales:
+        output_file = os.path.join(args.output, f"source-{scale}x.wikitext")
+        size = write_scaled_chart(scale, output_file, args.source)
+        print(f"✅ {output_file} ({size / 1e6:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,12 @@
-import json
+from difficulty_index import load_index
 
-with open('difficulties/difficulties.json', encoding='utf-8') as f:
-    data = json.load(f)
+index = load_index()
 
 # Count by class
-class_counts = {}
-for d in data:
-    cls = d.get('class', 'Unknown')
-    class_counts[cls] = class_counts.get(cls, 0) + 1
+class_counts = {cls if cls is not None else 'Unknown': count for cls, count in index.count_by('class').items()}
 
 print("Difficulties by class:")
 for cls in sorted(class_counts.keys()):
     print(f"  {cls}: {class_counts[cls]}")
 
-print(f"\nTotal: {len(data)} difficulties")
+print(f"\nTotal: {len(index)} difficulties")
@@ -1,10 +1,9 @@
-import json
+from difficulty_index import load_index
 
-with open('difficulties/difficulties.json', encoding='utf-8') as f:
-    data = json.load(f)
+index = load_index()
 
-class2 = [d for d in data if d.get('class') == 'Class 2']
-class3 = [d for d in data if d.get('class') == 'Class 3']
+class2 = index.find(**{'class': 'Class 2'})
+class3 = index.find(**{'class': 'Class 3'})
 
 print(f'Class 2: {len(class2)} difficulties')
 print(f'Class 3: {len(class3)} difficulties')
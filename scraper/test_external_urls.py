@@ -1,17 +1,16 @@
 """
 Test script to verify external wiki URLs are generated correctly
 """
-import json
+from difficulty_index import load_index
 
 # Load the parsed difficulties
-with open('difficulties/difficulties.json', 'r', encoding='utf-8') as f:
-    difficulties = json.load(f)
+index = load_index()
 
 # Find difficulties with external wiki links (EToH difficulties)
 print("External Wiki Difficulties (EToH):")
 print("=" * 80)
 
-external_diffs = [d for d in difficulties if 'jtoh.fandom.com' in d['url']]
+external_diffs = index.find(host='jtoh.fandom.com')
 
 if external_diffs:
     for diff in external_diffs[:10]:  # Show first 10
@@ -28,7 +27,7 @@ print("\n" + "=" * 80)
 print("\nInternal Wiki Difficulties (JJT):")
 print("=" * 80)
 
-internal_diffs = [d for d in difficulties if 'jtohs-joke-towers.fandom.com' in d['url']]
+internal_diffs = index.find(host='jtohs-joke-towers.fandom.com')
 print(f"Total internal wiki difficulties: {len(internal_diffs)}")
 
 # Show a few examples
@@ -38,7 +37,7 @@ for diff in internal_diffs[:3]:
     print()
 
 # Check for etoh-misc wiki
-misc_diffs = [d for d in difficulties if 'etoh-misc.fandom.com' in d['url']]
+misc_diffs = index.find(host='etoh-misc.fandom.com')
 if misc_diffs:
     print("\n" + "=" * 80)
     print("\nEToH-Misc Wiki Difficulties:")
@@ -0,0 +1,154 @@
+"""
+Check the difficulty dataset for consistency in one pass
+
+Loads difficulties.json and lists the wikitext, markdown and image directories
+once, then checks every difficulty against those listings with set lookups:
+- errors: duplicate names, bad URLs, missing wikitext, markdown or image
+- warnings: orphan wikitext/markdown/image files that no difficulty uses, and
+  classified difficulties that point at the EToH wiki
+and ends with the number of difficulties per class.
+
+Exits with status 1 if there are errors (or warnings, with --strict), so it can
+run on every commit.
+
+Usage:
+    python scraper/validate.py
+    python scraper/validate.py --strict     # Fail on warnings too
+"""
+import argparse
+import json
+import os
+import sys
+from urllib.parse import urlparse
+
+from difficulty_index import DIFFICULTIES_FILE, DifficultyIndex
+from paths import image_filename, sanitize_filename
+
+HANDWRITTEN_FILE = 'difficulties/handwritten-difficulties.json'
+WIKITEXT_DIR = 'difficulties/wikitext'
+MARKDOWN_DIR = 'difficulties/markdown'
+IMAGE_DIR = 'difficulties/image'
+MARKDOWN_CACHE_FILE = 'difficulties/markdown-cache.json'
+ETOH_HOST = 'jtoh.fandom.com'
+
+ERRORS = ('duplicate-name', 'bad-url', 'missing-wikitext', 'missing-markdown', 'missing-image')
+WARNINGS = ('orphan-wikitext', 'orphan-markdown', 'orphan-image', 'classified-etoh')
+
+
+
+def list_stems(directory, suffix):
+    """
+    Names (without `suffix`) of the files in `directory` ending in `suffix`
+    """
+    if not os.path.isdir(directory):
+        return set()
+    return {entry.name[:-len(suffix)] for entry in os.scandir(directory)
+            if entry.is_file() and entry.name.endswith(suffix)}
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def url_problem(url):
+    """
+    What is wrong with a difficulty's wiki URL, or None if it looks right
+    """
+    parsed = urlparse(url or '')
+    if parsed.scheme != 'https':
+        return 'not an https URL'
+    if not parsed.netloc.endswith('.fandom.com'):
+        return f"not a Fandom wiki ({parsed.netloc or 'no host'})"
+    if not parsed.path.startswith('/wiki/') or parsed.path == '/wiki/':
+        return 'no /wiki/ page'
+    if ' ' in url:
+        return 'contains spaces'
+    return None
+
+def validate(difficulties, wikitext_stems, markdown_stems, images, handwritten_names=(), empty_pages=()):
+    """
+    Check every difficulty against the file listings
+    `empty_pages` are wikitext names whose introduction was empty, so they have no markdown
+    Returns {check: [message, ...]} for the checks that found something
+    """
+    issues = {check: [] for check in ERRORS + WARNINGS}
+    seen_names = {}
+    used_stems = set(handwritten_names)
+    used_images = {image_filename(name) for name in handwritten_names}
+
+    for position, difficulty in enumerate(difficulties):
+        name = difficulty.get('name', '')
+        label = f"{name} ({difficulty.get('class')})"
+
+        if name in seen_names:
+            issues['duplicate-name'].append(f"{label} duplicates entry #{seen_names[name] + 1}")
+        else:
+            seen_names[name] = position
+
+        problem = url_problem(difficulty.get('url'))
+        if problem:
+            issues['bad-url'].append(f"{label}: {difficulty.get('url')!r} is {problem}")
+        elif urlparse(difficulty['url']).netloc == ETOH_HOST and difficulty.get('class') != 'Unclassified':
+            issues['classified-etoh'].append(f"{label} → {difficulty['url']}")
+
+        stem = sanitize_filename(name)
+        used_stems.add(stem)
+        if stem not in wikitext_stems:
+            issues['missing-wikitext'].append(f"{label}: no {WIKITEXT_DIR}/{stem}.wikitext")
+        elif stem not in markdown_stems and stem not in empty_pages:
+            issues['missing-markdown'].append(f"{label}: no {MARKDOWN_DIR}/{stem}.md")
+
+        candidates = [image_filename(name)]
+        if difficulty.get('image'):
+            candidates.append(os.path.basename(difficulty['image']))
+        used_images.update(candidates)
+        if not any(candidate in images for candidate in candidates):
+            issues['missing-image'].append(f"{label}: none of {', '.join(candidates)} in {IMAGE_DIR}")
+
+    issues['orphan-wikitext'] = [f"{WIKITEXT_DIR}/{stem}.wikitext" for stem in sorted(wikitext_stems - used_stems)]
+    issues['orphan-markdown'] = [f"{MARKDOWN_DIR}/{stem}.md" for stem in sorted(markdown_stems - used_stems)]
+    issues['orphan-image'] = [f"{IMAGE_DIR}/{image}" for image in sorted(images - used_images)]
+    return {check: messages for check, messages in issues.items() if messages}
+
+def main():
+    parser = argparse.ArgumentParser(description='Check difficulties.json against the wikitext, markdown and image files')
+    parser.add_argument('--strict', action='store_true', help='Exit with status 1 on warnings as well as errors')
+    parser.add_argument('--limit', type=int, default=20, help='Messages shown per check (default: 20, 0 for all)')
+    args = parser.parse_args()
+
+    index = DifficultyIndex.load(DIFFICULTIES_FILE)
+    handwritten_names = [entry['name'] for entry in load_json(HANDWRITTEN_FILE, []) if entry.get('name')]
+    empty_pages = {name for name, entry in load_json(MARKDOWN_CACHE_FILE, {}).items() if entry.get('status') == 'empty'}
+    images = {entry.name for entry in os.scandir(IMAGE_DIR) if entry.is_file()} if os.path.isdir(IMAGE_DIR) else set()
+
+    issues = validate(index.difficulties, list_stems(WIKITEXT_DIR, '.wikitext'), list_stems(MARKDOWN_DIR, '.md'),
+                      images, handwritten_names, empty_pages)
+
+    print(f"Checked {len(index)} difficulties against {WIKITEXT_DIR}, {MARKDOWN_DIR} and {IMAGE_DIR}\n")
+    for check, messages in issues.items():
+        icon = '❌' if check in ERRORS else '⚠️ '
+        print(f"{icon} {check}: {len(messages)}")
+        shown = messages if args.limit <= 0 else messages[:args.limit]
+        for message in shown:
+            print(f"    {message}")
+        if len(shown) < len(messages):
+            print(f"    ... and {len(messages) - len(shown)} more")
+
+    errors = sum(len(messages) for check, messages in issues.items() if check in ERRORS)
+    warnings = sum(len(messages) for check, messages in issues.items() if check in WARNINGS)
+    print()
+    print("=" * 80)
+    print("SUMMARY")
+    print("=" * 80)
+    for value, count in sorted(index.count_by('class').items(), key=lambda item: str(item[0])):
+        print(f"  {value}: {count}")
+    print(f"  Total: {len(index)} difficulties")
+    print(f"{'❌' if errors else '✅'} {errors} error(s), {warnings} warning(s)")
+    print("=" * 80)
+
+    if errors or (args.strict and warnings):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
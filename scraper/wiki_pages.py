@@ -0,0 +1,40 @@
+"""
+How MediaWiki names and divides pages, as far as the scraper needs to agree with it
+
+Shared by the wikitext downloader and mock_fandom.py, so the mock answers
+requests the way the real API does without importing the downloader.
+"""
+import re
+
+# Maximum number of titles the MediaWiki API accepts in one query
+MAX_TITLES = 50
+# Section headers, as MediaWiki numbers them for rvsection
+HEADING_RE = re.compile(r'^(={1,6})(.+?)\1\s*$', re.MULTILINE)
+
+
+def normalize_title(title):
+    """
+    A page title the way MediaWiki normalizes it: underscores to spaces, first letter upper case
+    """
+    title = ' '.join(title.replace('_', ' ').split())
+    return title[:1].upper() + title[1:]
+
+def page_section(content, section):
+    """
+    The text of section number `section` of a page, as rvsection returns it, or None if there is none
+    Section 0 is the text before the first header; section n runs from the n-th header to
+    the next header of the same or a higher level, so it includes its subsections.
+    """
+    headings = list(HEADING_RE.finditer(content))
+    if section == 0:
+        return content[:headings[0].start()].rstrip() if headings else content
+    if not 0 < section <= len(headings):
+        return None
+    heading = headings[section - 1]
+    level = len(heading.group(1))
+    end = len(content)
+    for later in headings[section:]:
+        if len(later.group(1)) <= level:
+            end = later.start()
+            break
+    return content[heading.start():end].rstrip()
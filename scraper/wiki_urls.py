@@ -0,0 +1,52 @@
+"""
+Where the scraper's wiki requests are sent
+
+By default requests go to the Fandom wikis themselves. Setting FANDOM_BASE_URL
+(or passing --base-url to a downloader) sends them to another server instead,
+such as mock_fandom.py, with the wiki's host as the first path segment:
+
+    https://jtoh.fandom.com/api.php  →  http://127.0.0.1:8765/jtoh.fandom.com/api.php
+
+The variable is inherited by child processes, so the pipeline and
+scripts/download-images.js follow the same override.
+"""
+import os
+from urllib.parse import urlsplit, urlunsplit
+
+BASE_URL_ENV = 'FANDOM_BASE_URL'
+
+
+def base_url():
+    """
+    The override base URL, or None to talk to the wikis directly
+    """
+    return os.environ.get(BASE_URL_ENV) or None
+
+def set_base_url(url):
+    """
+    Send this process's (and its children's) wiki requests to `url`; None or '' restores the real wikis
+    """
+    if url:
+        os.environ[BASE_URL_ENV] = url.rstrip('/')
+    else:
+        os.environ.pop(BASE_URL_ENV, None)
+
+def request_url(url):
+    """
+    The URL to actually request for a wiki URL, following the base URL override
+    """
+    base = base_url()
+    if not base:
+        return url
+    parts = urlsplit(url)
+    base_parts = urlsplit(base)
+    path = f"{base_parts.path.rstrip('/')}/{parts.netloc}{parts.path}"
+    return urlunsplit((base_parts.scheme, base_parts.netloc, path, parts.query, parts.fragment))
+
+def add_base_url_argument(parser):
+    """
+    Add the --base-url option shared by the downloaders
+    """
+    parser.add_argument('--base-url', default=base_url(),
+                        help=f'Send wiki requests to this server instead, e.g. http://127.0.0.1:8765 '
+                             f'for mock_fandom.py (default: ${BASE_URL_ENV}, else the real wikis)')
@@ -10,6 +10,21 @@ const DIFFICULTIES_JSON = path.join(__dirname, "..", "difficulties", "difficulti
 const IMAGE_DIR = path.join(__dirname, "..", "difficulties", "image");
 const IMAGE_SIZE = 50; // 50x50 pixels
 
+// Pause between downloads: shrinks while the wiki answers quickly, doubles when it throttles or fails
+// (the same additive-increase/multiplicative-decrease idea as scraper/flow_control.py)
+const INITIAL_DELAY_MS = 500;
+const MIN_DELAY_MS = 100;
+const MAX_DELAY_MS = 30000;
+const DELAY_STEP_MS = 50;
+// Latency this many times the best seen counts as the wiki slowing down
+const LATENCY_TOLERANCE = 2;
+// Transient failures (429, 5xx, dropped connections) are retried with jittered exponential backoff,
+// added on top of any Retry-After
+const MAX_RETRIES = 5;
+const BACKOFF_BASE_MS = 500;
+const BACKOFF_CAP_MS = 30000;
+const TRANSIENT_STATUSES = new Set([429, 500, 502, 503, 504]);
+
 /**
  * Get Fandom image URL for a specific size
  * All images are hosted on the jtohs-joke-towers wiki
@@ -22,7 +37,11 @@ function getFandomImageUrl(imageFilename, size = 50) {
 	const encodedFilename = encodeURIComponent(imageFilename);
 
 	// Use Fandom's Special:FilePath endpoint which redirects to the actual image
-	const baseUrl = `https://${wikiName}.fandom.com/wiki/Special:FilePath/${encodedFilename}`;
+	// FANDOM_BASE_URL sends the request to another server, e.g. scraper/mock_fandom.py
+	const host = `${wikiName}.fandom.com`;
+	const baseUrl = process.env.FANDOM_BASE_URL
+		? `${process.env.FANDOM_BASE_URL.replace(/\/+$/, "")}/${host}/wiki/Special:FilePath/${encodedFilename}`
+		: `https://${host}/wiki/Special:FilePath/${encodedFilename}`;
 	const thumbnailUrl = `${baseUrl}?width=${size}&height=${size}`;
 
 	return thumbnailUrl;
@@ -130,9 +149,13 @@ function downloadToBuffer(url) {
 				}
 
 				if (response.statusCode !== 200) {
-					return reject(
-						new Error(`Failed to download: ${response.statusCode} ${response.statusMessage}`),
+					const error = new Error(
+						`Failed to download: ${response.statusCode} ${response.statusMessage}`,
 					);
+					error.statusCode = response.statusCode;
+					error.retryAfter = parseRetryAfter(response.headers["retry-after"]);
+					response.resume();
+					return reject(error);
 				}
 
 				const chunks = [];
@@ -144,6 +167,62 @@ function downloadToBuffer(url) {
 	});
 }
 
+/**
+ * Seconds to wait from a Retry-After header (seconds or an HTTP date), or null
+ */
+function parseRetryAfter(value) {
+	if (!value) {
+		return null;
+	}
+	const seconds = Number(value);
+	if (!Number.isNaN(seconds)) {
+		return Math.max(0, seconds);
+	}
+	const date = Date.parse(value);
+	return Number.isNaN(date) ? null : Math.max(0, (date - Date.now()) / 1000);
+}
+
+/**
+ * Whether a download error is worth retrying
+ */
+function isTransient(error) {
+	return error.statusCode === undefined || TRANSIENT_STATUSES.has(error.statusCode);
+}
+
+/**
+ * Download with retries, adapting `pacing.delayMs` (the pause between downloads) to how the wiki responds
+ */
+async function downloadWithRetries(url, pacing) {
+	for (let attempt = 0; ; attempt++) {
+		const start = Date.now();
+		try {
+			const buffer = await downloadToBuffer(url);
+			const latency = Date.now() - start;
+			pacing.bestLatency = Math.min(pacing.bestLatency, latency);
+			if (latency > pacing.bestLatency * LATENCY_TOLERANCE) {
+				pacing.delayMs = Math.min(MAX_DELAY_MS, pacing.delayMs * 1.5);
+			} else {
+				pacing.delayMs = Math.max(MIN_DELAY_MS, pacing.delayMs - DELAY_STEP_MS);
+			}
+			return buffer;
+		} catch (error) {
+			if (!isTransient(error) || attempt === MAX_RETRIES) {
+				throw error;
+			}
+			pacing.delayMs = Math.min(MAX_DELAY_MS, pacing.delayMs * 2);
+			pacing.retries++;
+			// Jitter goes on top of any Retry-After, never below it
+			const waitMs =
+				(error.retryAfter || 0) * 1000 +
+				Math.random() * Math.min(BACKOFF_CAP_MS, BACKOFF_BASE_MS * 2 ** attempt);
+			console.log(
+				`  ⏳ ${error.message}; retrying in ${(waitMs / 1000).toFixed(1)}s (${attempt + 1}/${MAX_RETRIES})`,
+			);
+			await sleep(waitMs);
+		}
+	}
+}
+
 async function main() {
 	console.log("Loading difficulties.json...");
 
@@ -168,6 +247,7 @@ async function main() {
 	};
 
 	let jsonModified = false;
+	const pacing = { delayMs: INITIAL_DELAY_MS, bestLatency: Infinity, retries: 0 };
 
 	// Process each difficulty
 	for (let i = 0; i < difficulties.length; i++) {
@@ -222,7 +302,7 @@ async function main() {
 			console.log(`  URL: ${imageUrl}`);
 
 			// Download to buffer
-			const buffer = await downloadToBuffer(imageUrl);
+			const buffer = await downloadWithRetries(imageUrl, pacing);
 
 			if (buffer.length === 0) {
 				throw new Error("Downloaded file is empty");
@@ -254,8 +334,8 @@ async function main() {
 				jsonModified = true;
 			}
 
-			// Rate limiting - wait 500ms between requests
-			await sleep(500);
+			// Rate limiting - wait between requests, as long as the wiki's recent responses suggest
+			await sleep(pacing.delayMs);
 		} catch (error) {
 			console.log(`  ❌ Failed: ${error.message}\n`);
 			stats.failed++;
@@ -272,6 +352,7 @@ async function main() {
 	console.log(`  ⏭️  Skipped (already exist): ${stats.skipped}`);
 	console.log(`  ❌ Failed: ${stats.failed}`);
 	console.log(`  ℹ️  No image specified: ${stats.noImage}`);
+	console.log(`  ⏳ Retried requests: ${pacing.retries}`);
 	console.log("=".repeat(80));
 }
 
@@ -371,7 +371,12 @@ async function main() {
 		const visualRating = difficulty.rating;
 		
         let layoutRating = Number.NaN;
-        if (!Number.isNaN(difficulty.rating)) {
+        if (difficulty.rating_min !== undefined && difficulty.rating_min !== null && Number.isFinite(Number(difficulty.rating_min))
+            && !difficulty.rating_min_tier) {
+            // Lower bound normalized by scraper/ratings.py; ranges are laid out at their start.
+            // A non-zero tier marks a number too large for a float, clamped there, so it is not used
+            layoutRating = Number(difficulty.rating_min);
+        } else if (!Number.isNaN(difficulty.rating)) {
             layoutRating = Number.parseFloat(difficulty.rating);
         }
 